@@ -0,0 +1,147 @@
+# encoding:utf-8
+import re
+import time
+from urllib.parse import parse_qs, urlparse
+
+from .extractors import format_article
+
+# B站接口，只返回视频元数据和字幕，不需要下载和解析视频页面
+VIEW_API = "https://api.bilibili.com/x/web-interface/view"
+TAGS_API = "https://api.bilibili.com/x/tag/archive/tags"
+PLAYER_API = "https://api.bilibili.com/x/player/v2"
+
+SHORT_LINK_HOSTS = ("b23.tv", "bili2233.cn")
+
+_VIDEO_PATH = re.compile(r"/video/(?:(BV[0-9A-Za-z]{10})|av(\d+))", re.IGNORECASE)
+
+# 字幕语言优先级：人工中文字幕 > AI中文字幕 > 其他中文 > 任意语言
+_SUBTITLE_LANGS = ("zh-CN", "zh-Hans", "zh-Hant", "zh-HK", "zh-TW", "ai-zh")
+
+
+def is_short_link(url):
+    host = (urlparse(url).hostname or "").lower()
+    return host in SHORT_LINK_HOSTS
+
+
+def parse_video_url(url):
+    """从视频链接中解析视频ID和分P
+
+    Args:
+        url: 视频链接，如https://www.bilibili.com/video/BV1xx411c7mD?p=2
+
+    Returns:
+        tuple: (接口参数字典, 分P序号)，不是视频链接时返回None
+    """
+    parsed = urlparse(url)
+    match = _VIDEO_PATH.search(parsed.path)
+    if not match:
+        return None
+    params = {"bvid": match.group(1)} if match.group(1) else {"aid": match.group(2)}
+    page = parse_qs(parsed.query).get("p", ["1"])[0]
+    return params, int(page) if page.isdigit() and int(page) > 0 else 1
+
+
+def video_cache_key(params):
+    """视频缓存的键，同一视频的不同分享链接共用"""
+    if "bvid" in params:
+        return f"bilibili:{params['bvid']}"
+    return f"bilibili:av{params['aid']}"
+
+
+def parse_view(data):
+    """从视频信息接口的返回中取出data
+
+    Raises:
+        ValueError: 接口返回错误码或没有视频信息
+    """
+    if data.get("code") != 0 or not data.get("data"):
+        raise ValueError(f"code={data.get('code')}, message={data.get('message')}")
+    return data["data"]
+
+
+def parse_tags(data):
+    """从标签接口的返回中取出标签名列表"""
+    return [tag["tag_name"] for tag in data.get("data") or () if tag.get("tag_name")]
+
+
+def parse_player_subtitles(data):
+    """从播放器接口的返回中取出字幕列表"""
+    return ((data.get("data") or {}).get("subtitle") or {}).get("subtitles")
+
+
+def select_page(view, page):
+    """返回分P对应的cid和分P标题，分P不存在时使用第一P"""
+    pages = view.get("pages") or []
+    if 0 < page <= len(pages):
+        selected = pages[page - 1]
+        return selected.get("cid") or view.get("cid"), selected.get("part") if len(pages) > 1 else None
+    return view.get("cid"), None
+
+
+def pick_subtitle(subtitles):
+    """按语言优先级选择字幕，返回字幕文件地址，没有字幕时返回None"""
+    candidates = [s for s in subtitles or () if s.get("subtitle_url")]
+    if not candidates:
+        return None
+    for lang in _SUBTITLE_LANGS:
+        for subtitle in candidates:
+            if subtitle.get("lan") == lang:
+                return _absolute_url(subtitle["subtitle_url"])
+    for subtitle in candidates:
+        if str(subtitle.get("lan", "")).startswith(("zh", "ai-zh")):
+            return _absolute_url(subtitle["subtitle_url"])
+    return _absolute_url(candidates[0]["subtitle_url"])
+
+
+def parse_subtitle_body(data):
+    """从字幕文件JSON中按时间顺序取出每一句"""
+    return [line["content"].strip() for line in data.get("body") or () if line.get("content", "").strip()]
+
+
+def build_video_content(view, tags=(), transcript=(), part=None, max_chars=None):
+    """使用视频标题、简介、标签和字幕构建可总结的文本
+
+    Args:
+        view: 视频信息接口返回的data
+        tags: 标签名列表
+        transcript: 字幕句子列表
+        part: 分P标题
+        max_chars: 字幕最多保留的字符数
+
+    Returns:
+        str: 与其他提取方法格式一致的文本
+    """
+    owner = (view.get("owner") or {}).get("name")
+    publish_time = time.strftime("%Y-%m-%d", time.localtime(view["pubdate"])) if view.get("pubdate") else None
+
+    lines = []
+    info = "来源: 哔哩哔哩视频"
+    details = []
+    if view.get("duration"):
+        minutes, seconds = divmod(int(view["duration"]), 60)
+        details.append(f"时长 {minutes}:{seconds:02d}")
+    if view.get("tname"):
+        details.append(f"分区 {view['tname']}")
+    if details:
+        info += f"（{'，'.join(details)}）"
+    lines.append(info)
+    if part:
+        lines.append(f"分P: {part}")
+    if tags:
+        lines.append(f"标签: {', '.join(tags)}")
+
+    desc = (view.get("desc") or "").strip()
+    if desc and desc != "-":
+        lines.append(f"\n简介:\n{desc}")
+
+    if transcript:
+        text = "\n".join(transcript)
+        if max_chars and len(text) > max_chars:
+            text = text[:max_chars]
+        lines.append(f"\n字幕:\n{text}")
+
+    return format_article(view.get("title"), owner, publish_time, "\n".join(lines))
+
+
+def _absolute_url(url):
+    return "https:" + url if url.startswith("//") else url
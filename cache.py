@@ -0,0 +1,210 @@
+# encoding:utf-8
+import hashlib
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+def _key_hash(key):
+    """缓存键只保存URL的8字节摘要，不保存完整URL"""
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+
+
+class _Entry:
+    """缓存记录头，正文按原样或压缩后保存在body中"""
+
+    __slots__ = ("created_at", "expire_at", "strategy", "raw_size", "size", "body", "dictionary", "compressed")
+
+    def __init__(self, created_at, expire_at, strategy, raw_size, body, dictionary, compressed):
+        self.created_at = created_at
+        self.expire_at = expire_at
+        self.strategy = strategy
+        self.raw_size = raw_size  # 不压缩时占用的字节数
+        self.body = body
+        self.dictionary = dictionary
+        self.compressed = compressed
+        self.size = sys.getsizeof(body) + _ENTRY_OVERHEAD
+
+
+# 记录头和摘要键本身占用的字节数
+_ENTRY_OVERHEAD = sys.getsizeof(_Entry.__new__(_Entry)) + sys.getsizeof(b"\0" * 8)
+
+
+class ContentCache:
+    """线程安全的TTL + LRU缓存，用于缓存已提取的文章内容
+
+    同时限制条目数和内存占用（max_bytes为None时只限制条目数），
+    当前占用的字节数可通过bytes读取，计入全局内存预算。
+    传入codec时文本压缩后保存，只在命中时解压
+    """
+
+    def __init__(self, ttl=3600, max_items=500, max_bytes=None, codec=None):
+        self.ttl = ttl
+        self.max_items = max(1, int(max_items))
+        self.max_bytes = max_bytes
+        self.codec = codec
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # 键摘要 -> _Entry
+        self._bytes = 0
+        self._raw_bytes = 0
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        digest = _key_hash(key)
+        with self._lock:
+            entry = self._data.get(digest)
+            if entry is None:
+                return False
+            if entry.expire_at <= time.time():
+                self._remove(digest)
+                return False
+            return True
+
+    def get(self, key):
+        """获取缓存值，不存在或已过期返回None"""
+        digest = _key_hash(key)
+        with self._lock:
+            entry = self._data.get(digest)
+            if entry is None:
+                return None
+            if entry.expire_at <= time.time():
+                self._remove(digest)
+                return None
+            self._data.move_to_end(digest)
+        # 在锁外解压，不阻塞其他线程读写
+        return self._decode(entry)
+
+    def set(self, key, value, ttl=None, strategy=None):
+        """写入缓存
+
+        Args:
+            key: 缓存键，通常是URL
+            value: 缓存值，文本在设置了codec时压缩保存
+            ttl: 过期时间（秒），为None时使用默认值
+            strategy: 内容的提取方式，只用于统计
+        """
+        raw_size = sys.getsizeof(value) + _ENTRY_OVERHEAD
+        body, dictionary, compressed = value, None, False
+        if self.codec is not None and isinstance(value, str):
+            data, dictionary = self.codec.compress(value)
+            if data is not None and sys.getsizeof(data) < sys.getsizeof(value):
+                body, compressed = data, True
+            else:
+                dictionary = None
+        now = time.time()
+        entry = _Entry(now, now + (self.ttl if ttl is None else ttl), strategy, raw_size, body, dictionary, compressed)
+        digest = _key_hash(key)
+        with self._lock:
+            if digest in self._data:
+                self._remove(digest)
+            self._data[digest] = entry
+            self._bytes += entry.size
+            self._raw_bytes += entry.raw_size
+            while len(self._data) > self.max_items or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes and len(self._data) > 1):
+                self._remove(next(iter(self._data)))
+
+    def fill_ratio(self):
+        """清除已过期的条目后，按条目数和字节数计算的占用比例中较大的一个"""
+        now = time.time()
+        with self._lock:
+            for digest in [digest for digest, entry in self._data.items() if entry.expire_at <= now]:
+                self._remove(digest)
+            ratio = len(self._data) / self.max_items
+            if self.max_bytes:
+                ratio = max(ratio, self._bytes / self.max_bytes)
+            return ratio
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._remove(_key_hash(key))
+        return self._decode(entry) if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self._raw_bytes = 0
+
+    def storage_stats(self):
+        """缓存占用统计：压缩率、每MB可缓存的条目数和各提取方式的条目数"""
+        with self._lock:
+            count = len(self._data)
+            size = self._bytes
+            raw = self._raw_bytes
+            strategies = Counter(entry.strategy or "unknown" for entry in self._data.values())
+        stats = {
+            "items": count,
+            "bytes": size,
+            "raw_bytes": raw,
+            "ratio": round(raw / size, 2) if size else None,
+            "items_per_mb": round(count * 1024 * 1024 / size, 1) if size else None,
+            "strategies": dict(strategies),
+        }
+        if self.codec is not None:
+            stats.update(self.codec.stats())
+        return stats
+
+    def _remove(self, digest):
+        entry = self._data.pop(digest, None)
+        if entry is not None:
+            self._bytes -= entry.size
+            self._raw_bytes -= entry.raw_size
+        return entry
+
+    def _decode(self, entry):
+        if not entry.compressed:
+            return entry.body
+        return self.codec.decompress(entry.body, entry.dictionary)
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """合并同一key的并发调用：只有第一个调用者真正执行，其他调用者等待并共享结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
@@ -0,0 +1,94 @@
+# encoding:utf-8
+import codecs
+import re
+
+from requests.compat import chardet
+
+# 在页面开头这么多字节内查找<meta charset>和XML声明
+_META_SCAN_BYTES = 4096
+
+# 统计检测最多使用的字节数，从第一个非ASCII字节开始取样
+_DETECT_SAMPLE_BYTES = 16384
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+_HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+
+# <meta charset="gbk">、<meta http-equiv="Content-Type" content="text/html; charset=gb2312">和<?xml encoding="">
+_META_CHARSET = re.compile(
+    rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)|<\?xml[^>]+encoding\s*=\s*[\"']([\w.:-]+)",
+    re.IGNORECASE,
+)
+
+_NON_ASCII = re.compile(rb"[\x80-\xff]")
+
+# 页面声明的中文编码统一按超集GB18030解码，避免GB2312页面中的生僻字变成乱码
+_ALIASES = {
+    "gb2312": "gb18030",
+    "gbk": "gb18030",
+    "x-gbk": "gb18030",
+    "cp936": "gb18030",
+    "utf8": "utf-8",
+}
+
+
+def resolve_encoding(content_type, body):
+    """确定页面编码，只在最后一步对有限的样本做统计检测
+
+    依次检查：BOM、HTTP头中的charset、页面开头的<meta charset>或XML声明；
+    都没有时，整个页面是合法UTF-8则使用UTF-8，否则对第一个非ASCII字节开始的样本做统计检测
+
+    Args:
+        content_type: 响应的Content-Type头
+        body: 页面原始字节
+
+    Returns:
+        tuple: (编码名称, 来源)，来源为bom/header/meta/utf-8/detect/default
+    """
+    # BOM最可靠，浏览器同样让BOM优先于HTTP头
+    for bom, encoding in _BOMS:
+        if body.startswith(bom):
+            return encoding, "bom"
+
+    match = _HEADER_CHARSET.search(content_type or "")
+    encoding = _normalize(match.group(1)) if match else None
+    if encoding:
+        return encoding, "header"
+    # JSON规定使用UTF-8，不需要检测
+    if "json" in (content_type or "").lower():
+        return "utf-8", "header"
+
+    match = _META_CHARSET.search(body, 0, _META_SCAN_BYTES)
+    encoding = _normalize((match.group(1) or match.group(2)).decode("ascii", "ignore")) if match else None
+    if encoding:
+        return encoding, "meta"
+
+    # UTF-8校验在C中完成，比统计检测快得多，GBK等编码的中文几乎不可能恰好是合法UTF-8
+    try:
+        body.decode("utf-8")
+        return "utf-8", "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    first = _NON_ASCII.search(body)
+    sample = body[first.start():first.start() + _DETECT_SAMPLE_BYTES] if first else b""
+    detected = chardet.detect(sample).get("encoding") if sample else None
+    encoding = _normalize(detected) if detected else None
+    if encoding:
+        return encoding, "detect"
+    return "utf-8", "default"
+
+
+def _normalize(name):
+    """规范化编码名称，无法识别的编码返回None"""
+    name = name.strip().lower()
+    name = _ALIASES.get(name, name)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
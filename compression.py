@@ -0,0 +1,189 @@
+# encoding:utf-8
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+
+from common.log import logger
+
+# 安装了zstandard时使用zstd，否则使用标准库zlib
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# zlib预设字典最大32KB
+_ZLIB_DICT_LIMIT = 32768
+
+# 按标点和换行切分出的片段，用于统计多篇文章中重复出现的内容（来源、版权声明、固定栏目等）
+_FRAGMENT = re.compile(r"[^。！？；，、：\n,.!?;:]{2,80}[。！？；，、：\n,.!?;:]?")
+
+# 片段之外再用高频的4字词组填充字典
+_NGRAM = 4
+
+
+def train_zlib_dictionary(samples, size=_ZLIB_DICT_LIMIT):
+    """从文章样本中生成zlib预设字典
+
+    优先选取在多篇文章中都出现的片段，剩余空间用高频4字词组填充；
+    zlib从字典末尾开始匹配时距离最近，所以最常用的内容放在最后
+
+    Args:
+        samples: 文章文本列表
+        size: 字典最大字节数
+
+    Returns:
+        bytes: 字典内容，样本不足时可能为空
+    """
+    fragments = Counter()
+    ngrams = Counter()
+    for text in samples:
+        # 每篇文章中的片段只计一次，只在一篇文章中重复的内容对其他文章没有帮助
+        fragments.update({match.group(0).strip() for match in _FRAGMENT.finditer(text)})
+        ngrams.update(text[i:i + _NGRAM] for i in range(0, len(text) - _NGRAM + 1, 2))
+
+    picked = []
+    used = 0
+    seen = set()
+    candidates = [(count * len(fragment), fragment) for fragment, count in fragments.items()
+                  if count > 1 and len(fragment) >= 2]
+    candidates += [(count * _NGRAM / 2, gram) for gram, count in ngrams.most_common(size // 6)
+                   if count > 2 and not gram.isspace()]
+    for _, text in sorted(candidates, reverse=True):
+        if text in seen:
+            continue
+        data = text.encode("utf-8")
+        if used + len(data) > size:
+            continue
+        seen.add(text)
+        picked.append(data)
+        used += len(data)
+    return b"".join(reversed(picked))
+
+
+class _Dictionary:
+    """一个版本的压缩字典，记录引用自己使用的字典，重新训练后旧记录仍可解压"""
+
+    __slots__ = ("data", "zstd")
+
+    def __init__(self, data, zstd_dict=None):
+        self.data = data
+        self.zstd = zstd_dict
+
+
+class ArticleCodec:
+    """文章文本压缩
+
+    使用zstd（已安装zstandard时）或zlib压缩UTF-8文本；缓存写入前若干篇文章后，
+    用这些文章训练一个压缩字典，之后的文章使用字典压缩，较短文章的压缩率明显提高。
+    训练好的字典保存在dictionary_path，重启后直接加载
+    """
+
+    def __init__(self, level=6, min_size=256, train_samples=50, dict_size=_ZLIB_DICT_LIMIT, dictionary_path=None):
+        self.name = "zstd" if zstandard is not None else "zlib"
+        self.level = level
+        self.min_size = min_size
+        self.train_samples = train_samples
+        self.dict_size = dict_size
+        self.dictionary_path = f"{dictionary_path}.{self.name}" if dictionary_path else None
+        self.dictionary = None
+        self._samples = []
+        self._lock = threading.Lock()
+        self._load_dictionary()
+
+    def compress(self, text):
+        """压缩文本
+
+        Args:
+            text: 文章文本
+
+        Returns:
+            tuple: (压缩后的字节, 使用的字典)，文本过短时返回(None, None)，应按原样保存
+        """
+        if len(text) < self.min_size:
+            return None, None
+        self._observe(text)
+        dictionary = self.dictionary
+        data = text.encode("utf-8")
+        if self.name == "zstd":
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dictionary.zstd if dictionary else None)
+            return compressor.compress(data), dictionary
+        if dictionary is not None:
+            compressor = zlib.compressobj(self.level, zdict=dictionary.data)
+        else:
+            compressor = zlib.compressobj(self.level)
+        return compressor.compress(data) + compressor.flush(), dictionary
+
+    def decompress(self, body, dictionary):
+        """解压compress返回的字节，dictionary为压缩时使用的字典"""
+        if self.name == "zstd":
+            decompressor = zstandard.ZstdDecompressor(dict_data=dictionary.zstd if dictionary else None)
+            return decompressor.decompress(body).decode("utf-8")
+        if dictionary is not None:
+            decompressor = zlib.decompressobj(zdict=dictionary.data)
+        else:
+            decompressor = zlib.decompressobj()
+        return (decompressor.decompress(body) + decompressor.flush()).decode("utf-8")
+
+    def stats(self):
+        dictionary = self.dictionary
+        return {
+            "codec": self.name,
+            "dictionary_bytes": len(dictionary.data) if dictionary else 0,
+            "training_samples": len(self._samples),
+        }
+
+    def _observe(self, text):
+        """收集训练样本，数量足够时训练字典，已有字典时不再收集"""
+        if self.dictionary is not None or not self.train_samples:
+            return
+        with self._lock:
+            if self.dictionary is not None or len(self._samples) >= self.train_samples:
+                return
+            self._samples.append(text[:16384])
+            if len(self._samples) < self.train_samples:
+                return
+            samples, self._samples = self._samples, []
+        self._train(samples)
+
+    def _train(self, samples):
+        try:
+            if self.name == "zstd":
+                zstd_dict = zstandard.train_dictionary(self.dict_size, [s.encode("utf-8") for s in samples])
+                dictionary = _Dictionary(zstd_dict.as_bytes(), zstd_dict)
+            else:
+                data = train_zlib_dictionary(samples, min(self.dict_size, _ZLIB_DICT_LIMIT))
+                dictionary = _Dictionary(data) if data else None
+        except Exception as e:
+            logger.warning(f"[JinaSum] 训练缓存压缩字典失败，继续使用无字典压缩: {str(e)}")
+            return
+        if dictionary is None:
+            return
+        self.dictionary = dictionary
+        logger.info(f"[JinaSum] 已用{len(samples)}篇文章训练缓存压缩字典, codec={self.name}, "
+                    f"大小={len(dictionary.data)}字节")
+        self._save_dictionary(dictionary.data)
+
+    def _load_dictionary(self):
+        if not self.dictionary_path or not os.path.exists(self.dictionary_path):
+            return
+        try:
+            with open(self.dictionary_path, "rb") as f:
+                data = f.read()
+            if data:
+                zstd_dict = zstandard.ZstdCompressionDict(data) if self.name == "zstd" else None
+                self.dictionary = _Dictionary(data, zstd_dict)
+        except Exception as e:
+            logger.warning(f"[JinaSum] 加载缓存压缩字典失败，将重新训练: {str(e)}")
+
+    def _save_dictionary(self, data):
+        if not self.dictionary_path:
+            return
+        tmp_path = f"{self.dictionary_path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.dictionary_path)
+        except OSError as e:
+            logger.warning(f"[JinaSum] 保存缓存压缩字典失败: {str(e)}")
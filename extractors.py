@@ -0,0 +1,208 @@
+# encoding:utf-8
+import re
+from urllib.parse import urlparse
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+# 通用提取使用的选择器，模块加载时编译一次
+GENERIC_TITLE_SELECTORS = tuple(soupsieve.compile(s) for s in (
+    'h1', 'title', '.title', '.article-title', '.post-title', '[class*="title" i]',
+))
+GENERIC_CONTENT_SELECTORS = tuple(soupsieve.compile(s) for s in (
+    'article', 'main', '.content', '.article', '.post-content',
+    '[class*="content" i]', '[class*="article" i]',
+    '.story', '.entry-content', '.post-body',
+    '#content', '#article', '.body',
+))
+AD_SELECTOR = soupsieve.compile('[class*="ad" i], [class*="banner" i], [id*="ad" i], [class*="recommend" i]')
+
+
+def select_first_text(soup, selectors):
+    """按顺序尝试已编译的选择器，返回第一个非空文本"""
+    for selector in selectors:
+        elem = selector.select_one(soup)
+        if elem is not None:
+            text = elem.get_text().strip()
+            if text:
+                return text
+    return None
+
+
+class ExtractionUnavailable(Exception):
+    """站点提取器已确认无法获取内容，不需要再下载整个页面尝试其他提取方法"""
+
+
+class SiteExtractor:
+    """站点提取规则
+
+    可以是代码实现的提取器（handler为JinaSum上的方法名），
+    也可以是声明式规则：标题/作者/正文的CSS选择器、需要移除的元素，以及可选的JSON接口
+    """
+
+    def __init__(self, name, hosts, handler=None, title=(), author=(), content=(), remove=(), json_api=None):
+        self.name = name
+        self.hosts = tuple(host.lower() for host in hosts)
+        self.handler = handler
+        self.title = tuple(soupsieve.compile(s) for s in title)
+        self.author = tuple(soupsieve.compile(s) for s in author)
+        self.content = tuple(soupsieve.compile(s) for s in content)
+        self.remove = soupsieve.compile(", ".join(remove)) if remove else None
+        self.json_api = None
+        if json_api:
+            self.json_api = dict(json_api)
+            self.json_api["pattern"] = re.compile(json_api["pattern"])
+
+    @classmethod
+    def from_config(cls, conf):
+        """从配置字典创建提取规则"""
+        return cls(
+            name=conf["name"],
+            hosts=conf["hosts"],
+            title=conf.get("title", ()),
+            author=conf.get("author", ()),
+            content=conf.get("content", ()),
+            remove=conf.get("remove", ()),
+            json_api=conf.get("json_api"),
+        )
+
+    def json_api_url(self, url):
+        """根据URL生成JSON接口地址，不适用时返回None"""
+        if not self.json_api:
+            return None
+        match = self.json_api["pattern"].search(url)
+        if not match:
+            return None
+        return self.json_api["url"].format(*match.groups())
+
+    def extract_json(self, data):
+        """按字段映射从JSON接口数据中提取文章"""
+        fields = self.json_api.get("fields", {})
+        values = {name: _get_path(data, path) for name, path in fields.items()}
+        content = values.get("content")
+        if not content:
+            return None
+        if self.json_api.get("html_content", True):
+            content = _html_to_text(content)
+        return format_article(values.get("title"), values.get("author"), values.get("publish_time"), content)
+
+    def extract_html(self, html_text):
+        """使用已编译的选择器从HTML中提取文章"""
+        soup = BeautifulSoup(html_text, "html.parser")
+        try:
+            if self.remove is not None:
+                for elem in self.remove.select(soup):
+                    elem.extract()
+            content = None
+            for selector in self.content:
+                elem = selector.select_one(soup)
+                if elem is not None:
+                    content = elem.get_text(separator="\n", strip=True)
+                    if content:
+                        break
+            if not content:
+                return None
+            return format_article(select_first_text(soup, self.title), select_first_text(soup, self.author), None, content)
+        finally:
+            soup.decompose()
+
+
+class ExtractorRegistry:
+    """按域名查找站点提取规则
+
+    查找时从完整域名开始逐级去掉子域名，注册的"zhihu.com"可匹配"zhuanlan.zhihu.com"，
+    查找耗时只与域名层级有关，与注册的站点数量无关
+    """
+
+    def __init__(self, extractors=()):
+        self._by_host = {}
+        for extractor in extractors:
+            self.register(extractor)
+
+    def register(self, extractor):
+        for host in extractor.hosts:
+            self._by_host[host] = extractor
+
+    def match(self, url):
+        host = urlparse(url).hostname
+        if not host:
+            return None
+        while True:
+            extractor = self._by_host.get(host)
+            if extractor is not None:
+                return extractor
+            dot = host.find(".")
+            if dot < 0 or host.count(".") < 2:
+                return None
+            host = host[dot + 1:]
+
+
+def format_article(title, author, publish_time, content):
+    """构建与其他提取方法一致的文本格式"""
+    result = ""
+    if title:
+        result += f"标题: {title}\n"
+    if author:
+        result += f"作者: {author}\n"
+    if publish_time:
+        result += f"发布日期: {publish_time}\n"
+    return result + f"\n{content}"
+
+
+def _get_path(data, path):
+    """按"a.b.c"路径读取嵌套字典的值"""
+    for key in path.split("."):
+        if isinstance(data, dict):
+            data = data.get(key)
+        elif isinstance(data, list) and key.isdigit() and int(key) < len(data):
+            data = data[int(key)]
+        else:
+            return None
+    return data
+
+
+def _html_to_text(content):
+    soup = BeautifulSoup(content, "html.parser")
+    try:
+        return soup.get_text(separator="\n", strip=True)
+    finally:
+        soup.decompose()
+
+
+# 内置站点提取规则
+BUILTIN_EXTRACTORS = (
+    SiteExtractor("wechat", ["mp.weixin.qq.com"], handler="_extract_wechat_article"),
+    SiteExtractor("baidu", ["mbd.baidu.com"], handler="_extract_baidu_article"),
+    SiteExtractor("bilibili", ["bilibili.com", "b23.tv", "bili2233.cn"], handler="_extract_bilibili_video"),
+    SiteExtractor(
+        "zhihu", ["zhihu.com"],
+        title=["h1.Post-Title", "h1.QuestionHeader-title"],
+        author=[".AuthorInfo-name", ".AuthorInfo .UserLink-link"],
+        content=[".Post-RichText", ".RichContent-inner"],
+        remove=["noscript", "figure"],
+        json_api={
+            "pattern": r"zhuanlan\.zhihu\.com/p/(\d+)",
+            "url": "https://www.zhihu.com/api/v4/articles/{0}",
+            "fields": {"title": "title", "author": "author.name", "content": "content"},
+        },
+    ),
+    SiteExtractor(
+        "csdn", ["blog.csdn.net"],
+        title=["#articleContentId", "h1.title-article"],
+        author=[".follow-nickName", "#uid"],
+        content=["#content_views", "#article_content"],
+        remove=[".hide-article-box", ".hljs-button", "script", "style"],
+    ),
+    SiteExtractor(
+        "toutiao", ["toutiao.com"],
+        title=[".article-content h1", "h1"],
+        author=[".article-meta .name", ".author-info .name"],
+        content=[".article-content article", "article"],
+    ),
+    SiteExtractor(
+        "xiaohongshu", ["xiaohongshu.com", "xhslink.com"],
+        title=["#detail-title", ".note-content .title"],
+        author=[".author-wrapper .username", ".username"],
+        content=["#detail-desc", ".note-content .desc"],
+    ),
+)
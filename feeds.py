@@ -0,0 +1,242 @@
+# encoding:utf-8
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from xml.parsers import expat
+
+from common.log import logger
+
+# 记住的已处理文章数量，超出时淘汰最早的
+_SEEN_LIMIT = 5000
+
+
+def parse_feed(body):
+    """解析RSS 2.0、RSS 1.0和Atom订阅，按订阅中的顺序返回文章链接
+
+    Args:
+        body: 订阅原始字节，编码由XML声明确定
+
+    Returns:
+        list: 文章链接列表
+
+    Raises:
+        ValueError: 订阅包含DOCTYPE或实体声明
+    """
+    _check_prolog(body)
+    root = ET.fromstring(body)
+    links = []
+    for elem in root.iter():
+        tag = _local_name(elem.tag)
+        if tag not in ("item", "entry"):
+            continue
+        link = None
+        for child in elem:
+            if _local_name(child.tag) != "link":
+                continue
+            # Atom使用<link rel="alternate" href="">，RSS使用<link>文本
+            href = child.get("href")
+            if href and child.get("rel", "alternate") == "alternate":
+                link = href
+                break
+            if not href and child.text and child.text.strip():
+                link = child.text.strip()
+                break
+        if link and link.startswith(("http://", "https://")):
+            links.append(link)
+    return links
+
+
+class _PrologEnd(Exception):
+    pass
+
+
+def _check_prolog(body):
+    """订阅来自外部站点，包含DOCTYPE或实体声明时拒绝解析，避免实体展开耗尽内存和读取外部实体
+
+    DOCTYPE只能出现在根元素之前，读到根元素即停止
+    """
+    def reject(*args):
+        raise ValueError("订阅包含DOCTYPE或实体声明")
+
+    def stop(*args):
+        raise _PrologEnd()
+
+    parser = expat.ParserCreate()
+    parser.StartDoctypeDeclHandler = reject
+    parser.EntityDeclHandler = reject
+    parser.StartElementHandler = stop
+    try:
+        parser.Parse(body, True)
+    except _PrologEnd:
+        pass
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+class _Feed:
+    __slots__ = ("url", "etag", "last_modified", "next_poll", "primed")
+
+    def __init__(self, url):
+        self.url = url
+        self.etag = None
+        self.last_modified = None
+        self.next_poll = 0.0
+        self.primed = False  # 首次轮询只预热最新的几篇，其余标记为已处理
+
+
+class FeedWarmer:
+    """订阅预热
+
+    后台线程定期用条件请求轮询订阅，新文章进入等待队列，再逐个交给warm回调（提取内容、可选生成总结）：
+    - 同一域名的订阅请求和文章预热间隔不少于host_interval秒，受限的文章留在队列中稍后处理
+    - 同时最多max_inflight个预热任务
+    - 每次轮询每个订阅最多取max_entries篇最新文章，队列超出上限时丢弃最早的文章
+    - should_pause返回True（如内存紧张）时暂停轮询和预热
+    """
+
+    def __init__(self, session, feed_urls, warm, should_pause=None, interval=600, host_interval=10,
+                 max_inflight=1, max_entries=5, timeout=15):
+        self.session = session
+        self.warm = warm
+        self.should_pause = should_pause or (lambda: False)
+        self.interval = interval
+        self.host_interval = host_interval
+        self.max_inflight = max(1, int(max_inflight))
+        self.max_entries = max(1, int(max_entries))
+        self.timeout = timeout
+        self._feeds = [_Feed(url) for url in dict.fromkeys(feed_urls)]
+        self._seen = OrderedDict()
+        self._pending = OrderedDict()  # 等待预热的文章
+        self._pending_limit = self.max_entries * max(1, len(self._feeds))
+        self._host_last = {}  # host -> 上次请求时间
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_inflight, thread_name_prefix="JinaSumFeedWarm")
+        self._thread = threading.Thread(target=self._run, name="JinaSumFeedWarmer", daemon=True)
+        self._stats = {"polls": 0, "not_modified": 0, "errors": 0, "warmed": 0, "failed": 0, "paused": 0,
+                       "dropped": 0}
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["inflight"] = self._inflight
+            stats["pending"] = len(self._pending)
+        stats["feeds"] = len(self._feeds)
+        return stats
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll_due()
+            self._stop.wait(1)
+
+    def poll_due(self):
+        """轮询所有到期且域名未受限的订阅，再提交等待中的文章"""
+        if self.should_pause():
+            self._count("paused")
+            return
+        now = time.time()
+        for feed in self._feeds:
+            if self._stop.is_set():
+                return
+            if feed.next_poll > now or not self._take_host(feed.url):
+                continue
+            feed.next_poll = now + self.interval
+            self._poll(feed)
+        self._drain()
+
+    def _poll(self, feed):
+        headers = {"User-Agent": "Mozilla/5.0 (compatible; JinaSum feed warmer)"}
+        if feed.etag:
+            headers["If-None-Match"] = feed.etag
+        if feed.last_modified:
+            headers["If-Modified-Since"] = feed.last_modified
+        try:
+            response = self.session.get(feed.url, headers=headers, timeout=self.timeout)
+            self._count("polls")
+            if response.status_code == 304:
+                self._count("not_modified")
+                return
+            response.raise_for_status()
+            links = parse_feed(response.content)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"[JinaSum] 轮询订阅失败: {feed.url}, {str(e)}")
+            return
+        feed.etag = response.headers.get("ETag")
+        feed.last_modified = response.headers.get("Last-Modified")
+
+        fresh = [link for link in links if link not in self._seen]
+        if not feed.primed:
+            # 首次轮询时只预热最新的几篇，较早的文章不再处理
+            for link in fresh[self.max_entries:]:
+                self._mark_seen(link)
+            feed.primed = True
+        with self._lock:
+            for link in fresh[:self.max_entries]:
+                self._pending[link] = True
+            while len(self._pending) > self._pending_limit:
+                self._pending.popitem(last=False)
+                self._stats["dropped"] += 1
+        for link in fresh[:self.max_entries]:
+            self._mark_seen(link)
+
+    def _drain(self):
+        """按顺序提交等待中的文章，并发已满时停止，域名受限的文章跳过留到下一轮"""
+        with self._lock:
+            candidates = list(self._pending)
+        for url in candidates:
+            with self._lock:
+                if self._inflight >= self.max_inflight:
+                    return
+            if not self._take_host(url):
+                continue
+            with self._lock:
+                self._pending.pop(url, None)
+                self._inflight += 1
+            self._executor.submit(self._warm_one, url)
+
+    def _warm_one(self, url):
+        try:
+            self.warm(url)
+            self._count("warmed")
+        except Exception as e:
+            self._count("failed")
+            logger.debug(f"[JinaSum] 订阅文章预热失败: {url}, {str(e)}")
+        finally:
+            with self._lock:
+                self._inflight -= 1
+
+    def _take_host(self, url):
+        """同一域名距上次请求超过host_interval秒时占用本次请求机会"""
+        host = urlparse(url).hostname or ""
+        now = time.time()
+        with self._lock:
+            if now - self._host_last.get(host, 0) < self.host_interval:
+                return False
+            self._host_last[host] = now
+        return True
+
+    def _mark_seen(self, url):
+        with self._lock:
+            self._seen[url] = True
+            self._seen.move_to_end(url)
+            while len(self._seen) > _SEEN_LIMIT:
+                self._seen.popitem(last=False)
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
@@ -0,0 +1,218 @@
+# encoding:utf-8
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from common.log import logger
+
+
+class HttpCache:
+    """基于ETag/Last-Modified的磁盘HTTP缓存
+
+    - 保存页面的校验信息和响应体，下次请求时携带If-None-Match/If-Modified-Since
+    - 服务器返回304时直接使用磁盘上的响应体，节省带宽和源站压力
+    - 响应体以解压后的原始字节保存，命中时直接读取，无需再次解压
+    - 磁盘占用超过max_bytes时按最近访问时间淘汰
+    - 索引的修改追加到日志文件，日志较长时才重写整个索引
+    """
+
+    INDEX_FILE = "index.json"
+    JOURNAL_FILE = "index.log"
+
+    # 日志超过这个行数且超过索引条目数的两倍时重写索引
+    COMPACT_MIN_LINES = 1000
+
+    def __init__(self, directory, max_bytes=100 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = {}  # key -> 元数据
+        self._total_bytes = 0
+        self._journal_lines = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, f"{key}.body")
+
+    def validators(self, url):
+        """获取条件请求需要的请求头，没有缓存时返回空字典"""
+        with self._lock:
+            entry = self._index.get(self._key(url))
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, response):
+        """保存响应，没有校验信息的响应不缓存"""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code != 200 or not (etag or last_modified):
+            return
+
+        key = self._key(url)
+        body = response.content
+        tmp_path = self._body_path(key) + f".{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, self._body_path(key))
+        except OSError as e:
+            logger.warning(f"[JinaSum] 写入HTTP缓存失败: {str(e)}")
+            return
+
+        with self._lock:
+            old = self._index.get(key)
+            if old:
+                self._total_bytes -= old["size"]
+            entry = self._index[key] = {
+                "url": url,
+                "final_url": response.url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_type": response.headers.get("Content-Type", ""),
+                "encoding": response.encoding,
+                "size": len(body),
+                "accessed": time.time(),
+            }
+            self._total_bytes += len(body)
+            records = [{"key": key, "entry": entry}]
+            records += [{"key": evicted} for evicted in self._evict()]
+            self._append_journal(records)
+
+    def load(self, url):
+        """读取缓存的响应，返回构造好的requests.Response，缓存不存在返回None"""
+        key = self._key(url)
+        with self._lock:
+            entry = self._index.get(key)
+            if not entry:
+                return None
+            entry["accessed"] = time.time()
+
+        try:
+            with open(self._body_path(key), "rb") as f:
+                body = f.read()
+        except OSError:
+            self.discard(url)
+            return None
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = entry["final_url"]
+        response.encoding = entry["encoding"]
+        response.headers = CaseInsensitiveDict({"Content-Type": entry["content_type"]})
+        if entry.get("etag"):
+            response.headers["ETag"] = entry["etag"]
+        if entry.get("last_modified"):
+            response.headers["Last-Modified"] = entry["last_modified"]
+        response._content = body
+        response.from_cache = True
+        return response
+
+    def discard(self, url):
+        key = self._key(url)
+        with self._lock:
+            entry = self._index.pop(key, None)
+            if entry:
+                self._total_bytes -= entry["size"]
+                self._remove_body(key)
+                self._append_journal([{"key": key}])
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def _evict(self):
+        """淘汰最久未访问的条目，返回被淘汰的key"""
+        if self._total_bytes <= self.max_bytes:
+            return []
+        # 淘汰到容量的90%，避免每次写入都触发淘汰
+        target = self.max_bytes * 0.9
+        evicted = []
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1]["accessed"]):
+            if self._total_bytes <= target:
+                break
+            del self._index[key]
+            self._total_bytes -= entry["size"]
+            self._remove_body(key)
+            evicted.append(key)
+        return evicted
+
+    def _remove_body(self, key):
+        try:
+            os.remove(self._body_path(key))
+        except OSError:
+            pass
+
+    def _load_index(self):
+        """读取索引，再按顺序重放日志中的修改"""
+        index = {}
+        try:
+            with open(os.path.join(self.directory, self.INDEX_FILE), "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            pass
+        try:
+            with open(os.path.join(self.directory, self.JOURNAL_FILE), "r", encoding="utf-8") as f:
+                for line in f:
+                    self._journal_lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 写入中途退出时最后一行可能不完整
+                        continue
+                    if "entry" in record:
+                        index[record["key"]] = record["entry"]
+                    else:
+                        index.pop(record["key"], None)
+        except OSError:
+            pass
+        for key, entry in index.items():
+            if os.path.exists(self._body_path(key)):
+                self._index[key] = entry
+                self._total_bytes += entry["size"]
+
+    def _append_journal(self, records):
+        """把修改追加到日志，日志过长时重写索引，调用方需持有锁
+
+        Args:
+            records: 修改列表，{"key", "entry"}为写入，只有key为删除
+        """
+        if self._journal_lines + len(records) >= max(self.COMPACT_MIN_LINES, 2 * len(self._index)):
+            self._save_index()
+            return
+        try:
+            with open(os.path.join(self.directory, self.JOURNAL_FILE), "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+            self._journal_lines += len(records)
+        except OSError as e:
+            logger.warning(f"[JinaSum] 写入HTTP缓存索引日志失败: {str(e)}")
+
+    def _save_index(self):
+        """重写整个索引并清空日志，最近访问时间也在这时保存"""
+        index_path = os.path.join(self.directory, self.INDEX_FILE)
+        tmp_path = index_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._index, f, ensure_ascii=False)
+            os.replace(tmp_path, index_path)
+            # 索引已包含日志中的全部修改，之后才能清空日志
+            with open(os.path.join(self.directory, self.JOURNAL_FILE), "w", encoding="utf-8"):
+                pass
+            self._journal_lines = 0
+        except OSError as e:
+            logger.warning(f"[JinaSum] 保存HTTP缓存索引失败: {str(e)}")
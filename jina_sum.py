@@ -3,15 +3,19 @@ import json
 import os
 import html
 import re
-from urllib.parse import urlparse, quote, parse_qs, quote_plus
+from urllib.parse import urlparse, quote, parse_qs, quote_plus, urljoin
+import threading
 import time
 import asyncio
+import atexit
+from concurrent.futures import ThreadPoolExecutor, wait
 import nest_asyncio
+from http.cookiejar import DefaultCookiePolicy
 
 import requests
+from requests.adapters import HTTPAdapter
 from newspaper import Article
 import newspaper
-from bs4 import BeautifulSoup
 from requests_html import HTMLSession
 
 import plugins
@@ -20,6 +24,53 @@ from bridge.reply import Reply, ReplyType
 from common.log import logger
 from plugins import *
 
+from .bilibili import (
+    PLAYER_API, TAGS_API, VIEW_API, build_video_content, is_short_link, parse_player_subtitles, parse_subtitle_body,
+    parse_tags, parse_video_url, parse_view, pick_subtitle, select_page, video_cache_key,
+)
+from .cache import ContentCache, SingleFlight
+from .charset import resolve_encoding
+from .compression import ArticleCodec
+from .extractors import ExtractionUnavailable
+from .feeds import FeedWarmer
+from .http_cache import HttpCache
+from .llm import LLMError, StreamingChatClient
+from .memory import CACHE_SHARE, TREE_FACTOR, MemoryBudget, MemoryBudgetExceeded
+from .pending_store import PendingMessageStore
+from .preview import PreviewSender, parse_head, preview_from_article, preview_from_card, read_head
+from .profiler import SlowRequestProfiler
+from .quality import score_content
+from .scheduler import (
+    PRIORITY_AUTO, PRIORITY_PRIVATE, PRIORITY_TRIGGER, PRIORITY_WARM, SchedulerRejected, SummaryScheduler,
+)
+from .settings import RESTART_REQUIRED_KEYS, ConfigWatcher, build_snapshot, config_source
+from .share_card import parse_share_card
+from .shared_cache import SharedCache, SharedSingleFlight, create_backend
+from .structured import extract_structured_article
+from .timeouts import DeadlineExceeded, TimeoutPolicy, install_connect_timer
+from .wechat import is_verify_page, parse_wechat_article
+from .workers import (
+    ExtractionPool, clean_content, html_fragment_text, parse_baidu_html, parse_general_html, parse_newspaper_html,
+    parse_rendered_html,
+)
+
+# 消息快速预分类：一次扫描找出分享卡片、总结指令或链接的第一个特征
+_FAST_PATH_PATTERN = re.compile(r"<appmsg|<\?xml|总结|https?://")
+
+# 内存预算或内容缓存用量超过这个比例时暂停订阅预热
+FEED_PAUSE_PRESSURE = 0.8
+
+SUMMARY_NOTICE = "🎉正在为您生成总结，请稍候..."
+
+# JavaScript渲染完成后等待页面稳定的时间（秒）
+RENDER_SLEEP = 2
+
+# 读取响应体时每块的大小，读取会等到凑满一块，块越小响应体超时越及时
+BODY_CHUNK_SIZE = 4096
+
+# 从文本中提取链接，遇到空白、引号或中文标点时结束
+_URL_PATTERN = re.compile(r"https?://[^\s<>\"'()（）【】《》「」，。；、！？]+")
+
 # 应用nest_asyncio以解决事件循环问题
 try:
     nest_asyncio.apply()
@@ -55,42 +106,254 @@ class JinaSum(Plugin):
         "black_group_list": [],
         "auto_sum": True,
         "cache_timeout": 300,  # 缓存超时时间（5分钟）
+        "pending_max_per_chat": 5,  # 每个群聊最多缓存的分享数量
+        "pending_max_total": 10000,  # 所有群聊合计最多缓存的分享数量
+        "content_cache_timeout": 3600,  # 文章内容缓存时间（秒）
+        "content_cache_size": 500,  # 最多缓存的文章数量
+        "content_cache_compress": True,  # 是否压缩保存缓存的文章内容，只在命中时解压
+        "http_pool_size": 20,  # 共享HTTP连接池大小
+        "http_cache_enabled": True,  # 是否启用ETag/Last-Modified条件请求磁盘缓存
+        "http_cache_dir": "",  # 磁盘缓存目录，为空时使用插件目录下的http_cache
+        "http_cache_max_mb": 100,  # 磁盘缓存最大占用（MB）
+        "batch_max_urls": 10,  # 一条消息最多总结的链接数量
+        "batch_timeout": 60,  # 多链接总结的整体超时时间（秒）
+        "batch_workers": 5,  # 多链接并发提取的线程数
+        "quality_threshold": 0.25,  # 内容质量阈值（0~1），达到后不再尝试更慢的提取方法
+        "site_extractors": [],  # 自定义站点提取规则，相同域名的规则覆盖内置规则
+        "prefetch_enabled": False,  # 群聊非自动总结时，收到分享后是否预先在后台提取内容
+        "prefetch_max_inflight": 2,  # 同时进行的预提取任务上限，超出时跳过预提取
+        "prefetch_group_interval": 30,  # 同一群聊两次预提取的最小间隔（秒）
+        "extract_workers": 0,  # 页面解析子进程数量，0表示在插件进程内解析
+        "extract_worker_max_tasks": 200,  # 每个解析子进程处理多少个任务后重建，回收内存
+        "extract_worker_timeout": 30,  # 单次解析的超时时间（秒）
+        "summary_slots": 4,  # 同时进行的总结数量，空出位置时按 私聊 > 总结指令 > 自动总结 的顺序执行
+        "summary_chat_quota": 2,  # 每个私聊最多排队和执行中的总结数量
+        "summary_group_quota": 3,  # 每个群聊最多排队和执行中的总结数量
+        "auto_sum_max_wait": 120,  # 自动总结最长排队时间（秒），超时后放弃
+        "extra_clean_patterns": [],  # 额外的内容清洗正则，匹配的文本会从正文中移除
+        "config_reload_interval": 5,  # 检查config.json是否修改的间隔（秒），0表示不自动重新加载
+        "memory_budget_mb": 0,  # 提取中的页面、解析树和内容缓存合计的内存预算（MB），0表示不限制
+        "memory_page_estimate_kb": 512,  # 页面下载前按此大小预留，下载后按实际大小调整
+        "memory_render_mb": 200,  # JavaScript渲染（Chromium）额外预留的内存（MB）
+        "memory_render_wait": 30,  # 渲染等待内存预算的最长时间（秒），超时跳过渲染
+        "llm_direct": False,  # 是否由插件直接以流式方式调用模型接口并回复总结，失败时仍交给宿主处理
+        "open_ai_api_base": "",  # 直连模式的OpenAI兼容接口地址，为空时使用https://api.openai.com/v1
+        "open_ai_api_key": "",  # 直连模式的API Key，为空时使用宿主配置
+        "open_ai_model": "",  # 直连模式使用的模型，为空时使用gpt-3.5-turbo
+        "llm_timeout": 60,  # 直连模式单次总结的超时时间（秒）
+        "llm_max_concurrency": 4,  # 直连模式同时进行的模型请求数量
+        "llm_stream_chunk_chars": 0,  # 大于0时每生成约这么多字按段落先发送一部分，0表示生成完成后一次发送
+        "profile_enabled": False,  # 是否对总结任务进行调用栈采样，修改后无需重启
+        "profile_threshold": 15,  # 耗时超过这么多秒的任务保存采样结果
+        "profile_sample_rate": 0.0,  # 按比例额外保存未超时任务的采样结果，0~1
+        "profile_interval_ms": 10,  # 采样间隔（毫秒）
+        "profile_dir": "",  # 采样结果保存目录，为空时使用插件目录下的profiles
+        "profile_max_files": 50,  # 最多保留的采样结果文件数量，超出时删除最旧的
+        "feed_urls": [],  # 用于预热缓存的RSS/Atom订阅地址，为空时不启用
+        "feed_poll_interval": 600,  # 每个订阅的轮询间隔（秒）
+        "feed_host_interval": 10,  # 同一域名两次请求的最小间隔（秒）
+        "feed_max_inflight": 1,  # 同时预热的文章数量
+        "feed_max_entries": 5,  # 每次轮询每个订阅最多预热的新文章数量
+        "feed_warm_summary": False,  # 直连模式下是否同时预先生成总结
+        "preview_enabled": False,  # 是否先回复标题、作者和简介的预览，总结完成后再回复总结
+        "preview_timeout": 3,  # 读取页面<head>生成预览的超时时间（秒），超时后改为发送"正在生成总结"
+        "preview_head_kb": 64,  # 生成预览时最多读取的页面字节数（KB）
+        "adaptive_timeouts": True,  # 是否按各域名实际耗时自动调整请求超时，关闭时各阶段使用上限
+        "timeout_percentile": 0.99,  # 按这个分位的耗时确定超时时间
+        "timeout_multiplier": 2.0,  # 超时时间 = 分位耗时 × 这个倍数，再限制在上下限之间
+        "timeout_min_samples": 20,  # 域名样本少于这个数时使用上限
+        "timeout_limits": {},  # 各阶段超时的[下限, 上限]（秒），如{"first_byte": [3, 30]}，未配置的阶段使用默认值
+        "fetch_deadline": 60,  # 单个链接提取的整体时间（秒），所有提取方法合计不超过这个时间
+        "shared_cache": "",  # 多个实例共享的缓存地址，redis://host:6379/0 或 sqlite:///path/to/cache.db，为空时只使用本地缓存
+        "shared_cache_prefix": "jina_sum",  # 共享缓存的键前缀
+        "shared_lease_ttl": 90,  # 提取同一链接的租约时间（秒），应大于fetch_deadline，持有租约的实例异常退出后到期自动释放
+        "shared_lease_wait": 70,  # 等待其他实例提取结果的最长时间（秒），超时后自行提取，应不小于fetch_deadline
+        "batch_prompt": "我需要对下面多篇文章进行汇总，输出包括以下部分：\n📰 每篇文章用一句话总结，按序号列出\n🔑 整体要点,用数字序号列出3-5条\n🏷 标签: #xx #xx\n请使用emoji让你的表达更生动\n\n",
     }
 
-    def __init__(self):
-        """初始化插件配置"""
+    def __init__(self, config=None, state_dir=None):
+        """初始化插件配置
+        
+        Args:
+            config: 直接使用的配置，传入时不读取也不监视config.json，供压测等离线场景使用；宿主加载插件时不传入
+            state_dir: 超时统计、压缩字典、页面磁盘缓存和采样结果的默认目录，默认为插件目录
+        """
         try:
             super().__init__()
+            self.state_dir = state_dir or os.path.dirname(__file__)
             
             # 确保使用默认配置初始化
-            self.config = super().load_config()
+            self.config = config if config is not None else super().load_config()
             if not self.config:
                 self.config = self._load_config_template()
             
             # 使用默认配置初始化
-            for key, default_value in self.DEFAULT_CONFIG.items():
-                if key not in self.config:
-                    self.config[key] = default_value
+            self.config = self._with_defaults(self.config)
             
-            # 设置配置参数
-            self.max_words = self.config.get("max_words", 8000)
-            self.prompt = self.config.get("prompt", "我需要对下面引号内文档进行总结...")
+            # 配置快照：提示词、字数限制、URL黑白名单、群黑名单、站点规则、质量阈值、预提取、API Key等，
+            # 以及由其预先构建的匹配结构，修改config.json后整体替换，无需重启
+            self.settings = build_snapshot(self.config)
+            self._startup_config = dict(self.config)
             self.cache_timeout = self.config.get("cache_timeout", 300)  # 默认5分钟
             
-            # URL黑白名单配置
-            self.white_url_list = self.config.get("white_url_list", [])
-            self.black_url_list = self.config.get("black_url_list", [])
-            self.black_group_list = self.config.get("black_group_list", [])
-            
-            # 是否自动总结（仅群聊有效）
-            self.auto_sum = self.config.get("auto_sum", False)
-            
-            # 消息缓存
-            self.pending_messages = {}  # 用于存储待处理的消息，格式: {chat_id: {"content": content, "timestamp": time.time()}}
+            # 消息缓存，每个群聊保留最近几条分享，"总结N"可选择第N新的分享
+            self.pending_messages = PendingMessageStore(
+                ttl=self.cache_timeout,
+                max_per_chat=self.config.get("pending_max_per_chat", 5),
+                max_total=self.config.get("pending_max_total", 10000),
+                on_evict=self._on_pending_evicted,
+            )
+            
+            # 分享预提取：收到分享后在后台提取内容，发送"总结"时直接使用缓存；开关和单群间隔在配置快照中
+            self.prefetch_max_inflight = self.config.get("prefetch_max_inflight", 2)
+            self._prefetch_lock = threading.Lock()
+            self._prefetch_running = 0
+            self._prefetch_last = {}  # chat_id -> 上次预提取时间
+            self._prefetched = {}  # url -> 引用该预提取结果的待处理分享数量
+            self._prefetch_owned = set()  # 由预提取写入缓存、尚未被其他请求使用的url
+            self._prefetch_executor = ThreadPoolExecutor(
+                max_workers=max(1, self.prefetch_max_inflight),
+                thread_name_prefix="JinaSumPrefetch",
+            )
+            
+            # 按域名和阶段（连接、首字节、响应体、渲染）的耗时分布确定超时时间，统计保存在插件目录下
+            self.timeouts = TimeoutPolicy(
+                path=os.path.join(self.state_dir, "timeouts.json"),
+                enabled=self.config.get("adaptive_timeouts", True),
+                percentile=self.config.get("timeout_percentile", 0.99),
+                multiplier=self.config.get("timeout_multiplier", 2.0),
+                min_samples=self.config.get("timeout_min_samples", 20),
+                limits=self.config.get("timeout_limits"),
+            )
+            self.fetch_deadline = self.config.get("fetch_deadline", 60)
+            
+            # 共享HTTP连接池，所有请求头和Cookie按请求传入，不在会话中保存状态
+            self.http = self._create_http_session(
+                self.config.get("http_pool_size", 20),
+                on_connect=lambda host, seconds: self.timeouts.record(host, "connect", seconds),
+            )
+            
+            # 页面磁盘缓存，过期后通过条件请求重新验证，304时直接复用
+            self.http_cache = None
+            if self.config.get("http_cache_enabled", True):
+                cache_dir = self.config.get("http_cache_dir") or os.path.join(self.state_dir, "http_cache")
+                self.http_cache = HttpCache(cache_dir, max_bytes=self.config.get("http_cache_max_mb", 100) * 1024 * 1024)
+            
+            # 全局内存预算，页面和解析树按字节预留，预算不足时排队
+            self.memory = MemoryBudget(self.config.get("memory_budget_mb", 0) * 1024 * 1024)
+            self.page_reserve_bytes = self.config.get("memory_page_estimate_kb", 512) * 1024 * (1 + TREE_FACTOR)
+            self.render_reserve_bytes = self.config.get("memory_render_mb", 200) * 1024 * 1024
+            self.render_wait = self.config.get("memory_render_wait", 30)
+            
+            # 文章内容缓存，同一URL的并发提取只执行一次；启用内存预算时缓存最多占用其中一部分
+            # 正文压缩保存，字典用最先缓存的文章训练，保存在插件目录下
+            codec = None
+            if self.config.get("content_cache_compress", True):
+                codec = ArticleCodec(dictionary_path=os.path.join(self.state_dir, "content_dict"))
+            self.content_cache = ContentCache(
+                ttl=self.config.get("content_cache_timeout", 3600),
+                max_items=self.config.get("content_cache_size", 500),
+                max_bytes=int(self.memory.max_bytes * CACHE_SHARE) if self.memory.enabled else None,
+                codec=codec,
+            )
+            self.memory.add_source("content_cache", lambda: self.content_cache.bytes)
+            self._inflight = SingleFlight()
+            
+            # 页面解析进程池，解析、评分、清洗在子进程中执行，不占用插件进程的GIL
+            self.extract_pool = ExtractionPool(
+                workers=self.config.get("extract_workers", 0),
+                max_tasks_per_child=self.config.get("extract_worker_max_tasks", 200),
+                timeout=self.config.get("extract_worker_timeout", 30),
+            )
+            # 进程退出时关闭进程池，避免子进程残留
+            atexit.register(self.extract_pool.shutdown)
+            
+            # 总结任务调度，私聊和总结指令优先于群聊自动总结
+            self.scheduler = SummaryScheduler(
+                slots=self.config.get("summary_slots", 4),
+                chat_quota=self.config.get("summary_chat_quota", 2),
+                group_quota=self.config.get("summary_group_quota", 3),
+                auto_max_wait=self.config.get("auto_sum_max_wait", 120),
+            )
+            
+            # 预览：总结前读取页面<head>，与文章提取同时进行
+            self._preview_executor = ThreadPoolExecutor(
+                max_workers=self.config.get("summary_slots", 4),
+                thread_name_prefix="JinaSumPreview",
+            )
+            self._preview_lock = threading.Lock()
+            self._preview_counts = {"card": 0, "cache": 0, "head": 0, "notice": 0}
+            
+            # 多链接总结配置
+            self._batch_executor = ThreadPoolExecutor(
+                max_workers=self.config.get("batch_workers", 5),
+                thread_name_prefix="JinaSumBatch",
+            )
             
             # API 设置
-            self.open_ai_api_base = "https://api.openai.com/v1"
-            self.open_ai_model = "gpt-3.5-turbo"
+            self.open_ai_api_base = (self.config.get("open_ai_api_base") or "https://api.openai.com/v1").rstrip("/")
+            self.open_ai_model = self.config.get("open_ai_model") or "gpt-3.5-turbo"
+            
+            # 直连模式：插件直接流式调用模型接口，使用独立的长连接池
+            self.llm_direct = self.config.get("llm_direct", False)
+            self.llm_stream_chunk_chars = self.config.get("llm_stream_chunk_chars", 0)
+            llm_concurrency = self.config.get("llm_max_concurrency", 4)
+            self.llm = StreamingChatClient(
+                self._create_http_session(llm_concurrency),
+                timeout=self.config.get("llm_timeout", 60),
+                max_concurrency=llm_concurrency,
+            )
+            
+            # 直连模式生成的总结缓存，同一链接再次请求时直接回复
+            self.summary_cache = ContentCache(
+                ttl=self.config.get("content_cache_timeout", 3600),
+                max_items=self.config.get("content_cache_size", 500),
+            )
+            self.memory.add_source("summary_cache", lambda: self.summary_cache.bytes)
+            
+            # 多实例共享缓存：内容和总结缓存增加共享的第二级，同一链接同一时间只由一个实例提取
+            self.shared_backend = None
+            if self.config.get("shared_cache"):
+                self.shared_backend = create_backend(
+                    self.config["shared_cache"], prefix=self.config.get("shared_cache_prefix", "jina_sum"),
+                )
+                self.content_cache = SharedCache(self.content_cache, self.shared_backend, "content")
+                self.summary_cache = SharedCache(self.summary_cache, self.shared_backend, "summary")
+                self._inflight = SharedSingleFlight(
+                    self._inflight,
+                    self.shared_backend,
+                    self.content_cache,
+                    lease_ttl=self.config.get("shared_lease_ttl", 90),
+                    wait_timeout=self.config.get("shared_lease_wait", 70),
+                )
+            
+            # 慢请求调用栈采样，参数随配置重新加载更新
+            self.profiler = SlowRequestProfiler(**self._profiler_options(self.config))
+            
+            # 订阅预热：轮询配置的订阅，新文章以最低优先级提前提取并写入缓存
+            self.feed_warmer = None
+            self.feed_warm_summary = self.config.get("feed_warm_summary", False)
+            if self.config.get("feed_urls"):
+                self.feed_warmer = FeedWarmer(
+                    self.http,
+                    self.config["feed_urls"],
+                    self._warm_feed_entry,
+                    should_pause=self._feed_should_pause,
+                    interval=self.config.get("feed_poll_interval", 600),
+                    host_interval=self.config.get("feed_host_interval", 10),
+                    max_inflight=self.config.get("feed_max_inflight", 1),
+                    max_entries=self.config.get("feed_max_entries", 5),
+                ).start()
+            
+            # 监视宿主实际加载的配置文件（plugins/config.json或插件目录下的config.json），修改后自动重新加载；
+            # 直接传入配置时不监视
+            self._config_watcher = None
+            reload_interval = self.config.get("config_reload_interval", 5)
+            if reload_interval and config is None:
+                config_path, config_key = config_source(os.path.dirname(os.path.abspath(__file__)), self.name)
+                self._config_watcher = ConfigWatcher(
+                    config_path, self._reload_config, reload_interval, key=config_key,
+                ).start()
             
             logger.info(f"[JinaSum] 初始化完成, config={self.config}")
             self.handlers[Event.ON_HANDLE_CONTEXT] = self.on_handle_context
@@ -101,94 +364,48 @@ class JinaSum(Plugin):
     def on_handle_context(self, e_context: EventContext):
         """处理消息"""
         context = e_context['context']
-        logger.info(f"[JinaSum] 收到消息, 类型={context.type}, 内容长度={len(context.content)}")
-
-        # 首先在日志中记录完整的消息内容，便于调试
-        orig_content = context.content
-        if len(orig_content) > 500:
-            logger.info(f"[JinaSum] 消息内容(截断): {orig_content[:500]}...")
-        else:
-            logger.info(f"[JinaSum] 消息内容: {orig_content}")
-        
-        if context.type not in [ContextType.TEXT, ContextType.SHARING]:
-            logger.info(f"[JinaSum] 消息类型不符合处理条件，跳过: {context.type}")
+        if context.type != ContextType.TEXT and context.type != ContextType.SHARING:
             return
 
         content = context.content
-        channel = e_context['channel']
-        msg = e_context['context']['msg']
-        chat_id = msg.from_user_id
+        msg = context['msg']
         is_group = msg.is_group
-        
-        # 打印前50个字符用于调试
-        preview = content[:50] + "..." if len(content) > 50 else content
-        logger.info(f"[JinaSum] 处理消息: {preview}, 类型={context.type}")
+
+        # 快速预分类，与插件无关的普通聊天消息直接返回，不记录日志
+        message_kind = self._classify_message(context.type, content, is_group)
+        if message_kind is None:
+            return
+
+        logger.info(f"[JinaSum] 收到消息, 类型={context.type}, 分类={message_kind}, 内容长度={len(content)}")
+        if len(content) > 500:
+            logger.debug(f"[JinaSum] 消息内容(截断): {content[:500]}...")
+        else:
+            logger.debug(f"[JinaSum] 消息内容: {content}")
+
+        chat_id = msg.from_user_id
 
         # 检查内容是否为XML格式（哔哩哔哩等第三方分享卡片）
-        if content.startswith('<?xml') or (content.startswith('<msg>') and '<appmsg' in content) or ('<appmsg' in content and '<url>' in content):
+        card = None
+        if message_kind == "card":
             logger.info("[JinaSum] 检测到XML格式分享卡片，尝试提取URL")
-            try:
-                import xml.etree.ElementTree as ET
-                # 处理可能的XML声明
-                if content.startswith('<?xml'):
-                    content = content[content.find('<msg>'):]
-                
-                # 如果不是完整的XML，尝试添加根节点
-                if not content.startswith('<msg') and '<appmsg' in content:
-                    content = f"<msg>{content}</msg>"
-                
-                # 对于一些可能格式不标准的XML，使用更宽松的解析方式
-                try:
-                    root = ET.fromstring(content)
-                except ET.ParseError:
-                    # 尝试用正则表达式提取URL
-                    import re
-                    url_match = re.search(r'<url>(.*?)</url>', content)
-                    if url_match:
-                        extracted_url = url_match.group(1)
-                        logger.info(f"[JinaSum] 通过正则表达式从XML中提取到URL: {extracted_url}")
-                        content = extracted_url
-                        context.type = ContextType.SHARING
-                        context.content = extracted_url
-                    else:
-                        logger.error("[JinaSum] 无法通过正则表达式从XML中提取URL")
-                        return
-                else:
-                    # XML解析成功
-                    url_elem = root.find('.//url')
-                    title_elem = root.find('.//title')
-                    
-                    # 检查是否有appinfo节点，判断是否为B站等特殊应用
-                    appinfo = root.find('.//appinfo')
-                    app_name = None
-                    if appinfo is not None and appinfo.find('appname') is not None:
-                        app_name = appinfo.find('appname').text
-                        logger.info(f"[JinaSum] 检测到APP分享: {app_name}")
-                    
-                    logger.info(f"[JinaSum] XML解析结果: url_elem={url_elem is not None}, title_elem={title_elem is not None}, app_name={app_name}")
-                    
-                    if url_elem is not None and url_elem.text:
-                        # 提取到URL，将类型修改为SHARING
-                        extracted_url = url_elem.text
-                        logger.info(f"[JinaSum] 从XML中提取到URL: {extracted_url}")
-                        content = extracted_url
-                        context.type = ContextType.SHARING
-                        context.content = extracted_url
-                        
-                        # 对于B站视频链接，记录额外信息
-                        if app_name and ("哔哩哔哩" in app_name or "bilibili" in app_name.lower() or "b站" in app_name):
-                            logger.info("[JinaSum] 检测到B站视频分享")
-                            # 可以在这里添加B站视频的特殊处理逻辑
-                    else:
-                        logger.error("[JinaSum] 无法从XML中提取URL")
-                        return
-            except Exception as e:
-                logger.error(f"[JinaSum] 解析XML失败: {str(e)}", exc_info=True)
+            card = parse_share_card(content)
+            if card is None:
+                logger.error("[JinaSum] 无法从XML中提取URL")
                 return
+            logger.info(f"[JinaSum] 分享卡片解析结果: url={card.url}, title={card.title}, app_name={card.appname}")
+            
+            # 提取到URL，将类型修改为SHARING
+            content = card.url
+            context.type = ContextType.SHARING
+            context.content = card.url
+            
+            if card.is_bilibili:
+                logger.info("[JinaSum] 检测到B站视频分享")
 
         # 检查是否需要自动总结
-        should_auto_sum = self.auto_sum
-        if should_auto_sum and is_group and msg.from_user_nickname in self.black_group_list:
+        settings = self.settings
+        should_auto_sum = settings.auto_sum
+        if should_auto_sum and is_group and msg.from_user_nickname in settings.black_group_list:
             should_auto_sum = False
 
         # 清理过期缓存
@@ -199,16 +416,25 @@ class JinaSum(Plugin):
             logger.debug("[JinaSum] Processing SHARING message")
             if is_group:
                 if should_auto_sum:
-                    return self._process_summary(content, e_context, retry_count=0)
+                    try:
+                        return self._run_scheduled(PRIORITY_AUTO, e_context, self._process_summary,
+                                                   content, e_context, retry_count=0, card=card)
+                    except SchedulerRejected:
+                        # 自动总结未执行时按关闭自动总结处理：缓存分享，发送"总结"时仍可总结，消息继续交给其他插件和宿主
+                        self.pending_messages.add(chat_id, content, card=card)
+                        logger.debug(f"[JinaSum] 自动总结未执行，已缓存分享: {content}, chat_id={chat_id}")
+                        return
                 else:
-                    self.pending_messages[chat_id] = {
-                        "content": content,
-                        "timestamp": time.time()
-                    }
+                    # 先预留预提取再缓存分享，分享一进入存储就可能被淘汰，淘汰回调需要看到prefetched标记
+                    prefetch = self._reserve_prefetch(chat_id, content)
+                    self.pending_messages.add(chat_id, content, card=card, prefetched=prefetch)
+                    if prefetch:
+                        self._prefetch_executor.submit(self._prefetch, content)
                     logger.debug(f"[JinaSum] Cached SHARING message: {content}, chat_id={chat_id}")
                     return
             else:  # 单聊消息直接处理
-                return self._process_summary(content, e_context, retry_count=0)
+                return self._run_scheduled(PRIORITY_PRIVATE, e_context, self._process_summary,
+                                           content, e_context, retry_count=0, card=card)
 
         # 处理文本消息
         elif context.type == ContextType.TEXT:
@@ -225,220 +451,292 @@ class JinaSum(Plugin):
             
             # 检查是否包含"总结"关键词（仅群聊需要）
             if is_group and "总结" in content:
-                logger.debug(f"[JinaSum] Found summary trigger, pending_messages={self.pending_messages}")
-                if chat_id in self.pending_messages:
-                    cached_content = self.pending_messages[chat_id]["content"]
+                logger.debug(f"[JinaSum] Found summary trigger, pending_count={self.pending_messages.count(chat_id)}")
+                # "总结"取最新一条分享，"总结2"/"总结第2条"取第2新的分享
+                index_match = re.fullmatch(r"总结\s*第?(\d{1,2})[条个篇]?", content)
+                index = int(index_match.group(1)) if index_match else 1
+                pending = self.pending_messages.take(chat_id, index)
+                if pending is not None:
+                    if pending.extra.get("prefetched"):
+                        self._release_prefetch(pending.content, used=True)
+                    cached_content = pending.content
                     logger.debug(f"[JinaSum] Processing cached content: {cached_content}")
-                    del self.pending_messages[chat_id]
-                    return self._process_summary(cached_content, e_context, retry_count=0, skip_notice=False)
+                    if pending.extra.get("urls"):
+                        return self._run_scheduled(PRIORITY_TRIGGER, e_context, self._process_batch_summary,
+                                                   pending.extra["urls"], e_context)
+                    return self._run_scheduled(PRIORITY_TRIGGER, e_context, self._process_summary,
+                                               cached_content, e_context, retry_count=0, skip_notice=False,
+                                               card=pending.extra.get("card"))
+                
+                # 检查是否是直接URL总结，移除"总结"后提取剩余内容中的链接，只有一个时单独总结
+                urls = self._extract_urls(content.replace("总结", ""))
+                if len(urls) == 1:
+                    logger.debug(f"[JinaSum] Processing direct URL: {urls[0]}")
+                    return self._run_scheduled(PRIORITY_TRIGGER, e_context, self._process_summary,
+                                               urls[0], e_context, retry_count=0, skip_notice=False)
                 
-                # 检查是否是直接URL总结，移除"总结"并检查剩余内容是否为URL
-                url = content.replace("总结", "").strip()
-                if url and self._check_url(url):
-                    logger.debug(f"[JinaSum] Processing direct URL: {url}")
-                    return self._process_summary(url, e_context, retry_count=0, skip_notice=False)
+                # "总结"后跟多个链接时一起总结
+                if len(urls) > 1:
+                    return self._run_scheduled(PRIORITY_TRIGGER, e_context, self._process_batch_summary,
+                                               urls, e_context)
                 logger.debug("[JinaSum] No content to summarize")
                 return
-
+            
+            # 群聊中的多链接消息（如每日新闻汇总）先缓存，发送"总结"时一起总结
+            if is_group:
+                urls = self._extract_urls(content)
+                if len(urls) > 1:
+                    self.pending_messages.add(chat_id, urls[0], urls=urls)
+                    logger.debug(f"[JinaSum] Cached digest message with {len(urls)} urls, chat_id={chat_id}")
+                return
                     
-            # 单聊中直接处理URL
-            if not is_group and self._check_url(content):
-                return self._process_summary(content, e_context, retry_count=0)
+            # 单聊中以链接开头的消息直接处理，只有一个链接时单独总结
+            urls = self._extract_urls(content)
+            if len(urls) == 1 and content.startswith(urls[0]):
+                return self._run_scheduled(PRIORITY_PRIVATE, e_context, self._process_summary,
+                                           urls[0], e_context, retry_count=0)
+            
+            # 单聊中包含多个链接的消息一起总结
+            if len(urls) > 1:
+                return self._run_scheduled(PRIORITY_PRIVATE, e_context, self._process_batch_summary,
+                                           urls, e_context)
+
+    def _run_scheduled(self, priority, e_context: EventContext, job, *args, **kwargs):
+        """按优先级排队执行总结任务
+        
+        私聊和总结指令超出配额时提示用户稍后再试
+        
+        Args:
+            priority: 任务优先级
+            e_context: 事件上下文
+            job: 总结方法，如_process_summary
+            
+        Raises:
+            SchedulerRejected: 自动总结超出配额、被取代或排队过久，由调用方决定如何处理，不修改e_context
+        """
+        msg = e_context['context']['msg']
+        try:
+            ticket = self.scheduler.acquire(priority, msg.from_user_id, msg.is_group)
+        except SchedulerRejected as e:
+            logger.info(f"[JinaSum] 总结任务未执行: priority={priority}, reason={e.reason}, chat_id={msg.from_user_id}")
+            if priority == PRIORITY_AUTO:
+                raise
+            e_context["reply"] = Reply(ReplyType.INFO, "当前会话中的总结任务较多，请稍后再试")
+            e_context.action = EventAction.BREAK_PASS
+            return
+        try:
+            with self.profiler.profile(job.__name__.lstrip("_")):
+                return job(*args, **kwargs)
+        finally:
+            self.scheduler.release(ticket)
+
+    def get_metrics(self):
+        """插件运行指标，供监控使用"""
+        return {
+            "scheduler": self.scheduler.stats(),
+            "memory": self.memory.usage(),
+            "llm": self.llm.stats(),
+            "profiler": self.profiler.stats(),
+            "feeds": self.feed_warmer.stats() if self.feed_warmer else None,
+            "content_cache": self.content_cache.storage_stats(),
+            "preview": dict(self._preview_counts),
+            "timeouts": self.timeouts.stats(),
+            "shared": {
+                "content": self.content_cache.stats(),
+                "summary": self.summary_cache.stats(),
+                "leases": self._inflight.stats(),
+            } if self.shared_backend else None,
+        }
+
+    def _feed_should_pause(self):
+        """内存预算或内容缓存接近用满时暂停订阅预热，避免挤掉用户请求的内容"""
+        return self.memory.pressure() >= FEED_PAUSE_PRESSURE or self.content_cache.fill_ratio() >= FEED_PAUSE_PRESSURE
+
+    def _warm_feed_entry(self, url):
+        """预热一篇订阅文章：以最低优先级排队，提取内容写入缓存，直连模式下可同时生成总结
+        
+        Args:
+            url: 文章链接
+        """
+        if not self._check_url(url):
+            return
+        need_summary = self.feed_warm_summary and self.llm_direct and self.summary_cache.get(url) is None
+        if url in self.content_cache and not need_summary:
+            return
+        
+        ticket = self.scheduler.acquire(PRIORITY_WARM, f"feed:{urlparse(url).hostname}", True)
+        try:
+            content = self._get_article_content(url)
+            if not need_summary or not content or content.startswith(("⚠️", "无法获取")):
+                return
+            result = self.llm.chat(
+                self._get_openai_chat_url(),
+                self._get_openai_headers(),
+                self._get_openai_payload(content[:self.settings.max_words]),
+            )
+            self.summary_cache.set(url, result.text)
+            logger.debug(f"[JinaSum] 已预先生成订阅文章总结: {url}")
+        finally:
+            self.scheduler.release(ticket)
+
+    def _classify_message(self, context_type, content, is_group):
+        """快速判断消息是否需要插件处理
+        
+        只做一次正则扫描，不做任何日志和字符串拷贝
+        
+        Returns:
+            str: "card" XML分享卡片, "share" 分享链接, "trigger" 群聊总结指令,
+                 "digest" 群聊多链接消息, "url" 私聊链接; 无需处理的消息返回None
+        """
+        match = _FAST_PATH_PATTERN.search(content)
+        if match is None:
+            return None
+        token = match.group()
+        if token[0] == "<":
+            if content[0] == "<" or "<url>" in content:
+                return "card"
+            return None
+        if context_type == ContextType.SHARING:
+            return "share"
+        if is_group:
+            # 群聊文本只响应总结指令，支持"链接总结"这种指令在后的写法
+            if token == "总结" or content.find("总结", match.end()) >= 0:
+                return "trigger"
+            # 包含多个链接的消息可能是新闻汇总，缓存后等待"总结"
+            if content.find("http", match.end()) >= 0:
+                return "digest"
+            return None
+        # 私聊只处理链接
+        return "url" if token != "总结" else None
+
+    def _reserve_prefetch(self, chat_id, url):
+        """为即将缓存的分享预留后台预提取，预留成功后由调用方提交_prefetch
+        
+        受全局并发上限和单群频率限制，超出限制时直接跳过，由用户发送"总结"时再正常提取
+        
+        Returns:
+            bool: 是否预留成功，成功时待处理分享需带上prefetched标记
+        """
+        settings = self.settings
+        if not settings.prefetch_enabled:
+            return False
+        if url in self.content_cache or not self._check_url(url):
+            return False
+        
+        now = time.time()
+        with self._prefetch_lock:
+            if now - self._prefetch_last.get(chat_id, 0) < settings.prefetch_group_interval:
+                return False
+            if self._prefetch_running >= self.prefetch_max_inflight:
+                logger.debug("[JinaSum] 预提取任务已满，跳过")
+                return False
+            self._prefetch_running += 1
+            self._prefetch_last[chat_id] = now
+            self._prefetched[url] = self._prefetched.get(url, 0) + 1
+            # 定期清理过期的群聊频率记录
+            if len(self._prefetch_last) > 10000:
+                self._prefetch_last = {
+                    k: v for k, v in self._prefetch_last.items() if now - v < settings.prefetch_group_interval
+                }
+        return True
+
+    def _prefetch(self, url):
+        """后台提取文章内容并写入缓存，记录由预提取写入的缓存条目"""
+        try:
+            logger.debug(f"[JinaSum] 开始预提取: {url}")
+            cached = url in self.content_cache
+            self._get_article_content(url, prefetch=True)
+            if not cached and url in self.content_cache:
+                with self._prefetch_lock:
+                    # 分享已被使用或淘汰时不再记录
+                    if url in self._prefetched:
+                        self._prefetch_owned.add(url)
+        except Exception as e:
+            logger.debug(f"[JinaSum] 预提取失败: {url}, {str(e)}")
+        finally:
+            with self._prefetch_lock:
+                self._prefetch_running -= 1
+
+    def _release_prefetch(self, url, used):
+        """待处理分享被使用或淘汰时释放预提取结果
+        
+        只移除由预提取写入且没有被其他请求使用过的缓存条目，普通请求写入或读取过的内容保留
+        """
+        with self._prefetch_lock:
+            count = self._prefetched.get(url, 0) - 1
+            if count > 0:
+                self._prefetched[url] = count
+                return
+            self._prefetched.pop(url, None)
+            owned = url in self._prefetch_owned
+            self._prefetch_owned.discard(url)
+        if not used and owned:
+            self.content_cache.pop(url)
+            logger.debug(f"[JinaSum] 分享已过期，移除未使用的预提取结果: {url}")
+
+    def _on_pending_evicted(self, pending):
+        if pending.extra.get("prefetched"):
+            self._release_prefetch(pending.content, used=False)
 
     def _clean_expired_cache(self):
         """清理过期的缓存"""
-        current_time = time.time()
-        # 清理待处理消息缓存
-        expired_keys = [
-            k for k, v in self.pending_messages.items() 
-            if current_time - v["timestamp"] > self.cache_timeout
-        ]
-        for k in expired_keys:
-            del self.pending_messages[k]
+        # 只弹出已过期的堆顶，未过期的消息不会被扫描
+        self.pending_messages.expire()
 
-    def _get_content_via_newspaper(self, url):
+    def _get_content_via_newspaper(self, url, html_text=None):
         """使用newspaper3k库提取文章内容
         
         Args:
             url: 文章URL
+            html_text: 前面的提取方法已下载的页面，提供时不再重复下载
             
         Returns:
             str: 文章内容,失败返回None
         """
         try:
-            # 处理B站短链接
-            if "b23.tv" in url:
-                # 先获取重定向后的真实URL
-                try:
-                    logger.debug(f"[JinaSum] Resolving B站短链接: {url}")
-                    headers = {
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-                        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-                        "Cache-Control": "max-age=0",
-                        "Connection": "keep-alive"
-                    }
-                    response = requests.head(url, headers=headers, allow_redirects=True, timeout=10)
-                    if response.status_code == 200:
-                        real_url = response.url
-                        logger.debug(f"[JinaSum] B站短链接解析结果: {real_url}")
-                        url = real_url
-                except Exception as e:
-                    logger.error(f"[JinaSum] 解析B站短链接失败: {str(e)}")
-            
-            # 增强模拟真实浏览器访问
-            import random
+            # 模拟真实浏览器访问
+            headers = self._get_browser_headers()
+            selected_ua = headers["User-Agent"]
             
-            # 随机选择一个User-Agent，模拟不同浏览器
-            user_agents = [
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0",
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Safari/605.1.15",
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0",
-                "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
-            ]
-            selected_ua = random.choice(user_agents)
-            
-            # 构建更真实的请求头
-            headers = {
-                "User-Agent": selected_ua,
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-                "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Connection": "keep-alive",
-                "Upgrade-Insecure-Requests": "1",
-                "Sec-Fetch-Dest": "document",
-                "Sec-Fetch-Mode": "navigate",
-                "Sec-Fetch-Site": "none",
-                "Sec-Fetch-User": "?1",
-                "Cache-Control": "max-age=0"
-            }
+            # 配置newspaper，每个请求使用独立的配置对象，避免并发请求互相覆盖
+            article_config = newspaper.Config()
+            article_config.browser_user_agent = selected_ua
+            article_config.fetch_images = False  # 不下载图片以加快速度
+            article_config.memoize_articles = False  # 避免缓存导致的问题
             
-            # 设置一个随机的引荐来源，微信文章有时需要Referer
-            referers = [
-                "https://www.baidu.com/",
-                "https://www.google.com/",
-                "https://www.bing.com/",
-                "https://mp.weixin.qq.com/",
-                "https://weixin.qq.com/",
-                "https://www.qq.com/"
-            ]
-            if random.random() > 0.3:  # 70%的概率添加Referer
-                headers["Referer"] = random.choice(referers)
-                
-            # 为微信公众号文章添加特殊处理
-            if "mp.weixin.qq.com" in url:
-                try:
-                    # 添加必要的微信Cookie参数，减少被检测的可能性
-                    cookies = {
-                        "appmsglist_action_3941382959": "card",  # 一些随机的Cookie值
-                        "appmsglist_action_3941382968": "card",
-                        "pac_uid": f"{int(time.time())}_f{random.randint(10000, 99999)}",
-                        "rewardsn": "",
-                        "wxtokenkey": f"{random.randint(100000, 999999)}",
-                    }
-                    
-                    # 直接使用requests进行内容获取，有时比newspaper更有效
-                    session = requests.Session()
-                    response = session.get(url, headers=headers, cookies=cookies, timeout=20)
-                    response.raise_for_status()
-                    
-                    # 使用BeautifulSoup直接解析
-                    from bs4 import BeautifulSoup
-                    soup = BeautifulSoup(response.content, 'html.parser')
+            # 对newspaper的下载过程进行定制，解析和评分交给解析进程池
+            try:
+                if html_text is None:
+                    # 手动下载
+                    response = self._fetch(url, headers=headers)
                     
-                    # 微信文章通常有这些特征
-                    title_elem = soup.select_one('#activity-name')
-                    author_elem = soup.select_one('#js_name') or soup.select_one('#js_profile_qrcode > div > strong')
-                    content_elem = soup.select_one('#js_content')
+                    # 编码已在下载时确定，只解码一次，后续解析都使用这份文本
+                    html_text = response.text
                     
-                    if content_elem:
-                        # 移除无用元素
-                        for remove_elem in content_elem.select('script, style, svg'):
-                            remove_elem.extract()
-                            
-                        # 尝试获取所有文本
-                        text_content = content_elem.get_text(separator='\n', strip=True)
-                        
-                        if text_content and len(text_content) > 200:  # 内容足够长
-                            title = title_elem.get_text(strip=True) if title_elem else ""
-                            author = author_elem.get_text(strip=True) if author_elem else "未知作者"
-                            
-                            # 构建完整内容
-                            full_content = ""
-                            if title:
-                                full_content += f"标题: {title}\n"
-                            if author and author != "未知作者":
-                                full_content += f"作者: {author}\n"
-                            full_content += f"\n{text_content}"
-                            
-                            logger.debug(f"[JinaSum] 成功通过直接请求提取微信文章内容，长度: {len(text_content)}")
-                            return full_content
-                except Exception as e:
-                    logger.error(f"[JinaSum] 直接请求提取微信文章失败: {str(e)}")
-                    # 失败后使用newspaper尝试，不要返回
-            
-            # 配置newspaper
-            newspaper.Config().browser_user_agent = selected_ua
-            newspaper.Config().request_timeout = 30
-            newspaper.Config().fetch_images = False  # 不下载图片以加快速度
-            newspaper.Config().memoize_articles = False  # 避免缓存导致的问题
-            
-            # 对newspaper的下载过程进行定制
-            try:
-                # 创建Article对象但不立即下载
-                article = Article(url, language='zh')
-                
-                # 手动下载
-                session = requests.Session()
-                response = session.get(url, headers=headers, timeout=30)
-                response.raise_for_status()
-                
-                # 手动设置html内容
-                article.html = response.text
-                article.download_state = 2  # 表示下载完成
-                
-                # 然后解析
-                article.parse()
+                    # 页面嵌入了完整的结构化数据时直接使用，不再让newspaper解析DOM
+                    structured_content = self._extract_structured_content(html_text)
+                    if structured_content:
+                        return structured_content
+            except DeadlineExceeded:
+                raise
             except Exception as direct_dl_error:
                 logger.error(f"[JinaSum] 尝试定制下载失败，回退到标准方法: {str(direct_dl_error)}")
-                article = Article(url, language='zh')
+                article_config.request_timeout = self.timeouts.timeout(urlparse(url).hostname, "first_byte")
+                article = Article(url, language='zh', config=article_config)
                 article.download()
-                article.parse()
+                html_text = article.html
             
-            # 尝试获取完整内容
-            title = article.title
-            authors = ', '.join(article.authors) if article.authors else "未知作者"
-            publish_date = article.publish_date.strftime("%Y-%m-%d") if article.publish_date else "未知日期"
-            content = article.text
-            
-            # 如果内容为空或过短，尝试直接从HTML获取
-            if not content or len(content) < 500:
-                logger.debug("[JinaSum] Article content too short, trying to extract from HTML directly")
-                try:
-                    from bs4 import BeautifulSoup
-                    soup = BeautifulSoup(article.html, 'html.parser')
-                    
-                    # 移除脚本和样式元素
-                    for script in soup(["script", "style"]):
-                        script.extract()
-                    
-                    # 获取所有文本
-                    text = soup.get_text(separator='\n', strip=True)
-                    
-                    # 如果直接提取的内容更长，使用它
-                    if len(text) > len(content):
-                        content = text
-                        logger.debug(f"[JinaSum] Using BeautifulSoup extracted content: {len(content)} chars")
-                except Exception as bs_error:
-                    logger.error(f"[JinaSum] BeautifulSoup extraction failed: {str(bs_error)}")
+            # 解析页面，newspaper正文质量不佳时会改用页面全部文本
+            title, authors, publish_date, content = self.extract_pool.run(
+                parse_newspaper_html, url, html_text, self.settings.quality_threshold
+            )
             
             # 合成最终内容
             if title:
                 full_content = f"标题: {title}\n"
-                if authors and authors != "未知作者":
+                if authors:
                     full_content += f"作者: {authors}\n"
-                if publish_date and publish_date != "未知日期":
+                if publish_date:
                     full_content += f"发布日期: {publish_date}\n"
                 full_content += f"\n{content}"
             else:
@@ -447,8 +745,8 @@ class JinaSum(Plugin):
             if not full_content or len(full_content.strip()) < 50:
                 logger.debug("[JinaSum] No content extracted by newspaper")
                 
-                # 尝试使用通用内容提取方法
-                full_content = self._extract_content_general(url, headers)
+                # 尝试使用通用内容提取方法，复用已下载的页面
+                full_content = self._extract_content_general(url, headers, html_text=html_text)
                 if full_content:
                     return full_content
                     
@@ -463,15 +761,19 @@ class JinaSum(Plugin):
             logger.debug(f"[JinaSum] Successfully extracted content via newspaper, length: {len(full_content)}")
             return full_content
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"[JinaSum] Error extracting content via newspaper: {str(e)}")
             
             # 尝试使用通用内容提取方法作为备用
             try:
                 logger.debug(f"[JinaSum] 尝试使用通用内容提取方法")
-                content = self._extract_content_general(url)
+                content = self._extract_content_general(url, html_text=html_text)
                 if content:
                     return content
+            except DeadlineExceeded:
+                raise
             except Exception as general_error:
                 logger.error(f"[JinaSum] 通用内容提取也失败: {str(general_error)}")
             
@@ -479,7 +781,236 @@ class JinaSum(Plugin):
                 return f"无法获取微信公众号文章内容。可能原因：\n1. 文章需要登录才能查看\n2. 文章已被删除\n3. 服务器被微信风控\n\n请尝试直接打开链接: {url}"
             return None
 
-    def _extract_content_general(self, url, headers=None):
+    def _get_browser_headers(self):
+        """构建模拟真实浏览器访问的请求头，随机选择User-Agent和Referer"""
+        import random
+
+        # 随机选择一个User-Agent，模拟不同浏览器
+        user_agents = [
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0",
+            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Safari/605.1.15",
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0",
+            "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
+        ]
+        selected_ua = random.choice(user_agents)
+
+        # 构建更真实的请求头
+        headers = {
+            "User-Agent": selected_ua,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+            "Accept-Encoding": "gzip, deflate, br",
+            "Connection": "keep-alive",
+            "Upgrade-Insecure-Requests": "1",
+            "Sec-Fetch-Dest": "document",
+            "Sec-Fetch-Mode": "navigate",
+            "Sec-Fetch-Site": "none",
+            "Sec-Fetch-User": "?1",
+            "Cache-Control": "max-age=0"
+        }
+
+        # 设置一个随机的引荐来源，微信文章有时需要Referer
+        referers = [
+            "https://www.baidu.com/",
+            "https://www.google.com/",
+            "https://www.bing.com/",
+            "https://mp.weixin.qq.com/",
+            "https://weixin.qq.com/",
+            "https://www.qq.com/"
+        ]
+        if random.random() > 0.3:  # 70%的概率添加Referer
+            headers["Referer"] = random.choice(referers)
+        return headers
+
+    def _extract_wechat_article(self, url):
+        """提取微信公众号文章
+        
+        Args:
+            url: 文章URL
+            
+        Returns:
+            str: 文章内容，触发环境验证时返回以"⚠️"开头的提示，失败返回None
+        """
+        import random
+        
+        try:
+            headers = self._get_browser_headers()
+            
+            # 添加必要的微信Cookie参数，减少被检测的可能性
+            cookies = {
+                "appmsglist_action_3941382959": "card",  # 一些随机的Cookie值
+                "appmsglist_action_3941382968": "card",
+                "pac_uid": f"{int(time.time())}_f{random.randint(10000, 99999)}",
+                "rewardsn": "",
+                "wxtokenkey": f"{random.randint(100000, 999999)}",
+            }
+            
+            # 直接使用requests进行内容获取，有时比newspaper更有效
+            response = self._fetch(url, headers=headers, cookies=cookies)
+            
+            # 验证拦截页直接返回提示，不再尝试其他提取方法
+            if is_verify_page(response.content):
+                logger.warning(f"[JinaSum] 微信文章触发环境验证: {url}")
+                return "⚠️ 微信提示当前环境异常，需要完成验证才能查看这篇文章，请直接打开链接阅读。"
+            
+            # 只定位正文区域和内联脚本中的元数据，不解析整个页面
+            article = parse_wechat_article(response.content)
+            if article and self._is_good_content(article.content):
+                logger.debug(f"[JinaSum] 成功通过直接请求提取微信文章内容，长度: {len(article.content)}")
+                return article.as_content()
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"[JinaSum] 直接请求提取微信文章失败: {str(e)}")
+        return None
+
+    def _extract_with_site_extractor(self, url):
+        """使用站点专用规则提取文章
+        
+        Args:
+            url: 文章URL
+            
+        Returns:
+            tuple: (文章内容或以"⚠️"开头的验证提示, 已下载的页面)；
+                没有匹配的站点或提取质量不佳时内容为None，页面交给后续提取方法复用，未下载页面时为None
+        """
+        extractor = self.settings.site_extractors.match(url)
+        if extractor is None:
+            return None, None
+        logger.debug(f"[JinaSum] 使用站点提取规则: {extractor.name}")
+        
+        # 代码实现的提取器
+        if extractor.handler:
+            return getattr(self, extractor.handler)(url), None
+        
+        html_text = None
+        try:
+            # 优先使用JSON接口，不需要下载和解析整个页面
+            api_url = extractor.json_api_url(url)
+            if api_url:
+                try:
+                    response = self._fetch(api_url, headers=self._get_default_headers())
+                    content = extractor.extract_json(response.json())
+                    if content and self._is_good_content(content):
+                        return content, None
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    logger.debug(f"[JinaSum] 站点JSON接口提取失败: {str(e)}")
+            
+            response = self._fetch(url, headers=self._get_browser_headers())
+            html_text = response.text
+            content = self._extract_structured_content(html_text)
+            if content:
+                return content, html_text
+            content = extractor.extract_html(html_text)
+            if content and self._is_good_content(content):
+                logger.debug(f"[JinaSum] 站点规则{extractor.name}提取成功，长度: {len(content)}")
+                return content, html_text
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"[JinaSum] 站点规则{extractor.name}提取失败: {str(e)}")
+        return None, html_text
+
+    def _extract_bilibili_video(self, url):
+        """B站视频：只请求视频信息、标签和字幕接口，不下载视频页面
+        
+        短链接通过连接池解析跳转地址；同一视频的不同分享链接共用缓存
+        
+        Args:
+            url: 视频链接或短链接
+            
+        Returns:
+            str: 由标题、简介、标签和字幕构建的文本，不是视频链接时返回None
+            
+        Raises:
+            ExtractionUnavailable: 是视频链接但视频信息接口获取失败
+        """
+        if is_short_link(url):
+            url = self._resolve_short_link(url)
+        video = parse_video_url(url)
+        if video is None:
+            return None
+        params, page = video
+        cache_key = f"{video_cache_key(params)}:{page}"
+        content = self.content_cache.get(cache_key)
+        if content is not None:
+            logger.debug(f"[JinaSum] 命中B站视频缓存: {cache_key}")
+            return content
+        
+        headers = self._get_bilibili_headers()
+        try:
+            view = parse_view(self._timed_get(VIEW_API, params=params, headers=headers).json())
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            raise ExtractionUnavailable(f"获取B站视频信息失败: {str(e)}")
+        
+        cid, part = select_page(view, page)
+        params = {"bvid": view["bvid"]} if view.get("bvid") else params
+        tags = self._get_bilibili_tags(params, headers)
+        transcript = self._get_bilibili_transcript(view, params, cid, page, headers)
+        content = build_video_content(view, tags, transcript, part, max_chars=self.settings.max_words)
+        logger.debug(f"[JinaSum] B站视频信息获取成功: {cache_key}, 标签{len(tags)}个, 字幕{len(transcript)}句")
+        self.content_cache.set(cache_key, content, strategy="bilibili")
+        # av号链接同时按BV号缓存
+        bvid_key = f"{video_cache_key(params)}:{page}"
+        if bvid_key != cache_key:
+            self.content_cache.set(bvid_key, content, strategy="bilibili")
+        return content
+
+    def _get_bilibili_headers(self):
+        return {
+            "User-Agent": self._get_browser_headers()["User-Agent"],
+            "Referer": "https://www.bilibili.com/",
+            "Accept": "application/json, text/plain, */*",
+        }
+
+    def _resolve_short_link(self, url):
+        """通过连接池读取短链接的跳转地址，不下载目标页面，失败时返回原链接"""
+        try:
+            response = self._timed_get(url, headers=self._get_bilibili_headers(), allow_redirects=False, stream=True)
+            response.close()
+            location = response.headers.get("Location")
+            if location:
+                logger.debug(f"[JinaSum] 短链接解析结果: {location}")
+                return urljoin(url, location)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"[JinaSum] 解析短链接失败: {str(e)}")
+        return url
+
+    def _get_bilibili_tags(self, params, headers):
+        """获取视频标签，失败时返回空列表"""
+        try:
+            return parse_tags(self._timed_get(TAGS_API, params=params, headers=headers).json())
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.debug(f"[JinaSum] 获取B站视频标签失败: {str(e)}")
+            return []
+
+    def _get_bilibili_transcript(self, view, params, cid, page, headers):
+        """获取视频字幕，优先使用视频信息中已有的字幕列表，失败或没有字幕时返回空列表"""
+        try:
+            subtitles = (view.get("subtitle") or {}).get("list") if page == 1 else None
+            if not subtitles and cid:
+                subtitles = parse_player_subtitles(
+                    self._timed_get(PLAYER_API, params=dict(params, cid=cid), headers=headers).json())
+            subtitle_url = pick_subtitle(subtitles)
+            if not subtitle_url:
+                return []
+            return parse_subtitle_body(self._timed_get(subtitle_url, headers=headers).json())
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.debug(f"[JinaSum] 获取B站视频字幕失败: {str(e)}")
+            return []
+
+    def _extract_content_general(self, url, headers=None, html_text=None):
         """通用网页内容提取方法，支持静态和动态页面
         
         首先尝试静态提取（更快、更轻量），如果失败或内容太少再尝试动态提取（更慢但更强大）
@@ -487,187 +1018,55 @@ class JinaSum(Plugin):
         Args:
             url: 网页URL
             headers: 可选的请求头，如果为None则使用默认
+            html_text: 前面的提取方法已下载的页面，提供时不再重复下载
             
         Returns:
             str: 提取的内容，失败返回None
         """
         try:
             import random
-            from bs4 import BeautifulSoup
-            
-            # 如果是百度文章链接，使用专门的处理方法
-            if "md.mbd.baidu.com" in url or "mbd.baidu.com" in url:
-                # 直接使用专门的百度文章提取方法
-                content = self._extract_baidu_article(url)
-                if content:
-                    return content
             
             # 如果没有提供headers，创建一个默认的
             if not headers:
                 headers = self._get_default_headers()
             
-            # 添加随机延迟以避免被检测为爬虫
-            time.sleep(random.uniform(0.5, 2))
-            
-            # 创建会话对象
-            session = requests.Session()
-            
-            # 设置基本cookies
-            session.cookies.update({
-                f"visit_id_{int(time.time())}": f"{random.randint(1000000, 9999999)}",
-                "has_visited": "1",
-            })
-            
-            # 发送请求获取页面
-            logger.debug(f"[JinaSum] 通用提取方法正在请求: {url}")
-            response = session.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            # 确保编码正确
-            if response.encoding == 'ISO-8859-1':
-                response.encoding = response.apparent_encoding
+            self.profiler.annotate(strategy="general")
+            if html_text is None:
+                # 添加随机延迟以避免被检测为爬虫，等待后剩余的整体时间不够发送请求时不再等待
+                delay = random.uniform(0.5, 2)
+                if self.timeouts.can_wait(delay):
+                    time.sleep(delay)
                 
-            # 使用BeautifulSoup解析HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 移除无用元素
-            for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'form', 'iframe']):
-                element.extract()
-            
-            # 寻找可能的标题
-            title = None
-            
-            # 尝试多种标题选择器
-            title_candidates = [
-                soup.select_one('h1'),  # 最常见的标题标签
-                soup.select_one('title'),  # HTML标题
-                soup.select_one('.title'),  # 常见的标题类
-                soup.select_one('.article-title'),  # 常见的文章标题类
-                soup.select_one('.post-title'),  # 博客标题
-                soup.select_one('[class*="title" i]'),  # 包含title的类
-            ]
-            
-            for candidate in title_candidates:
-                if candidate and candidate.text.strip():
-                    title = candidate.text.strip()
-                    break
-            
-            # 查找可能的内容元素
-            content_candidates = []
-            
-            # 1. 尝试找常见的内容容器
-            content_selectors = [
-                'article', 'main', '.content', '.article', '.post-content',
-                '[class*="content" i]', '[class*="article" i]', 
-                '.story', '.entry-content', '.post-body',
-                '#content', '#article', '.body'
-            ]
-            
-            for selector in content_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    content_candidates.extend(elements)
-            
-            # 2. 如果没有找到明确的内容容器，寻找具有最多文本的div元素
-            if not content_candidates:
-                paragraphs = {}
-                # 查找所有段落和div
-                for elem in soup.find_all(['p', 'div']):
-                    text = elem.get_text(strip=True)
-                    # 只考虑有实际内容的元素
-                    if len(text) > 100:
-                        paragraphs[elem] = len(text)
-                
-                # 找出文本最多的元素
-                if paragraphs:
-                    max_elem = max(paragraphs.items(), key=lambda x: x[1])[0]
-                    # 如果是div，直接添加；如果是p，尝试找其父元素
-                    if max_elem.name == 'div':
-                        content_candidates.append(max_elem)
-                    else:
-                        # 找包含多个段落的父元素
-                        parent = max_elem.parent
-                        if parent and len(parent.find_all('p')) > 3:
-                            content_candidates.append(parent)
-                        else:
-                            content_candidates.append(max_elem)
-            
-            # 3. 简单算法来评分和选择最佳内容元素
-            best_content = None
-            max_score = 0
-            
-            for element in content_candidates:
-                # 计算文本长度
-                text = element.get_text(strip=True)
-                text_length = len(text)
-                
-                # 计算文本密度（文本长度/HTML长度）
-                html_length = len(str(element))
-                text_density = text_length / html_length if html_length > 0 else 0
-                
-                # 计算段落数量
-                paragraphs = element.find_all('p')
-                paragraph_count = len(paragraphs)
-                
-                # 检查是否有图片
-                images = element.find_all('img')
-                image_count = len(images)
-                
-                # 根据各种特征计算分数
-                score = (
-                    text_length * 1.0 +  # 文本长度很重要
-                    text_density * 100 +  # 文本密度很重要
-                    paragraph_count * 30 +  # 段落数量也很重要
-                    image_count * 10  # 图片不太重要，但也是一个指标
-                )
-                
-                # 减分项：如果包含许多链接，可能是导航或侧边栏
-                links = element.find_all('a')
-                link_text_ratio = sum(len(a.get_text(strip=True)) for a in links) / text_length if text_length > 0 else 0
-                if link_text_ratio > 0.5:  # 如果链接文本占比过高
-                    score *= 0.5
-                
-                # 更新最佳内容
-                if score > max_score:
-                    max_score = score
-                    best_content = element
-            
-            # 如果找到内容，提取并清理文本
-            static_content_result = None
-            if best_content:
-                # 首先移除内容中可能的广告或无关元素
-                for ad in best_content.select('[class*="ad" i], [class*="banner" i], [id*="ad" i], [class*="recommend" i]'):
-                    ad.extract()
-                
-                # 获取并清理文本
-                content_text = best_content.get_text(separator='\n', strip=True)
+                # 设置基本cookies
+                cookies = {
+                    f"visit_id_{int(time.time())}": f"{random.randint(1000000, 9999999)}",
+                    "has_visited": "1",
+                }
                 
-                # 移除多余的空白行
-                content_text = re.sub(r'\n{3,}', '\n\n', content_text)
+                # 发送请求获取页面
+                logger.debug(f"[JinaSum] 通用提取方法正在请求: {url}")
+                response = self._fetch(url, headers=headers, cookies=cookies)
                 
-                # 构建最终输出
-                result = ""
-                if title:
-                    result += f"标题: {title}\n\n"
-                
-                result += content_text
+                # 编码已在下载时确定，只解码一次
+                html_text = response.text
+            
+            # 页面嵌入了完整的结构化数据时直接使用，跳过DOM评分和JavaScript渲染
+            structured_content = self._extract_structured_content(html_text)
+            if structured_content:
+                return structured_content
                 
-                logger.debug(f"[JinaSum] 通用提取方法成功，提取内容长度: {len(result)}")
-                static_content_result = result
+            # 解析页面并为候选正文元素评分，启用进程池时在子进程中执行
+            static_content_result, best_html_length = self.extract_pool.run(parse_general_html, html_text)
+            if static_content_result:
+                logger.debug(f"[JinaSum] 通用提取方法成功，提取内容长度: {len(static_content_result)}")
             
             # 判断静态提取的内容质量
-            content_is_good = False
-            if static_content_result:
-                # 内容长度检查
-                if len(static_content_result) > 1000:
-                    content_is_good = True
-                # 结构检查 - 至少应该有多个段落
-                elif static_content_result.count('\n\n') >= 3:
-                    content_is_good = True
+            content_is_good = self._is_good_content(static_content_result, html_length=best_html_length)
             
             # 如果静态提取内容质量不佳，尝试动态提取
             if not content_is_good:
                 logger.debug("[JinaSum] 静态提取内容质量不佳，尝试动态提取")
+                self.profiler.annotate(strategy="dynamic")
                 dynamic_content = self._extract_dynamic_content(url, headers)
                 if dynamic_content:
                     logger.debug(f"[JinaSum] 动态提取成功，内容长度: {len(dynamic_content)}")
@@ -675,6 +1074,8 @@ class JinaSum(Plugin):
             
             return static_content_result
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"[JinaSum] 通用内容提取方法失败: {str(e)}", exc_info=True)
             return None
@@ -691,106 +1092,43 @@ class JinaSum(Plugin):
         """
         try:
             from requests_html import HTMLSession
-            from bs4 import BeautifulSoup
-            
-            logger.debug(f"[JinaSum] 开始动态提取内容: {url}")
-            
-            # 创建会话并设置超时
-            session = HTMLSession()
-            
-            # 添加请求头
-            req_headers = headers or self._get_default_headers()
-            
-            # 获取页面
-            response = session.get(url, headers=req_headers, timeout=30)
-            
-            # 执行JavaScript (设置超时，防止无限等待)
-            logger.debug("[JinaSum] 开始执行JavaScript")
-            response.html.render(timeout=20, sleep=2)
-            logger.debug("[JinaSum] JavaScript执行完成")
-            
-            # 处理渲染后的HTML
-            rendered_html = response.html.html
-            
-            # 使用BeautifulSoup解析渲染后的HTML
-            soup = BeautifulSoup(rendered_html, 'html.parser')
-            
-            # 清理无用元素
-            for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-                element.extract()
-            
-            # 查找标题
-            title = None
-            title_candidates = [
-                soup.select_one('h1'),
-                soup.select_one('title'),
-                soup.select_one('.title'),
-                soup.select_one('[class*="title" i]'),
-            ]
-            
-            for candidate in title_candidates:
-                if candidate and candidate.text.strip():
-                    title = candidate.text.strip()
-                    break
-            
-            # 寻找主要内容
-            main_content = None
-            
-            # 1. 尝试找主要内容容器
-            main_selectors = [
-                'article', 'main', '.content', '.article',
-                '[class*="content" i]', '[class*="article" i]',
-                '#content', '#article'
-            ]
-            
-            for selector in main_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    # 选择包含最多文本的元素
-                    main_content = max(elements, key=lambda x: len(x.get_text()))
-                    break
-            
-            # 2. 如果没找到，寻找文本最多的div
-            if not main_content:
-                paragraphs = {}
-                for elem in soup.find_all(['div']):
-                    text = elem.get_text(strip=True)
-                    if len(text) > 200:  # 只考虑长文本
-                        paragraphs[elem] = len(text)
-                
-                if paragraphs:
-                    main_content = max(paragraphs.items(), key=lambda x: x[1])[0]
-            
-            # 3. 如果还是没找到，使用整个body
-            if not main_content:
-                main_content = soup.body
-            
-            # 从主要内容中提取文本
-            if main_content:
-                # 清理可能的广告或无关元素
-                for ad in main_content.select('[class*="ad" i], [class*="banner" i], [id*="ad" i], [class*="recommend" i]'):
-                    ad.extract()
-                
-                # 获取文本
-                content_text = main_content.get_text(separator='\n', strip=True)
-                content_text = re.sub(r'\n{3,}', '\n\n', content_text)  # 清理多余空行
-                
-                # 构建最终结果
-                result = ""
-                if title:
-                    result += f"标题: {title}\n\n"
-                result += content_text
-                
-                # 关闭会话
-                session.close()
-                
-                return result
             
-            # 关闭会话
-            session.close()
+            # 渲染需要额外的Chromium内存，预算长时间不足时跳过渲染
+            try:
+                render_reservation = self.memory.reserve(self.render_reserve_bytes, timeout=self.render_wait)
+            except MemoryBudgetExceeded as e:
+                logger.warning(f"[JinaSum] {str(e)}，跳过动态提取: {url}")
+                return None
             
-            return None
+            logger.debug(f"[JinaSum] 开始动态提取内容: {url}")
             
+            with render_reservation:
+                # 创建会话并设置超时
+                session = HTMLSession()
+                try:
+                    # 添加请求头
+                    req_headers = headers or self._get_default_headers()
+                    
+                    # 获取页面
+                    host = urlparse(url).hostname
+                    response = session.get(url, headers=req_headers, timeout=self.timeouts.request_timeout(host))
+                    
+                    # 执行JavaScript (设置超时，防止无限等待)，渲染耗时不含加载后的等待时间
+                    logger.debug("[JinaSum] 开始执行JavaScript")
+                    render_start = time.time()
+                    response.html.render(timeout=self.timeouts.timeout(host, "render"), sleep=RENDER_SLEEP)
+                    self.timeouts.record(host, "render", max(0.0, time.time() - render_start - RENDER_SLEEP))
+                    logger.debug("[JinaSum] JavaScript执行完成")
+                    rendered_html = response.html.html
+                finally:
+                    # 渲染完成后立即关闭浏览器，释放Chromium占用的内存
+                    session.close()
+            
+            # 解析渲染后的HTML，启用进程池时在子进程中执行
+            return self.extract_pool.run(parse_rendered_html, rendered_html)
+            
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"[JinaSum] 动态提取失败: {str(e)}", exc_info=True)
             return None
@@ -807,7 +1145,6 @@ class JinaSum(Plugin):
         try:
             import random
             import json
-            from bs4 import BeautifulSoup
             
             logger.debug(f"[JinaSum] 尝试专门提取百度文章: {url}")
             
@@ -865,23 +1202,18 @@ class JinaSum(Plugin):
                     }
                     
                     # 发送请求
-                    response = requests.get(
-                        target_url, 
-                        headers=headers, 
-                        timeout=15,
-                        allow_redirects=True
-                    )
+                    response = self._timed_get(target_url, headers=headers, allow_redirects=True)
                     response.raise_for_status()
                     
-                    # 确保编码正确
-                    if response.encoding == 'ISO-8859-1':
-                        response.encoding = response.apparent_encoding
+                    # 确定编码并只解码一次
+                    content_type = response.headers.get('Content-Type', '')
+                    response.encoding, _ = resolve_encoding(content_type, response.content)
+                    html_text = response.text
                     
                     # 检查是否是JSON响应 - 某些百度API会返回JSON
-                    content_type = response.headers.get('Content-Type', '')
-                    if 'application/json' in content_type or response.text.strip().startswith('{'):
+                    if 'application/json' in content_type or html_text.lstrip().startswith('{'):
                         try:
-                            data = json.loads(response.text)
+                            data = json.loads(html_text)
                             # 检查JSON数据中是否包含文章内容
                             if data.get('data', {}).get('title') and (data.get('data', {}).get('content') or data.get('data', {}).get('html')):
                                 title = data['data']['title']
@@ -889,15 +1221,8 @@ class JinaSum(Plugin):
                                 author = data['data'].get('author', '')
                                 publish_time = data['data'].get('publish_time', '')
                                 
-                                # 解析HTML内容
-                                content_soup = BeautifulSoup(content_html, 'html.parser')
-                                
-                                # 移除脚本和样式
-                                for tag in content_soup(['script', 'style']):
-                                    tag.decompose()
-                                
-                                # 提取纯文本
-                                content_text = content_soup.get_text(separator='\n', strip=True)
+                                # 解析HTML内容，启用进程池时在子进程中执行
+                                content_text = self.extract_pool.run(html_fragment_text, content_html)
                                 
                                 # 构建结果
                                 result = f"标题: {title}\n"
@@ -914,121 +1239,19 @@ class JinaSum(Plugin):
                             # 不是JSON，继续当作HTML处理
                             pass
                     
-                    # 解析HTML
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # 先尝试提取可能的JSON数据
-                    # 百度有时会在页面中嵌入文章JSON数据
-                    for script in soup.find_all('script'):
-                        script_text = script.string
-                        if script_text and ('content' in script_text or 'article' in script_text):
-                            try:
-                                # 尝试找到JSON格式的数据
-                                json_start = script_text.find('{')
-                                json_end = script_text.rfind('}') + 1
-                                if json_start >= 0 and json_end > json_start:
-                                    json_str = script_text[json_start:json_end]
-                                    data = json.loads(json_str)
-                                    
-                                    # 检查是否包含文章数据
-                                    article_data = None
-                                    if 'article' in data:
-                                        article_data = data['article']
-                                    elif 'data' in data and 'article' in data['data']:
-                                        article_data = data['data']['article']
-                                    
-                                    if article_data and 'title' in article_data:
-                                        title = article_data.get('title', '')
-                                        content = article_data.get('content', '')
-                                        author = article_data.get('author', '')
-                                        publish_time = article_data.get('publish_time', '')
-                                        
-                                        # 解析HTML内容
-                                        if content:
-                                            content_soup = BeautifulSoup(content, 'html.parser')
-                                            content_text = content_soup.get_text(separator='\n', strip=True)
-                                            
-                                            # 构建结果
-                                            result = f"标题: {title}\n"
-                                            if author:
-                                                result += f"作者: {author}\n"
-                                            if publish_time:
-                                                result += f"时间: {publish_time}\n"
-                                                
-                                            result += f"\n{content_text}"
-                                            
-                                            logger.debug(f"[JinaSum] 成功从嵌入JSON提取百度文章，长度: {len(result)}")
-                                            return result
-                            except Exception as json_err:
-                                logger.debug(f"[JinaSum] 从脚本提取JSON失败: {str(json_err)}")
-                    
-                    # 尝试从HTML直接提取内容
-                    # 提取标题
-                    title = None
-                    for selector in ['.article-title', '.title', 'h1.title', 'h1']:
-                        title_elem = soup.select_one(selector)
-                        if title_elem and title_elem.text.strip():
-                            title = title_elem.text.strip()
-                            break
+                    # 百度有时会在页面中嵌入文章JSON数据，直接定位数据块解析，不需要遍历所有脚本
+                    structured_content = self._extract_structured_content(html_text)
+                    if structured_content:
+                        return structured_content
                     
-                    # 如果没找到标题，尝试使用标题标签
-                    if not title:
-                        title_tag = soup.find('title')
-                        if title_tag:
-                            title = title_tag.text.strip()
-                    
-                    # 提取作者
-                    author = None
-                    for selector in ['.author', '.writer', '.source', '.article-author']:
-                        author_elem = soup.select_one(selector)
-                        if author_elem and author_elem.text.strip():
-                            author = author_elem.text.strip()
-                            break
-                    
-                    # 提取内容
-                    content = None
-                    for selector in ['.article-content', '.article-detail', '.content', '.artcle', '#article']:
-                        content_elem = soup.select_one(selector)
-                        if content_elem:
-                            # 移除无用元素
-                            for remove_elem in content_elem.select('.ad-banner, .recommend, .share-btn, script, style'):
-                                remove_elem.extract()
-                            
-                            content_text = content_elem.get_text(separator='\n', strip=True)
-                            if len(content_text) > 200:  # 内容足够长
-                                content = content_text
-                                break
-                    
-                    # 如果没找到内容，尝试查找最长的段落集合
-                    if not content:
-                        max_paragraphs = []
-                        max_text_len = 0
-                        
-                        # 查找所有可能的内容容器
-                        for div in soup.find_all('div'):
-                            paragraphs = div.find_all('p')
-                            if len(paragraphs) >= 3:  # 至少有3个段落
-                                text = '\n'.join([p.get_text(strip=True) for p in paragraphs])
-                                if len(text) > max_text_len:
-                                    max_text_len = len(text)
-                                    max_paragraphs = paragraphs
-                        
-                        # 如果找到足够长的段落集合
-                        if max_text_len > 200:
-                            content = '\n'.join([p.get_text(strip=True) for p in max_paragraphs])
-                    
-                    # 如果找到内容，构建结果
-                    if content:
-                        result = ""
-                        if title:
-                            result += f"标题: {title}\n"
-                        if author:
-                            result += f"作者: {author}\n"
-                        result += f"\n{content}"
-                        
+                    # 解析页面提取标题、作者和正文，启用进程池时在子进程中执行
+                    result = self.extract_pool.run(parse_baidu_html, html_text, self.settings.quality_threshold)
+                    if result:
                         logger.debug(f"[JinaSum] 成功通过HTML提取百度文章，长度: {len(result)}")
                         return result
                 
+                except DeadlineExceeded:
+                    raise
                 except Exception as e:
                     logger.debug(f"[JinaSum] 尝试URL {target_url} 失败: {str(e)}")
                     continue  # 尝试下一个URL格式
@@ -1037,10 +1260,140 @@ class JinaSum(Plugin):
             logger.error(f"[JinaSum] 所有百度文章提取方法均失败")
             return None
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"[JinaSum] 专门提取百度文章失败: {str(e)}")
             return None
 
+    def _fetch(self, url, headers=None, cookies=None):
+        """获取页面，启用磁盘缓存时携带校验信息进行条件请求
+        
+        连接、首字节和响应体分别使用按该域名耗时分布确定的超时时间，并且不超过本次提取剩余的整体时间
+        
+        Args:
+            url: 页面URL
+            headers: 请求头
+            cookies: 本次请求使用的Cookie
+            
+        Returns:
+            requests.Response: 响应，304时返回由磁盘缓存构造的响应
+        """
+        if self.http_cache is None:
+            response = self._timed_get(url, headers=headers, cookies=cookies, stream=True)
+            self._read_body(response)
+            response.raise_for_status()
+            self._resolve_encoding(response)
+            self._account_page(response)
+            return response
+        
+        validators = self.http_cache.validators(url)
+        request_headers = dict(headers or {}, **validators)
+        response = self._timed_get(url, headers=request_headers, cookies=cookies, stream=True)
+        self._read_body(response)
+        if response.status_code == 304:
+            cached = self.http_cache.load(url)
+            if cached is not None:
+                logger.debug(f"[JinaSum] 页面未修改，使用磁盘缓存: {url}")
+                self._resolve_encoding(cached)
+                self._account_page(cached)
+                return cached
+            # 缓存文件已丢失，重新完整请求
+            response = self._timed_get(url, headers=headers, cookies=cookies, stream=True)
+            self._read_body(response)
+        response.raise_for_status()
+        self._resolve_encoding(response)
+        self.http_cache.store(url, response)
+        self._account_page(response)
+        return response
+
+    def _timed_get(self, url, **kwargs):
+        """使用自适应超时发送GET请求，并记录收到响应头的耗时，连接或等待响应头超时时同样记录
+        
+        Raises:
+            DeadlineExceeded: 本次提取的整体时间已经用完
+        """
+        host = urlparse(url).hostname
+        connect_timeout, read_timeout = self.timeouts.request_timeout(host)
+        try:
+            response = self.http.get(url, timeout=(connect_timeout, read_timeout), **kwargs)
+        except requests.exceptions.ConnectTimeout:
+            self.timeouts.record_timeout(host, "connect", connect_timeout)
+            raise
+        except requests.exceptions.ReadTimeout:
+            self.timeouts.record_timeout(host, "first_byte", read_timeout)
+            raise
+        self.timeouts.record(host, "first_byte", response.elapsed.total_seconds())
+        return response
+
+    def _read_body(self, response):
+        """读取stream=True的响应体，超过响应体超时时间时中止，不等待传输缓慢的页面
+        
+        每读到一块检查一次耗时；完全没有数据时由请求的读取超时中断
+        
+        Raises:
+            requests.exceptions.Timeout: 读取响应体超时
+        """
+        host = urlparse(response.request.url).hostname
+        start = time.time()
+        limit = self.timeouts.timeout(host, "body")
+        chunks = []
+        try:
+            for chunk in response.iter_content(BODY_CHUNK_SIZE):
+                chunks.append(chunk)
+                if time.time() - start > limit:
+                    self.timeouts.record_timeout(host, "body", limit)
+                    raise requests.exceptions.Timeout(f"读取响应体超过{limit:.1f}秒: {response.url}")
+        except Exception:
+            response.close()
+            raise
+        response._content = b"".join(chunks)
+        self.timeouts.record(host, "body", time.time() - start)
+
+    def _resolve_encoding(self, response):
+        """确定页面编码并写入response.encoding，之后读取response.text不再触发整页编码检测"""
+        encoding, source = resolve_encoding(response.headers.get("Content-Type", ""), response.content)
+        response.encoding = encoding
+        logger.debug(f"[JinaSum] 页面编码: {encoding}（{source}）")
+
+    def _account_page(self, response):
+        """按页面实际大小调整当前线程的内存预留：原始字节加上解析树"""
+        self.memory.resize_current(len(response.content) * (1 + TREE_FACTOR))
+
+    def _extract_structured_content(self, html_text):
+        """从页面嵌入的JSON-LD、__NEXT_DATA__、__INITIAL_STATE__等数据中提取文章，质量不足时返回None"""
+        try:
+            article = extract_structured_article(html_text)
+        except Exception as e:
+            logger.debug(f"[JinaSum] 结构化数据提取失败: {str(e)}")
+            return None
+        if article and self._is_good_content(article.content):
+            logger.debug(f"[JinaSum] 从{article.source}结构化数据提取成功，长度: {len(article.content)}")
+            self.profiler.annotate(strategy=f"structured:{article.source}")
+            return article.as_content()
+        return None
+
+    def _is_good_content(self, text, html_length=None):
+        """判断提取的内容质量是否足够，足够时不再尝试更慢的提取方法"""
+        quality = score_content(text, html_length)
+        logger.debug(f"[JinaSum] 内容质量评估: {quality}")
+        return quality.is_good(self.settings.quality_threshold)
+
+    def _create_http_session(self, pool_size=20, on_connect=None):
+        """创建线程间共享的HTTP会话
+        
+        会话不保存服务端下发的Cookie，避免不同请求、不同线程之间相互影响；
+        请求需要的Cookie通过cookies参数按请求传入。传入on_connect时新建连接会报告TCP连接耗时
+        """
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        if on_connect is not None:
+            install_connect_timer(adapter, on_connect)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
     def _get_default_headers(self):
         """获取默认请求头"""
         import random
@@ -1066,19 +1419,31 @@ class JinaSum(Plugin):
             "Sec-Fetch-User": "?1"
         }
 
-    def _process_summary(self, content: str, e_context: EventContext, retry_count: int = 0, skip_notice: bool = False):
-        """处理总结请求"""
+    def _process_summary(self, content: str, e_context: EventContext, retry_count: int = 0, skip_notice: bool = False,
+                         card=None):
+        """处理总结请求
+        
+        Args:
+            content: 文章URL
+            e_context: 事件上下文
+            retry_count: 当前重试次数
+            skip_notice: 是否跳过"正在生成总结"的提示
+            card: 分享卡片信息(ShareCard)，网页提取失败时使用卡片标题和描述兜底
+        """
         try:
             if not self._check_url(content):
                 logger.debug(f"[JinaSum] {content} is not a valid url, skip")
                 return
+            
+            # 直连模式下已经总结过的链接直接回复
+            if self.llm_direct:
+                cached_summary = self.summary_cache.get(html.unescape(content))
+                if cached_summary:
+                    logger.debug(f"[JinaSum] 命中总结缓存: {content}")
+                    e_context["reply"] = Reply(ReplyType.TEXT, cached_summary)
+                    e_context.action = EventAction.BREAK_PASS
+                    return
                 
-            if retry_count == 0 and not skip_notice:
-                logger.debug("[JinaSum] Processing URL: %s" % content)
-                reply = Reply(ReplyType.TEXT, "🎉正在为您生成总结，请稍候...")
-                channel = e_context["channel"]
-                channel.send(reply, e_context["context"])
-
             # 获取网页内容
             target_url = html.unescape(content)
             target_url_content = None
@@ -1086,27 +1451,31 @@ class JinaSum(Plugin):
             # 检查是否包含XML数据（分享消息错误）
             if target_url.startswith("<") and "appmsg" in target_url:
                 logger.warning("[JinaSum] 检测到XML数据而不是URL，尝试提取真实URL")
-                try:
-                    import xml.etree.ElementTree as ET
-                    # 处理可能的XML声明
-                    if target_url.startswith('<?xml'):
-                        target_url = target_url[target_url.find('<msg>'):]
-                    
-                    root = ET.fromstring(target_url)
-                    url_elem = root.find(".//url")
-                    if url_elem is not None and url_elem.text:
-                        target_url = url_elem.text
-                        logger.debug(f"[JinaSum] 从XML中提取到URL: {target_url}")
-                    else:
-                        logger.error("[JinaSum] 无法从XML中提取URL")
-                        raise ValueError("无法从分享卡片中提取URL")
-                except Exception as ex:
-                    logger.error(f"[JinaSum] 解析XML失败: {str(ex)}")
+                card = parse_share_card(target_url)
+                if card is None:
+                    logger.error("[JinaSum] 无法从XML中提取URL")
                     raise ValueError("无法从分享卡片中提取URL")
+                target_url = card.url
+                logger.debug(f"[JinaSum] 从XML中提取到URL: {target_url}")
+            self.profiler.annotate(url=target_url, host=urlparse(target_url).hostname)
             
-            # 使用newspaper3k提取内容
-            logger.debug(f"[JinaSum] 使用newspaper3k提取内容: {target_url}")
-            target_url_content = self._get_content_via_newspaper(target_url)
+            # 先发送预览或"正在生成总结"的提示
+            preview = None
+            if retry_count == 0 and not skip_notice:
+                logger.debug("[JinaSum] Processing URL: %s" % content)
+                preview = self._start_preview(target_url, card, e_context)
+            
+            # 获取文章内容（优先使用缓存），开始回复之前确保提示已经发送；
+            # 视频号等无法抓取的卡片直接使用卡片自带的标题和描述，不发起请求
+            try:
+                if card is not None and not card.fetchable and card.as_content():
+                    logger.info(f"[JinaSum] 分享卡片内容无法抓取，使用卡片描述作为总结内容: {target_url}")
+                    target_url_content = card.as_content()
+                else:
+                    target_url_content = self._get_article_content(target_url)
+            finally:
+                if preview is not None:
+                    self._finish_preview(preview)
             
             # 检查返回的内容是否包含验证提示
             if target_url_content and target_url_content.startswith("⚠️"):
@@ -1117,10 +1486,11 @@ class JinaSum(Plugin):
                 e_context.action = EventAction.BREAK_PASS
                 return
             
-            # 如果newspaper提取失败，直接使用通用提取方法
-            if not target_url_content:
-                logger.debug(f"[JinaSum] newspaper提取失败，直接使用通用提取方法: {target_url}")
-                target_url_content = self._extract_content_general(target_url)
+            # 网页提取失败时，使用分享卡片自带的标题和描述
+            if not target_url_content and card is not None:
+                target_url_content = card.as_content()
+                if target_url_content:
+                    logger.info(f"[JinaSum] 网页提取失败，使用分享卡片描述作为总结内容: {target_url}")
             
             # 如果所有方法都失败
             if not target_url_content:
@@ -1129,16 +1499,18 @@ class JinaSum(Plugin):
                     target_url_content = "这是一个B站视频链接。由于视频内容无法直接提取，请直接点击链接观看视频。"
                 else:
                     raise ValueError("无法提取文章内容")
-                
-            # 清洗内容
-            target_url_content = self._clean_content(target_url_content)
             
             # 限制内容长度
-            target_url_content = target_url_content[:self.max_words]
+            settings = self.settings
+            target_url_content = target_url_content[:settings.max_words]
             logger.debug(f"[JinaSum] Got content length: {len(target_url_content)}")
             
+            # 直连模式：插件直接调用模型并回复，失败时回退到由宿主处理
+            if self.llm_direct and self._reply_with_direct_summary(target_url_content, e_context, url=target_url):
+                return
+            
             # 构造提示词和内容
-            sum_prompt = f"{self.prompt}\n\n'''{target_url_content}'''"
+            sum_prompt = f"{settings.prompt}\n\n'''{target_url_content}'''"
             
             # 修改context内容，使用传递式消息
             e_context['context'].type = ContextType.TEXT
@@ -1152,7 +1524,7 @@ class JinaSum(Plugin):
             
             if retry_count < 3:
                 logger.info(f"[JinaSum] Retrying {retry_count + 1}/3...")
-                return self._process_summary(content, e_context, retry_count + 1, True)
+                return self._process_summary(content, e_context, retry_count + 1, True, card=card)
             
             error_msg = "抱歉，无法获取文章内容。可能是因为:\n"
             error_msg += "1. 文章需要登录或已过期\n"
@@ -1167,21 +1539,345 @@ class JinaSum(Plugin):
             e_context["reply"] = reply
             e_context.action = EventAction.BREAK_PASS
 
+    def _extract_urls(self, text):
+        """提取文本中所有允许总结的链接，去重并保持原有顺序
+        
+        Args:
+            text: 消息文本
+            
+        Returns:
+            list: 最多batch_max_urls个链接
+        """
+        urls = []
+        for url in dict.fromkeys(u.rstrip(".,;:!?") for u in _URL_PATTERN.findall(text)):
+            if self._check_url(url):
+                urls.append(url)
+                if len(urls) >= self.settings.batch_max_urls:
+                    break
+        return urls
+
+    def _process_batch_summary(self, urls, e_context: EventContext):
+        """并发提取多个链接的内容，合并为一个提示词进行总结
+        
+        每个链接仍然使用内容缓存和并发去重；超过batch_timeout仍未完成的链接会被跳过
+        
+        Args:
+            urls: 链接列表
+            e_context: 事件上下文
+        """
+        logger.info(f"[JinaSum] 开始多链接总结，共{len(urls)}个链接")
+        reply = Reply(ReplyType.TEXT, f"🎉正在为您总结{len(urls)}个链接，请稍候...")
+        e_context["channel"].send(reply, e_context["context"])
+        
+        settings = self.settings
+        futures = [self._batch_executor.submit(self._get_article_content, url) for url in urls]
+        done, not_done = wait(futures, timeout=settings.batch_timeout)
+        for future in not_done:
+            future.cancel()
+        if not_done:
+            logger.warning(f"[JinaSum] {len(not_done)}个链接在{settings.batch_timeout}秒内未完成提取，已跳过")
+        
+        articles = []
+        for url, future in zip(urls, futures):
+            if future not in done or future.exception() is not None:
+                continue
+            content = future.result()
+            # 跳过验证提示和提取失败的说明文字
+            if content and not content.startswith("⚠️") and not content.startswith("无法获取"):
+                articles.append((url, content))
+        
+        if not articles:
+            reply = Reply(ReplyType.ERROR, "抱歉，无法获取这些链接的内容，请稍后重试或直接打开链接查看。")
+            e_context["reply"] = reply
+            e_context.action = EventAction.BREAK_PASS
+            return
+        
+        # 按文章数量平分字数限制
+        per_article_words = max(settings.max_words // len(articles), 200)
+        sections = [
+            f"【文章{i}】{url}\n{content[:per_article_words]}"
+            for i, (url, content) in enumerate(articles, 1)
+        ]
+        logger.debug(f"[JinaSum] 多链接总结成功提取{len(articles)}/{len(urls)}篇文章")
+        
+        if self.llm_direct and self._reply_with_direct_summary(
+                "\n\n".join(sections), e_context, prompt=settings.batch_prompt):
+            return
+        
+        sum_prompt = f"{settings.batch_prompt}\n\n'''" + "\n\n".join(sections) + "'''"
+        e_context['context'].type = ContextType.TEXT
+        e_context['context'].content = sum_prompt
+        e_context.action = EventAction.CONTINUE
+
+    def _reply_with_direct_summary(self, target_url_content, e_context: EventContext, url=None, prompt=None):
+        """直连模式：流式调用模型接口生成总结并回复
+        
+        Args:
+            target_url_content: 已截断的文章内容
+            e_context: 事件上下文
+            url: 文章URL，提供时缓存生成的总结
+            prompt: 提示词，默认使用单篇总结提示词
+            
+        Returns:
+            bool: 是否已回复；返回False时调用方应继续交给宿主处理
+        """
+        channel = e_context["channel"]
+        context = e_context["context"]
+        chunk_chars = self.llm_stream_chunk_chars
+        unsent = []  # 上次分段发送之后收到的输出
+        unsent_chars = 0
+        sent = False  # 是否已经分段发送过
+        
+        def send_progress(delta):
+            # 累计足够的新内容后，在收到的换行处切分发送，每次只拼接尚未发送的部分
+            nonlocal unsent_chars, sent
+            unsent_chars += len(delta)
+            cut = delta.rfind("\n") if unsent_chars >= chunk_chars else -1
+            if cut < 0:
+                unsent.append(delta)
+                return
+            unsent.append(delta[:cut])
+            text = "".join(unsent).strip()
+            unsent[:] = [delta[cut:]]
+            unsent_chars = len(delta) - cut
+            if text:
+                channel.send(Reply(ReplyType.TEXT, text), context)
+                sent = True
+        
+        try:
+            result = self.llm.chat(
+                self._get_openai_chat_url(),
+                self._get_openai_headers(),
+                self._get_openai_payload(target_url_content, prompt),
+                on_delta=send_progress if chunk_chars > 0 else None,
+            )
+        except LLMError as e:
+            logger.warning(f"[JinaSum] 直连模型调用失败: {str(e)}")
+            if not sent:
+                return False
+            # 已经发送了部分总结，不再交给宿主重复生成
+            e_context["reply"] = Reply(ReplyType.ERROR, "总结生成中断，请稍后重试")
+            e_context.action = EventAction.BREAK_PASS
+            return True
+        
+        logger.info(f"[JinaSum] 直连模型总结完成，耗时{result.elapsed:.1f}秒，"
+                    f"tokens={result.prompt_tokens}+{result.completion_tokens}{'(估算)' if result.estimated else ''}")
+        if url:
+            self.summary_cache.set(url, result.text)
+        
+        remainder = "".join(unsent).strip() if sent else result.text
+        if remainder:
+            e_context["reply"] = Reply(ReplyType.TEXT, remainder)
+        e_context.action = EventAction.BREAK_PASS
+        return True
+
+    def _start_preview(self, url, card, e_context):
+        """发送总结前的提示
+        
+        启用预览时依次使用分享卡片、内容缓存中的标题和简介，都没有时在后台读取页面<head>，
+        读取完成前不阻塞文章提取；未启用预览或无法生成预览时发送"正在生成总结"
+        
+        Args:
+            url: 文章URL
+            card: 分享卡片信息(ShareCard)，可以为None
+            e_context: 事件上下文
+            
+        Returns:
+            PreviewSender: 开始回复总结前需要交给_finish_preview
+        """
+        channel = e_context["channel"]
+        context = e_context["context"]
+        sender = PreviewSender(lambda text: channel.send(Reply(ReplyType.TEXT, text), context), SUMMARY_NOTICE)
+        settings = self.settings
+        if not settings.preview_enabled:
+            sender.close()
+            return sender
+        
+        text = preview_from_card(card).format() if card is not None else None
+        if text:
+            sender.send(self._format_preview(text), "card")
+            return sender
+        
+        content = self.content_cache.get(url)
+        if content and not content.startswith(("⚠️", "无法获取")):
+            text = preview_from_article(content).format()
+            if text:
+                sender.send(self._format_preview(text), "cache")
+                return sender
+        
+        self._preview_executor.submit(self._fetch_preview, url, sender, settings)
+        return sender
+
+    def _fetch_preview(self, url, sender, settings):
+        """读取页面<head>生成预览，失败或页面没有标题时发送"正在生成总结"
+        
+        Args:
+            url: 文章URL
+            sender: 预览发送状态
+            settings: 配置快照
+        """
+        start = time.time()
+        text = None
+        try:
+            with self.http.get(url, headers=self._get_default_headers(), stream=True,
+                               timeout=settings.preview_timeout) as response:
+                response.raise_for_status()
+                head = read_head(response, settings.preview_head_bytes, deadline=start + settings.preview_timeout)
+                encoding, _ = resolve_encoding(response.headers.get("Content-Type"), head)
+            text = parse_head(head.decode(encoding, errors="replace")).format()
+        except Exception as e:
+            logger.debug(f"[JinaSum] 读取页面预览失败: {url}, {str(e)}")
+        
+        if text and sender.send(self._format_preview(text), "head"):
+            logger.debug(f"[JinaSum] 已发送页面预览, 耗时{time.time() - start:.2f}秒: {url}")
+        else:
+            sender.close()
+
+    def _format_preview(self, text):
+        return f"{text}\n\n⏳ 正在生成总结，请稍候..."
+
+    def _finish_preview(self, sender):
+        """开始回复总结前调用，预览还没有发送时改为发送"正在生成总结"，之后不再发送预览"""
+        sender.close()
+        with self._preview_lock:
+            self._preview_counts[sender.source] += 1
+
+    def _get_article_content(self, url, prefetch=False):
+        """获取清洗后的文章内容，优先读取缓存
+        
+        同一URL的并发请求只会有一个线程真正提取，其余线程等待并共享结果
+        
+        Args:
+            url: 文章URL
+            prefetch: 是否为后台预提取；其他请求使用过的预提取结果在分享淘汰时不再从缓存中移除
+            
+        Returns:
+            str: 清洗后的文章内容，或以"⚠️"开头的验证提示；失败返回None
+        """
+        if not prefetch and url in self._prefetch_owned:
+            with self._prefetch_lock:
+                self._prefetch_owned.discard(url)
+        content = self.content_cache.get(url)
+        if content is not None:
+            logger.debug(f"[JinaSum] 命中内容缓存: {url}")
+            self.profiler.annotate(strategy="cache")
+            return content
+        return self._inflight.do(url, lambda: self._extract_article(url))
+
+    def _extract_article(self, url):
+        """依次使用newspaper3k和通用方法提取文章，成功后清洗并写入缓存"""
+        # 预留页面和解析树的内存，预算不足时排队，提取结束后立即归还
+        # 所有提取方法共用整体时间，各次请求的超时不超过剩余时间
+        with self.memory.reserve(self.memory.estimate(self.page_reserve_bytes)), \
+                self.timeouts.deadline(self.fetch_deadline):
+            try:
+                # 优先使用站点专用提取规则
+                self.profiler.annotate(strategy="site")
+                strategy = "site"
+                # 站点规则已下载页面但选择器未命中时，后续方法直接解析这份页面
+                content, html_text = self._extract_with_site_extractor(url)
+                
+                # 使用newspaper3k提取内容
+                if not content:
+                    self.timeouts.check_deadline()
+                    logger.debug(f"[JinaSum] 使用newspaper3k提取内容: {url}")
+                    self.profiler.annotate(strategy="newspaper")
+                    strategy = "newspaper"
+                    content = self._get_content_via_newspaper(url, html_text=html_text)
+                
+                # 验证提示直接返回给用户，不缓存
+                if content and content.startswith("⚠️"):
+                    return content
+                
+                # 如果newspaper提取失败，直接使用通用提取方法
+                if not content:
+                    self.timeouts.check_deadline()
+                    logger.debug(f"[JinaSum] newspaper提取失败，直接使用通用提取方法: {url}")
+                    strategy = "general"
+                    content = self._extract_content_general(url, html_text=html_text)
+            except ExtractionUnavailable as e:
+                logger.info(f"[JinaSum] {str(e)}，不再下载页面: {url}")
+                return None
+            except DeadlineExceeded:
+                logger.warning(f"[JinaSum] 提取超过{self.fetch_deadline}秒，不再尝试其他方法: {url}")
+                return None
+        
+        if not content:
+            return None
+        
+        # 清洗内容
+        content = self._clean_content(content)
+        
+        # 提取失败的说明文字不缓存，下次仍然重新尝试
+        if not content.startswith("无法获取"):
+            self.content_cache.set(url, content, strategy=strategy)
+        return content
+
     def get_help_text(self, verbose, **kwargs):
         help_text = "网页内容总结插件:\n"
         help_text += "1. 发送「总结 网址」可以总结指定网页的内容\n"
         help_text += "2. 单聊时分享消息会自动总结\n"
-        if self.auto_sum:
+        settings = self.settings
+        if settings.auto_sum:
             help_text += "3. 群聊中分享消息默认自动总结"
-            if self.black_group_list:
+            if settings.black_group_list:
                 help_text += "（部分群组需要发送含「总结」的消息触发）\n"
             else:
                 help_text += "\n"
         else:
             help_text += "3. 群聊中收到分享消息后，发送包含「总结」的消息即可触发总结\n"
+        help_text += "4. 群聊中发送「总结2」可以总结倒数第2条分享\n"
         help_text += "注：群聊中的分享消息的总结请求需要在60秒内发出"
         return help_text
 
+    def _with_defaults(self, config):
+        """补全缺少的配置项"""
+        merged = dict(config)
+        for key, default_value in self.DEFAULT_CONFIG.items():
+            if key not in merged:
+                merged[key] = default_value
+        return merged
+
+    def _reload_config(self, config):
+        """应用修改后的config.json，校验失败时保留当前配置
+        
+        Args:
+            config: 从文件读取的配置
+        """
+        config = self._with_defaults(config)
+        # 需要重启的配置项保持启动时的值，使self.config与正在使用的连接池、缓存等一致
+        changed = [key for key in RESTART_REQUIRED_KEYS if config.get(key) != self._startup_config.get(key)]
+        for key in changed:
+            if key in self._startup_config:
+                config[key] = self._startup_config[key]
+            else:
+                config.pop(key, None)
+        try:
+            settings = build_snapshot(config)
+        except ValueError as e:
+            logger.error(f"[JinaSum] 新配置无效，继续使用当前配置: {str(e)}")
+            return
+        
+        if changed:
+            logger.warning(f"[JinaSum] 以下配置需要重启后生效: {', '.join(changed)}")
+        
+        # 整体替换快照，正在处理的消息继续使用旧快照
+        self.config = config
+        self.settings = settings
+        self.profiler.configure(**self._profiler_options(config))
+        logger.info("[JinaSum] 配置已重新加载")
+
+    def _profiler_options(self, config):
+        """由配置生成慢请求采样参数"""
+        return {
+            "directory": config.get("profile_dir") or os.path.join(self.state_dir, "profiles"),
+            "enabled": config.get("profile_enabled", False),
+            "threshold": config.get("profile_threshold", 15),
+            "sample_rate": config.get("profile_sample_rate", 0.0),
+            "interval": config.get("profile_interval_ms", 10) / 1000,
+            "max_files": config.get("profile_max_files", 50),
+        }
+
     def _load_config_template(self):
         """加载配置模板"""
         try:
@@ -1198,23 +1894,27 @@ class JinaSum(Plugin):
 
     def _get_openai_headers(self):
         """获取openai的header"""
-        config = super().get_config()
+        api_key = self.settings.open_ai_api_key or super().get_config().get('openai_api_key')
         return {
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {config.get('openai_api_key')}"
+            "Authorization": f"Bearer {api_key}"
         }
 
-    def _get_openai_payload(self, target_url_content):
+    def _get_openai_payload(self, target_url_content, prompt=None):
         """构造openai的payload
         
         Args:
             target_url_content: 网页内容
+            prompt: 提示词，默认使用单篇总结提示词
         """
-        sum_prompt = f"{self.prompt}\n\n'''{target_url_content}'''"
+        sum_prompt = f"{prompt or self.settings.prompt}\n\n'''{target_url_content}'''"
         messages = [{"role": "user", "content": sum_prompt}]
         payload = {
             'model': self.open_ai_model,
-            'messages': messages
+            'messages': messages,
+            'stream': True,
+            # 流式输出的最后一段返回token用量，不支持的接口会忽略
+            'stream_options': {'include_usage': True},
         }
         return payload
 
@@ -1230,60 +1930,12 @@ class JinaSum(Plugin):
         stripped_url = target_url.strip()
         logger.debug(f"[JinaSum] 检查URL: {stripped_url}")
         
-        # 简单校验是否是url
-        if not stripped_url.startswith("http://") and not stripped_url.startswith("https://"):
-            logger.debug("[JinaSum] URL不以http://或https://开头，跳过")
+        # 跳过模式、白名单和黑名单均已预先构建，一次检查完成
+        reason = self.settings.url_policy.check(stripped_url)
+        if reason:
+            logger.debug(f"[JinaSum] {reason}，跳过")
             return False
 
-        # 检测一些常见的不适合总结的内容类型
-        skip_patterns = [
-            # 视频/音乐平台的非文章内容
-            r"(bilibili\.com|b23\.tv).*/video/", # B站视频
-            r"(youtube\.com|youtu\.be)/watch", # YouTube视频
-            r"(music\.163\.com|y\.qq\.com)/(song|playlist|album)", # 音乐
-            
-            # 文件链接
-            r"\.(pdf|doc|docx|ppt|pptx|xls|xlsx|zip|rar|7z)(\?|$)", # 文档和压缩包
-            
-            # 图片链接
-            r"\.(jpg|jpeg|png|gif|bmp|webp|svg)(\?|$)", # 图片
-            
-            # 地图
-            r"(map\.(baidu|google|qq)\.com)", # 地图
-            
-            # 工具类
-            r"(docs\.qq\.com|shimo\.im|yuque\.com|notion\.so)", # 在线文档
-            
-            # 社交媒体特定内容
-            r"weixin\.qq\.com/[^/]+/([^/]+/){2,}",  # 微信小程序或其他功能
-            r"(weibo\.com|t\.cn)/[^/]+/[^/]+",  # 微博
-            
-            # 商城商品
-            r"(taobao\.com|tmall\.com|jd\.com)/.*?(item|product)",  # 电商商品
-            
-            # 小程序
-            r"servicewechat\.com"  # 微信小程序
-        ]
-        
-        # 使用正则表达式检查
-        import re
-        for pattern in skip_patterns:
-            if re.search(pattern, stripped_url, re.IGNORECASE):
-                logger.debug(f"[JinaSum] URL匹配跳过模式: {pattern}")
-                return False
-
-        # 检查白名单
-        if len(self.white_url_list):
-            if not any(stripped_url.startswith(white_url) for white_url in self.white_url_list):
-                logger.debug("[JinaSum] URL不在白名单中")
-                return False
-
-        # 排除黑名单，黑名单优先级>白名单
-        for black_url in self.black_url_list:
-            if stripped_url.startswith(black_url):
-                logger.debug(f"[JinaSum] URL在黑名单中: {black_url}")
-                return False
-
         logger.debug("[JinaSum] URL检查通过")
         return True
 
@@ -1300,61 +1952,8 @@ class JinaSum(Plugin):
         original_length = len(content)
         logger.debug(f"[JinaSum] Original content length: {original_length}")
         
-        # 移除Markdown图片标签
-        content = re.sub(r'!\[.*?\]\(.*?\)', '', content)
-        content = re.sub(r'\[!\[.*?\]\(.*?\)', '', content)  # 嵌套图片标签
-        
-        # 移除图片描述 (通常在方括号或特定格式中)
-        content = re.sub(r'\[图片\]|\[image\]|\[img\]|\[picture\]', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'\[.*?图片.*?\]', '', content)
-        
-        # 移除阅读时间、字数等元数据
-        content = re.sub(r'本文字数：\d+，阅读时长大约\d+分钟', '', content)
-        content = re.sub(r'阅读时长[:：].*?分钟', '', content)
-        content = re.sub(r'字数[:：]\d+', '', content)
-        
-        # 移除日期标记和时间戳
-        content = re.sub(r'\d{4}[\.年/-]\d{1,2}[\.月/-]\d{1,2}[日号]?(\s+\d{1,2}:\d{1,2}(:\d{1,2})?)?', '', content)
-        
-        # 移除分隔线
-        content = re.sub(r'\*\s*\*\s*\*', '', content)
-        content = re.sub(r'-{3,}', '', content)
-        content = re.sub(r'_{3,}', '', content)
-        
-        # 移除网页中常见的广告标记
-        ad_patterns = [
-            r'广告\s*[\.。]?', 
-            r'赞助内容', 
-            r'sponsored content',
-            r'advertisement',
-            r'promoted content',
-            r'推广信息',
-            r'\[广告\]',
-            r'【广告】',
-        ]
-        for pattern in ad_patterns:
-            content = re.sub(pattern, '', content, flags=re.IGNORECASE)
-        
-        # 移除URL链接和空的Markdown链接
-        content = re.sub(r'https?://\S+', '', content)
-        content = re.sub(r'www\.\S+', '', content)
-        content = re.sub(r'\[\]\(.*?\)', '', content)  # 空链接引用 [](...)
-        content = re.sub(r'\[.+?\]\(\s*\)', '', content)  # 有文本无链接 [text]()
-        
-        # 清理Markdown格式但保留文本内容
-        content = re.sub(r'\*\*(.+?)\*\*', r'\1', content)  # 移除加粗标记但保留内容
-        content = re.sub(r'\*(.+?)\*', r'\1', content)      # 移除斜体标记但保留内容
-        content = re.sub(r'`(.+?)`', r'\1', content)        # 移除代码标记但保留内容
-        
-        # 清理文章尾部的"微信编辑"和"推荐阅读"等无关内容
-        content = re.sub(r'\*\*微信编辑\*\*.*?$', '', content, flags=re.MULTILINE)
-        content = re.sub(r'\*\*推荐阅读\*\*.*?$', '', content, flags=re.MULTILINE | re.DOTALL)
-        
-        # 清理多余的空白字符
-        content = re.sub(r'\n{3,}', '\n\n', content)  # 移除多余空行
-        content = re.sub(r'\s{2,}', ' ', content)     # 移除多余空格
-        content = re.sub(r'^\s+', '', content, flags=re.MULTILINE)  # 移除行首空白
-        content = re.sub(r'\s+$', '', content, flags=re.MULTILINE)  # 移除行尾空白
+        # 清洗规则为纯正则替换，启用进程池时在子进程中执行
+        content = self.extract_pool.run(clean_content, content, self.settings.clean_patterns)
         
         # 记录清洗后长度
         cleaned_length = len(content)
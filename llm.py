@@ -0,0 +1,142 @@
+# encoding:utf-8
+import json
+import threading
+import time
+from typing import NamedTuple
+
+
+class LLMError(Exception):
+    """直连模型调用失败，调用方应回退到由宿主处理"""
+
+
+class ChatResult(NamedTuple):
+    """一次流式对话的结果"""
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+    estimated: bool  # 接口未返回usage时按字符数估算
+    elapsed: float
+
+
+class StreamingChatClient:
+    """OpenAI兼容接口的流式调用
+
+    - 复用传入的HTTP会话（长连接连接池），以stream=true请求，逐行解析SSE
+    - 连接/读取超时之外还有整体超时，流式输出过慢时中止
+    - 并发请求数受信号量限制，等待超过acquire_timeout时放弃
+    - 累计请求数、失败数和token用量，供监控使用
+    """
+
+    def __init__(self, session, timeout=60, connect_timeout=10, max_concurrency=4, acquire_timeout=30):
+        self.session = session
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.acquire_timeout = acquire_timeout
+        self._semaphore = threading.BoundedSemaphore(max(1, int(max_concurrency)))
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "failures": 0,
+            "busy": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "estimated_requests": 0,
+            "total_seconds": 0.0,
+        }
+
+    def chat(self, url, headers, payload, on_delta=None):
+        """发送流式对话请求并等待完成
+
+        Args:
+            url: chat/completions接口地址
+            headers: 请求头
+            payload: 请求体，会强制设置stream=true
+            on_delta: 可选回调，每收到一段输出时以这段新增的文本调用，需要累计时由回调自行保存
+
+        Returns:
+            ChatResult: 完整输出和token用量
+
+        Raises:
+            LLMError: 并发已满、超时、接口错误或返回内容为空
+        """
+        if not self._semaphore.acquire(timeout=self.acquire_timeout):
+            self._count("busy")
+            raise LLMError("模型调用并发已满")
+        try:
+            return self._chat(url, headers, dict(payload, stream=True), on_delta)
+        except LLMError:
+            self._count("failures")
+            raise
+        except Exception as e:
+            self._count("failures")
+            raise LLMError(str(e))
+        finally:
+            self._semaphore.release()
+
+    def _chat(self, url, headers, payload, on_delta):
+        started = time.time()
+        deadline = started + self.timeout
+        parts = []
+        usage = None
+        with self.session.post(url, headers=headers, json=payload, stream=True,
+                               timeout=(self.connect_timeout, self.timeout)) as response:
+            if response.status_code != 200:
+                raise LLMError(f"接口返回{response.status_code}: {response.text[:200]}")
+            done = False
+            # [DONE]之后继续读到响应结束，连接才能放回连接池复用
+            for line in response.iter_lines():
+                if time.time() > deadline:
+                    raise LLMError(f"模型输出超过{self.timeout}秒")
+                if done or not line or not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    done = True
+                    continue
+                chunk = json.loads(data)
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+                for choice in chunk.get("choices") or ():
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        parts.append(delta)
+                        if on_delta is not None:
+                            on_delta(delta)
+
+        text = "".join(parts).strip()
+        if not text:
+            raise LLMError("模型返回内容为空")
+
+        if usage:
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+            estimated = False
+        else:
+            prompt_tokens = estimate_tokens(json.dumps(payload.get("messages", []), ensure_ascii=False))
+            completion_tokens = estimate_tokens(text)
+            estimated = True
+
+        elapsed = time.time() - started
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["prompt_tokens"] += prompt_tokens
+            self._stats["completion_tokens"] += completion_tokens
+            self._stats["estimated_requests"] += int(estimated)
+            self._stats["total_seconds"] += elapsed
+        return ChatResult(text, prompt_tokens, completion_tokens, estimated, elapsed)
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["total_seconds"] = round(stats["total_seconds"], 3)
+        return stats
+
+
+def estimate_tokens(text):
+    """粗略估算token数：中文约每字1个token，其他字符约每4个1个token"""
+    cjk = sum(1 for ch in text if "一" <= ch <= "鿿")
+    return cjk + (len(text) - cjk + 3) // 4
@@ -0,0 +1,421 @@
+# encoding:utf-8
+"""on_handle_context 流量回放与压测工具
+
+在宿主项目根目录下运行，不访问外部网络：
+
+    python -m plugins.jina_sum.loadgen --events 500 --rate 50
+    python -m plugins.jina_sum.loadgen --record traffic.jsonl --events 1000
+    python -m plugins.jina_sum.loadgen --replay traffic.jsonl --auto-sum both --llm-direct
+    python -m plugins.jina_sum.loadgen --check-dedup
+
+文章页面和模型接口由本地的固定内容服务代替；流量文件为JSONL，每行一条消息，
+内容中的{base}在回放时替换为本地服务地址。
+"""
+import argparse
+import json
+import logging
+import random
+import socketserver
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from bridge.context import Context, ContextType
+from bridge.reply import Reply, ReplyType
+from common.log import logger
+from plugins import Event, EventAction, EventContext
+
+from .jina_sum import JinaSum
+
+# 默认的消息构成比例
+DEFAULT_MIX = {
+    "private_url": 0.15,  # 私聊发送链接
+    "private_card": 0.05,  # 私聊分享卡片
+    "group_share": 0.25,  # 群聊分享
+    "group_card": 0.05,  # 群聊XML分享卡片
+    "group_trigger": 0.15,  # 群聊"总结"指令
+    "group_direct": 0.05,  # 群聊"总结 链接"
+    "group_digest": 0.05,  # 群聊多链接消息
+    "chatter": 0.25,  # 与插件无关的聊天
+}
+
+_CHATTER = ("好的", "哈哈哈", "晚上一起吃饭吗", "收到，谢谢", "[捂脸]", "明天几点开会？", "这个我看过了")
+
+_CARD_TEMPLATE = (
+    "<?xml version=\"1.0\"?><msg><appmsg appid=\"\" sdkver=\"0\"><title>测试文章{article}</title>"
+    "<des>这是测试文章{article}的摘要</des><type>5</type><url>{{base}}/article/{article}</url>"
+    "<appattach><cdnthumbaeskey /></appattach></appmsg><appinfo><appname>测试应用</appname></appinfo></msg>"
+)
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.count("page", self.path)
+        if not self.path.startswith("/article/"):
+            self._send(404, b"not found", "text/plain")
+            return
+        time.sleep(server.page_delay * random.uniform(0.5, 1.5))
+        article = self.path.rsplit("/", 1)[-1]
+        paragraphs = "".join(
+            f"<p>这是测试文章{article}的第{i}段内容，用于压测插件的提取、清洗和调度流程。"
+            f"段落需要足够长，才能通过正文质量检查，不会触发更慢的提取方式。</p>"
+            for i in range(server.paragraphs)
+        )
+        body = (f"<html><head><meta charset=\"utf-8\"><title>测试文章{article}</title></head><body>"
+                f"<nav>首页 | 关于</nav><article><h1>测试文章{article}</h1>{paragraphs}</article>"
+                f"<footer>版权所有</footer></body></html>").encode("utf-8")
+        self._send(200, body, "text/html; charset=utf-8")
+
+    def do_POST(self):
+        server = self.server
+        server.count("llm")
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        pieces = ["📖 一句话总结\n测试文章的总结。\n\n", "🔑 关键要点\n1. 要点一\n2. 要点二\n\n", "🏷 #测试 #压测"]
+        for piece in pieces:
+            time.sleep(server.llm_delay / len(pieces))
+            chunk = {"choices": [{"delta": {"content": piece}}]}
+            self._write_chunk(b"data: " + json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\n\n")
+        self._write_chunk(b'data: {"choices":[],"usage":{"prompt_tokens":1000,"completion_tokens":50}}\n\n')
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureServer(socketserver.ThreadingMixIn, HTTPServer):
+    """本地固定内容服务：GET /article/<id> 返回文章页面，POST 任意路径返回流式模型输出"""
+    daemon_threads = True
+
+    def __init__(self, page_delay=0.05, llm_delay=0.5, paragraphs=30):
+        super().__init__(("127.0.0.1", 0), _FixtureHandler)
+        self.page_delay = page_delay
+        self.llm_delay = llm_delay
+        self.paragraphs = paragraphs
+        self.requests = Counter()
+        self.pages = Counter()  # 路径 -> GET次数
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, name="JinaSumFixture", daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, kind, path=None):
+        with self._lock:
+            self.requests[kind] += 1
+            if path is not None:
+                self.pages[path] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StubMessage:
+    """代替宿主ChatMessage，只包含插件使用的字段"""
+
+    def __init__(self, chat_id, is_group, nickname):
+        self.from_user_id = chat_id
+        self.from_user_nickname = nickname
+        self.other_user_id = chat_id
+        self.is_group = is_group
+        self.actual_user_id = "loadgen_user"
+        self.actual_user_nickname = "压测用户"
+
+
+class RecordingChannel:
+    """代替宿主通道，记录插件主动发送的消息"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent = Counter()
+
+    def send(self, reply, context):
+        with self._lock:
+            self.sent[reply.type.name if reply.type else "NONE"] += 1
+
+
+def generate_traffic(count, mix=None, groups=20, users=50, articles=200, seed=None):
+    """按比例生成消息序列
+
+    Args:
+        count: 消息数量
+        mix: 各类消息的比例，默认DEFAULT_MIX
+        groups: 群聊数量
+        users: 私聊用户数量
+        articles: 文章数量，数量越少缓存命中越多
+        seed: 随机种子，相同种子生成相同序列
+
+    Returns:
+        list: 消息字典列表
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    kinds, weights = zip(*mix.items())
+    events = []
+    for _ in range(count):
+        kind = rng.choices(kinds, weights)[0]
+        # 热门文章被多次分享，用于触发缓存和并发去重
+        article = min(int(rng.paretovariate(1.2)), articles)
+        url = f"{{base}}/article/{article}"
+        if kind.startswith("private"):
+            chat_id = f"user{rng.randrange(users)}"
+            is_group, nickname = False, chat_id
+        else:
+            group = rng.randrange(groups)
+            chat_id, is_group, nickname = f"group{group}@chatroom", True, f"测试群{group}"
+        event = {"kind": kind, "chat_id": chat_id, "is_group": is_group, "nickname": nickname, "type": "TEXT"}
+        if kind == "private_url":
+            event["content"] = url
+        elif kind in ("private_card", "group_card"):
+            event["content"] = _CARD_TEMPLATE.format(article=article)
+        elif kind == "group_share":
+            event["type"] = "SHARING"
+            event["content"] = url
+        elif kind == "group_trigger":
+            event["content"] = rng.choice(("总结", "总结", "@机器人 总结", "总结2"))
+        elif kind == "group_direct":
+            event["content"] = f"总结 {url}"
+        elif kind == "group_digest":
+            event["content"] = "今日新闻：\n" + "\n".join(
+                f"{i}. {{base}}/article/{rng.randrange(1, articles)}" for i in range(1, 4))
+        else:
+            event["content"] = rng.choice(_CHATTER)
+        events.append(event)
+    return events
+
+
+def save_traffic(events, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+
+def load_traffic(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _dispatch(plugin, event, base_url, channel, planned):
+    started = time.perf_counter()
+    content = event["content"].replace("{base}", base_url)
+    context = Context(ContextType[event["type"]], content,
+                      {"msg": StubMessage(event["chat_id"], event["is_group"], event["nickname"])})
+    e_context = EventContext(Event.ON_HANDLE_CONTEXT, {"channel": channel, "context": context, "reply": Reply()})
+    try:
+        plugin.on_handle_context(e_context)
+        reply = e_context["reply"]
+        if e_context.action == EventAction.BREAK_PASS:
+            outcome = reply.type.name if reply and reply.type else "BREAK_PASS"
+        elif context.content != content and context.type == ContextType.TEXT:
+            outcome = "TO_HOST"  # 提示词已改写，交给宿主调用模型
+        else:
+            outcome = "IGNORED"
+    except Exception as e:
+        logger.warning(f"[JinaSum] 压测消息处理异常: {event['kind']}, {str(e)}")
+        outcome = "EXCEPTION"
+    finished = time.perf_counter()
+    return event["kind"], started - planned, finished - started, outcome
+
+
+def replay(plugin, events, base_url, rate=20.0, concurrency=32):
+    """按目标速率把消息送入on_handle_context
+
+    每条消息在独立线程中处理，与宿主一样同步等待钩子返回
+
+    Returns:
+        dict: 吞吐量、钩子耗时分布、排队时间和结果统计
+    """
+    channel = RecordingChannel()
+    futures = []
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="JinaSumLoadgen") as executor:
+        start = time.perf_counter()
+        for i, event in enumerate(events):
+            planned = start + i / rate
+            delay = planned - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(_dispatch, plugin, event, base_url, channel, planned))
+        results = [future.result() for future in futures]
+    duration = time.perf_counter() - start
+
+    latency = defaultdict(list)
+    outcomes = Counter()
+    for kind, _, elapsed, outcome in results:
+        latency[kind].append(elapsed)
+        latency["all"].append(elapsed)
+        outcomes[outcome] += 1
+    errors = outcomes["EXCEPTION"] + outcomes[ReplyType.ERROR.name]
+    return {
+        "events": len(results),
+        "duration": round(duration, 3),
+        "target_rate": rate,
+        "throughput": round(len(results) / duration, 2) if duration else 0.0,
+        "latency_ms": {kind: _distribution(values) for kind, values in sorted(latency.items())},
+        "queueing_ms": _distribution([lag for _, lag, _, _ in results]),
+        "outcomes": dict(outcomes),
+        "error_rate": round(errors / len(results), 4) if results else 0.0,
+        "channel_sends": dict(channel.sent),
+    }
+
+
+def check_duplicate_fetches(plugin, fixture, articles=5, copies=20, concurrency=32):
+    """同时发送大量指向少数几篇文章的私聊链接，检查每篇文章只从固定内容服务获取一次
+
+    覆盖钩子线程之间共享的内容缓存和同一链接并发提取的去重
+
+    Args:
+        plugin: 插件实例
+        fixture: 固定内容服务
+        articles: 文章数量
+        copies: 每篇文章发送的次数，每次来自不同的私聊
+
+    Returns:
+        dict: 文章路径 -> 获取次数
+
+    Raises:
+        AssertionError: 有文章被重复获取或没有获取，或有消息处理失败
+    """
+    events = [
+        {"kind": "private_url", "chat_id": f"dedup_user{i}", "is_group": False, "nickname": f"dedup_user{i}",
+         "type": "TEXT", "content": f"{{base}}/article/dedup{i % articles}"}
+        for i in range(articles * copies)
+    ]
+    report = replay(plugin, events, fixture.base_url, rate=len(events), concurrency=concurrency)
+    fetched = {path: count for path, count in fixture.pages.items() if "/dedup" in path}
+    duplicates = {path: count for path, count in fetched.items() if count > 1}
+    assert report["error_rate"] == 0, f"消息处理失败: {report['outcomes']}"
+    assert len(fetched) == articles, f"只获取了{len(fetched)}篇文章: {fetched}"
+    assert not duplicates, f"文章被重复获取: {duplicates}"
+    return fetched
+
+
+def _distribution(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def at(q):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 1)
+
+    return {"count": len(ordered), "p50": at(0.5), "p90": at(0.9), "p99": at(0.99), "max": at(1.0)}
+
+
+def create_plugin(fixture, llm_direct=False, auto_sum=True):
+    """创建指向本地固定内容服务的插件实例
+
+    使用默认配置，不读取插件目录下的config.json：不连接共享缓存、不轮询订阅、不使用页面磁盘缓存、
+    不监视配置文件，超时统计、压缩字典和采样结果写入临时目录；llm_direct时模型请求发往固定内容服务
+    """
+    config = dict(
+        JinaSum.DEFAULT_CONFIG,
+        auto_sum=auto_sum,
+        http_cache_enabled=False,
+        feed_urls=[],
+        shared_cache="",
+        config_reload_interval=0,
+        llm_direct=llm_direct,
+        open_ai_api_base=fixture.base_url + "/v1" if llm_direct else "",
+        open_ai_api_key="loadgen" if llm_direct else "",
+    )
+    return JinaSum(config=config, state_dir=tempfile.mkdtemp(prefix="jina_sum_loadgen_"))
+
+
+def _print_report(name, report):
+    print(f"== {name}: {report['events']}条消息, {report['duration']}秒, "
+          f"吞吐量 {report['throughput']}/s (目标 {report['target_rate']}/s), 错误率 {report['error_rate']:.2%}")
+    print(f"   排队(ms): {report['queueing_ms']}")
+    for kind, dist in report["latency_ms"].items():
+        print(f"   {kind:<14} {dist}")
+    print(f"   结果: {report['outcomes']}  主动发送: {report['channel_sends']}")
+    scheduler = report["plugin"]["scheduler"]
+    for priority in ("private", "trigger", "auto"):
+        print(f"   调度[{priority}]: {scheduler[priority]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JinaSum on_handle_context 流量回放与压测")
+    parser.add_argument("--events", type=int, default=300, help="生成的消息数量")
+    parser.add_argument("--rate", type=float, default=20.0, help="目标速率（条/秒）")
+    parser.add_argument("--concurrency", type=int, default=32, help="同时处理消息的线程数")
+    parser.add_argument("--seed", type=int, default=1, help="生成消息的随机种子")
+    parser.add_argument("--replay", help="回放的流量文件(JSONL)，不指定时生成")
+    parser.add_argument("--record", help="把生成的流量保存到文件")
+    parser.add_argument("--auto-sum", choices=("on", "off", "both"), default="both", help="群聊自动总结")
+    parser.add_argument("--llm-direct", action="store_true", help="使用直连模式，模型请求发往本地服务")
+    parser.add_argument("--page-delay", type=float, default=0.05, help="本地页面的平均响应时间（秒）")
+    parser.add_argument("--llm-delay", type=float, default=0.5, help="本地模型接口的平均输出时间（秒）")
+    parser.add_argument("--check-dedup", action="store_true", help="只检查并发消息中同一文章是否被重复获取")
+    parser.add_argument("--json", help="把完整报告写入JSON文件")
+    parser.add_argument("--verbose", action="store_true", help="保留插件的INFO日志")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logger.setLevel(logging.WARNING)
+
+    events = load_traffic(args.replay) if args.replay else generate_traffic(args.events, seed=args.seed)
+    if args.record:
+        save_traffic(events, args.record)
+
+    fixture = FixtureServer(page_delay=args.page_delay, llm_delay=args.llm_delay).start()
+    if args.check_dedup:
+        plugin = create_plugin(fixture)
+        try:
+            fetched = check_duplicate_fetches(plugin, fixture, concurrency=args.concurrency)
+            print(f"== 并发去重检查通过: {fetched}")
+        finally:
+            plugin.extract_pool.shutdown()
+            fixture.stop()
+        return fetched
+
+    reports = {}
+    try:
+        for auto_sum in ((True, False) if args.auto_sum == "both" else (args.auto_sum == "on",)):
+            # 每轮使用新的插件实例，缓存和调度统计互不影响
+            plugin = create_plugin(fixture, llm_direct=args.llm_direct, auto_sum=auto_sum)
+            name = f"auto_sum={'on' if auto_sum else 'off'}"
+            report = replay(plugin, events, fixture.base_url, rate=args.rate, concurrency=args.concurrency)
+            report["plugin"] = plugin.get_metrics()
+            report["fixture_requests"] = dict(fixture.requests)
+            reports[name] = report
+            _print_report(name, report)
+            plugin.extract_pool.shutdown()
+            fixture.requests.clear()
+            fixture.pages.clear()
+    finally:
+        fixture.stop()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+    return reports
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+# encoding:utf-8
+import ctypes
+import os
+import threading
+import time
+from collections import deque
+
+# 解析树占用的内存约为页面字节数的倍数（BeautifulSoup/lxml树、newspaper的Article对象），
+# 按实测newspaper约13倍、BeautifulSoup约20倍取较大值
+TREE_FACTOR = 20
+
+# 启用内存预算时，内容缓存最多占用预算的比例
+CACHE_SHARE = 0.25
+
+# 释放的预留达到这个大小时把空闲内存归还给系统
+TRIM_MIN_BYTES = 8 * 1024 * 1024
+
+# 两次归还内存的最小间隔（秒）
+TRIM_INTERVAL = 1.0
+
+# 估计新预留大小时参考最近这么多次调整后的实际大小
+_RECENT_SIZES = 50
+
+
+def _load_malloc_trim():
+    """glibc的malloc_trim，非glibc环境返回None
+
+    解析在多个钩子线程中进行，glibc为每个线程分配独立的arena，解析树释放后内存留在各自的arena中，
+    不会被其他线程复用，常驻内存随线程数持续上涨；malloc_trim把所有arena中的空闲页归还给系统
+    """
+    try:
+        trim = ctypes.CDLL("libc.so.6").malloc_trim
+    except (OSError, AttributeError):
+        return None
+    trim.argtypes = [ctypes.c_size_t]
+    trim.restype = ctypes.c_int
+    return trim
+
+
+_MALLOC_TRIM = _load_malloc_trim()
+
+
+class MemoryBudgetExceeded(Exception):
+    """在等待时间内没有足够的内存预算"""
+
+
+class Reservation:
+    """一次内存预留，使用with语句在阶段结束时释放"""
+    __slots__ = ("budget", "nbytes", "released")
+
+    def __init__(self, budget, nbytes):
+        self.budget = budget
+        self.nbytes = nbytes
+        self.released = False
+
+    def resize(self, nbytes):
+        """得知实际大小后调整预留量，变小时立即归还，变大时预算不足会等待"""
+        self.budget._resize(self, nbytes)
+
+    def release(self):
+        self.budget._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class MemoryBudget:
+    """全局内存预算
+
+    按字节统计正在处理的页面、解析树，以及各缓存当前占用的内存：
+    - 开始处理页面前预留估计大小（配置的估计值和最近页面实际大小的较大者），预算不足时排队等待，阶段结束后立即归还
+    - 页面下载完成后、解析之前按实际字节数调整预留量，需要更多预算时同样等待；
+      所有持有预留的任务都在等待扩大时只放行其中一个超出预算，它释放后再放行下一个，避免相互等待
+    - 缓存通过add_source登记当前占用，计入总用量
+    - 较大的预留释放后调用malloc_trim把空闲内存归还给系统，常驻内存随预算回落
+    - max_bytes为0时不限制，只做统计
+
+    单个预留超过总预算时按总预算计算，保证在没有其他任务时仍能执行
+    """
+
+    def __init__(self, max_bytes=0):
+        self.max_bytes = max(0, int(max_bytes))
+        self._cond = threading.Condition()
+        self._reserved = 0
+        self._peak = 0
+        self._waiting = 0
+        self._holders = 0  # 未释放的预留数量
+        self._growing = 0  # 等待扩大预留的数量
+        self._overdrawn = None  # 因相互等待而放行、超出预算的预留，同一时间只有一个
+        self._trimmed_at = 0.0
+        self._trims = 0
+        self._recent = deque(maxlen=_RECENT_SIZES)  # 最近调整后的实际预留大小
+        self._queued_total = 0
+        self._wait_seconds = 0.0
+        self._sources = {}  # name -> 返回当前占用字节数的函数
+        self._local = threading.local()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def add_source(self, name, fn):
+        """登记一个内存占用来源，如内容缓存"""
+        self._sources[name] = fn
+
+    def reserve(self, nbytes, timeout=None):
+        """预留内存，预算不足时等待
+
+        Args:
+            nbytes: 预留的字节数
+            timeout: 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            Reservation: 预留凭证，同一线程中最近的预留可通过current()获取
+
+        Raises:
+            MemoryBudgetExceeded: 超过timeout仍没有足够预算
+        """
+        nbytes = int(nbytes)
+        if self.max_bytes:
+            nbytes = min(nbytes, self.max_bytes)
+        with self._cond:
+            if self.max_bytes and not self._fits(nbytes):
+                deadline = None if timeout is None else time.time() + timeout
+                started = time.time()
+                self._waiting += 1
+                self._queued_total += 1
+                try:
+                    while not self._fits(nbytes):
+                        remaining = None if deadline is None else deadline - time.time()
+                        if remaining is not None and remaining <= 0:
+                            raise MemoryBudgetExceeded(f"内存预算不足: 需要{nbytes}字节")
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+                    self._wait_seconds += time.time() - started
+            self._reserved += nbytes
+            self._holders += 1
+            self._peak = max(self._peak, self._reserved + self._source_bytes())
+
+        reservation = Reservation(self, nbytes)
+        self._stack().append(reservation)
+        return reservation
+
+    def estimate(self, default):
+        """估计新预留的大小：最近实际大小的75分位，不小于default
+
+        页面普遍比配置的估计值大时，按估计值放行的任务下载后都需要扩大，会同时超出预算
+        """
+        with self._cond:
+            if not self._recent:
+                return default
+            ordered = sorted(self._recent)
+        return max(default, ordered[int(len(ordered) * 0.75)])
+
+    def current(self):
+        """当前线程最近一次、尚未释放的预留，没有时返回None"""
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def resize_current(self, nbytes):
+        """调整当前线程最近一次预留的大小，没有预留时忽略"""
+        reservation = self.current()
+        if reservation is not None:
+            reservation.resize(nbytes)
+
+    def usage(self):
+        """当前内存用量统计，单位为字节"""
+        with self._cond:
+            sources = {name: fn() for name, fn in self._sources.items()}
+            return {
+                "max_bytes": self.max_bytes,
+                "reserved_bytes": self._reserved,
+                "source_bytes": sources,
+                "total_bytes": self._reserved + sum(sources.values()),
+                "peak_bytes": self._peak,
+                "waiting": self._waiting,
+                "queued_total": self._queued_total,
+                "wait_seconds": round(self._wait_seconds, 3),
+                "trims": self._trims,
+                "rss_bytes": current_rss(),
+            }
+
+    def pressure(self):
+        """当前预留和缓存占用占总预算的比例，未启用预算时为0"""
+        if not self.max_bytes:
+            return 0.0
+        with self._cond:
+            return (self._reserved + self._source_bytes()) / self.max_bytes
+
+    def _fits(self, nbytes):
+        # 没有其他任务占用预算时总是放行，避免缓存占满预算后所有任务饿死
+        if self._holders == 0:
+            return True
+        return self._reserved + self._source_bytes() + nbytes <= self.max_bytes
+
+    def _source_bytes(self):
+        return sum(fn() for fn in self._sources.values())
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _resize(self, reservation, nbytes):
+        nbytes = int(nbytes)
+        if self.max_bytes:
+            nbytes = min(nbytes, self.max_bytes)
+        with self._cond:
+            if reservation.released:
+                return
+            extra = nbytes - reservation.nbytes
+            if self.max_bytes and extra > 0 and not self._fits(extra) and self._overdrawn is not reservation:
+                started = time.time()
+                self._growing += 1
+                self._queued_total += 1
+                try:
+                    while not self._fits(extra):
+                        # 其他预留都在等待扩大时放行一个，否则会相互等待
+                        if self._growing == self._holders and self._overdrawn is None:
+                            self._overdrawn = reservation
+                            break
+                        self._cond.wait()
+                finally:
+                    self._growing -= 1
+                    self._wait_seconds += time.time() - started
+            self._reserved += nbytes - reservation.nbytes
+            reservation.nbytes = nbytes
+            self._recent.append(nbytes)
+            self._peak = max(self._peak, self._reserved + self._source_bytes())
+            self._cond.notify_all()
+
+    def _release(self, reservation):
+        with self._cond:
+            if reservation.released:
+                return
+            reservation.released = True
+            self._reserved -= reservation.nbytes
+            self._holders -= 1
+            if self._overdrawn is reservation:
+                self._overdrawn = None
+            self._cond.notify_all()
+        stack = self._stack()
+        if reservation in stack:
+            stack.remove(reservation)
+        if self.max_bytes and reservation.nbytes >= TRIM_MIN_BYTES:
+            self._trim()
+
+    def _trim(self):
+        """把已释放的内存归还给系统，按TRIM_INTERVAL限制频率"""
+        if _MALLOC_TRIM is None:
+            return
+        now = time.time()
+        with self._cond:
+            if now - self._trimmed_at < TRIM_INTERVAL:
+                return
+            self._trimmed_at = now
+            self._trims += 1
+        _MALLOC_TRIM(0)
+
+
+def current_rss():
+    """当前进程的常驻内存（字节），无法获取时返回None"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
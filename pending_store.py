@@ -0,0 +1,152 @@
+# encoding:utf-8
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+
+class PendingMessage:
+    """一条待总结的分享消息"""
+    __slots__ = ("seq", "chat_id", "content", "timestamp", "expire_at", "extra")
+
+    def __init__(self, seq, chat_id, content, timestamp, expire_at, extra):
+        self.seq = seq
+        self.chat_id = chat_id
+        self.content = content
+        self.timestamp = timestamp
+        self.expire_at = expire_at
+        self.extra = extra
+
+    def __repr__(self):
+        return f"PendingMessage(chat_id={self.chat_id!r}, content={self.content[:50]!r}, timestamp={self.timestamp})"
+
+
+class PendingMessageStore:
+    """群聊待总结消息存储
+
+    - 每个会话保留最近 max_per_chat 条分享，"总结"可以选择最新一条或第N条
+    - 按过期时间维护小顶堆，清理过期消息只需弹出堆顶，不再全量扫描
+    - 全局最多保留 max_total 条，超出时淘汰最早的分享
+    - 所有操作加锁，可在多线程钩子中并发调用
+    - 过期或超出上限被淘汰的条目会回调on_evict（被take取走的不会回调）
+    """
+
+    def __init__(self, ttl=300, max_per_chat=5, max_total=10000, on_evict=None):
+        self.ttl = ttl
+        self.max_per_chat = max(1, int(max_per_chat))
+        self.max_total = max(1, int(max_total))
+        self._lock = threading.RLock()
+        self._chats = {}    # chat_id -> deque[PendingMessage]，右侧为最新
+        self._heap = []     # (expire_at, seq)，已删除的条目惰性跳过
+        self._entries = {}  # seq -> PendingMessage，仅包含有效条目
+        self._seq = itertools.count()
+        self._on_evict = on_evict
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, chat_id, content, **extra):
+        """缓存一条分享消息，返回新条目"""
+        now = time.time()
+        evicted = []
+        with self._lock:
+            entry = PendingMessage(next(self._seq), chat_id, content, now, now + self.ttl, extra)
+            queue = self._chats.get(chat_id)
+            if queue is None:
+                queue = self._chats[chat_id] = deque()
+            queue.append(entry)
+            self._entries[entry.seq] = entry
+            heapq.heappush(self._heap, (entry.expire_at, entry.seq))
+
+            # 超出单会话上限时丢弃该会话最早的分享
+            while len(queue) > self.max_per_chat:
+                evicted.append(queue[0])
+                self._drop(queue[0])
+            # 超出全局上限时淘汰全局最早的分享
+            while len(self._entries) > self.max_total:
+                evicted.append(self._pop_oldest())
+            self._compact()
+        self._notify_evicted(evicted)
+        return entry
+
+    def peek(self, chat_id, index=1):
+        """查看会话中第index新的分享（1表示最新），不存在返回None"""
+        with self._lock:
+            evicted = self._expire(time.time())
+            queue = self._chats.get(chat_id)
+            entry = queue[-index] if queue and 1 <= index <= len(queue) else None
+        self._notify_evicted(evicted)
+        return entry
+
+    def take(self, chat_id, index=1):
+        """取出会话中第index新的分享（1表示最新），不存在返回None"""
+        with self._lock:
+            evicted = self._expire(time.time())
+            queue = self._chats.get(chat_id)
+            entry = queue[-index] if queue and 1 <= index <= len(queue) else None
+            if entry is not None:
+                self._drop(entry)
+        self._notify_evicted(evicted)
+        return entry
+
+    def count(self, chat_id):
+        """会话中有效的待总结分享数量，与peek/take一致先清理已过期的分享"""
+        with self._lock:
+            evicted = self._expire(time.time())
+            queue = self._chats.get(chat_id)
+            count = len(queue) if queue else 0
+        self._notify_evicted(evicted)
+        return count
+
+    def expire(self, now=None):
+        """清理所有已过期的分享，返回清理数量"""
+        with self._lock:
+            evicted = self._expire(now if now is not None else time.time())
+        self._notify_evicted(evicted)
+        return len(evicted)
+
+    def _expire(self, now):
+        evicted = []
+        while self._heap and self._heap[0][0] <= now:
+            _, seq = heapq.heappop(self._heap)
+            entry = self._entries.get(seq)
+            if entry is not None:
+                self._drop(entry)
+                evicted.append(entry)
+        return evicted
+
+    def _pop_oldest(self):
+        while self._heap:
+            _, seq = heapq.heappop(self._heap)
+            entry = self._entries.get(seq)
+            if entry is not None:
+                self._drop(entry)
+                return entry
+        return None
+
+    def _notify_evicted(self, evicted):
+        # 回调在锁外执行，避免回调中再次访问存储时死锁
+        if not self._on_evict:
+            return
+        for entry in evicted:
+            if entry is not None:
+                self._on_evict(entry)
+
+    def _drop(self, entry):
+        self._entries.pop(entry.seq, None)
+        queue = self._chats.get(entry.chat_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(entry)
+        except ValueError:
+            pass
+        if not queue:
+            del self._chats[entry.chat_id]
+
+    def _compact(self):
+        # take()取走的条目仍留在堆中，堆明显大于有效条目时重建
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(e.expire_at, e.seq) for e in self._entries.values()]
+            heapq.heapify(self._heap)
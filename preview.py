@@ -0,0 +1,176 @@
+# encoding:utf-8
+import html
+import re
+import threading
+import time
+from typing import NamedTuple
+
+import requests
+
+# 预览中描述的最大字数
+_DESCRIPTION_CHARS = 120
+
+# 每次读取的字节数，读取会等到凑满一块，块越小越不容易在</head>之后等待页面剩余部分
+_HEAD_CHUNK = 1024
+
+_META_TAG = re.compile(r"<meta\s[^>]*>", re.IGNORECASE)
+_META_ATTR = re.compile(r"([\w:-]+)\s*=\s*(?:\"([^\"]*)\"|'([^']*)')")
+_TITLE_TAG = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_HEAD_END = re.compile(rb"</head\s*>|<body[\s>]", re.IGNORECASE)
+
+# 各字段按优先级查找的meta名称（name或property）
+_TITLE_KEYS = ("og:title", "twitter:title")
+_DESCRIPTION_KEYS = ("og:description", "description", "twitter:description")
+_AUTHOR_KEYS = ("author", "article:author", "og:article:author", "byl")
+_DATE_KEYS = ("article:published_time", "og:release_date", "publishdate", "pubdate", "publish_date", "date")
+_SITE_KEYS = ("og:site_name", "application-name")
+
+# format_article输出的字段名
+_ARTICLE_FIELDS = ("标题", "作者", "发布日期")
+
+
+class PagePreview(NamedTuple):
+    """总结完成前先发送给用户的页面预览"""
+    title: str = ""
+    author: str = ""
+    date: str = ""
+    description: str = ""
+    site: str = ""
+
+    def format(self):
+        """构建预览文本，没有标题时返回None"""
+        if not self.title:
+            return None
+        lines = [f"📄 {self.title}"]
+        byline = " · ".join(part for part in (self.site, self.author, self.date[:10]) if part)
+        if byline:
+            lines.append(byline)
+        if self.description and self.description != self.title:
+            description = self.description
+            if len(description) > _DESCRIPTION_CHARS:
+                description = description[:_DESCRIPTION_CHARS] + "…"
+            lines.append(description)
+        return "\n".join(lines)
+
+
+def preview_from_card(card):
+    """使用分享卡片的标题和描述构建预览，不需要任何请求"""
+    return PagePreview(title=card.title, description=card.des, site=card.appname)
+
+
+def preview_from_article(content):
+    """从已缓存的文章文本（format_article的格式）中取出标题、作者、日期和第一段"""
+    fields = {}
+    description = ""
+    for line in content.split("\n"):
+        line = line.strip()
+        name, sep, value = line.partition(": ")
+        if sep and name in _ARTICLE_FIELDS and name not in fields:
+            fields[name] = value.strip()
+        elif line:
+            description = line
+            break
+    date = fields.get("发布日期", "")
+    return PagePreview(
+        title=fields.get("标题", ""),
+        author=fields.get("作者", ""),
+        date=date if any(c.isdigit() for c in date) else "",
+        description=description,
+    )
+
+
+def read_head(response, max_bytes, deadline=None):
+    """从流式响应中读取到</head>或<body>为止，最多max_bytes字节，不下载页面剩余部分
+
+    Args:
+        response: stream=True的requests响应
+        max_bytes: 最多读取的字节数
+        deadline: 读取截止时间（time.time()），超过后返回已读取的部分
+
+    Returns:
+        bytes: 已读取的内容
+    """
+    buffer = bytearray()
+    try:
+        for chunk in response.iter_content(_HEAD_CHUNK):
+            # 从上一块末尾附近继续查找，避免结束标签被切在两块之间
+            start = max(0, len(buffer) - 8)
+            buffer += chunk
+            if _HEAD_END.search(buffer, start) or len(buffer) >= max_bytes:
+                break
+            if deadline is not None and time.time() >= deadline:
+                break
+    except requests.RequestException:
+        # 读取超时时已读到的部分通常已经包含标题
+        if not buffer:
+            raise
+    return bytes(buffer[:max_bytes])
+
+
+def parse_head(html_text):
+    """从页面<head>中的meta标签和<title>解析预览信息
+
+    Args:
+        html_text: 页面开头部分的文本，不需要是完整页面
+
+    Returns:
+        PagePreview: 预览信息，字段可能为空
+    """
+    metas = {}
+    for tag in _META_TAG.findall(html_text):
+        attrs = {name.lower(): first or second for name, first, second in _META_ATTR.findall(tag)}
+        key = (attrs.get("property") or attrs.get("name") or attrs.get("itemprop") or "").lower()
+        value = attrs.get("content", "").strip()
+        if key and value and key not in metas:
+            metas[key] = _clean(value)
+
+    def pick(keys):
+        return next((metas[key] for key in keys if metas.get(key)), "")
+
+    title = pick(_TITLE_KEYS)
+    if not title:
+        match = _TITLE_TAG.search(html_text)
+        title = _clean(match.group(1)) if match else ""
+    return PagePreview(
+        title=title,
+        author=pick(_AUTHOR_KEYS),
+        date=pick(_DATE_KEYS),
+        description=pick(_DESCRIPTION_KEYS),
+        site=pick(_SITE_KEYS),
+    )
+
+
+def _clean(text):
+    return re.sub(r"\s+", " ", html.unescape(text)).strip()
+
+
+class PreviewSender:
+    """保证总结之前只发送一条提示：预览或"正在生成总结"
+
+    后台获取预览时，预览先到则发送预览；总结开始回复时（close）还没有发送任何提示，则发送notice
+    """
+
+    def __init__(self, send, notice):
+        self._send = send
+        self._notice = notice
+        self._lock = threading.Lock()
+        self._sent = False
+        self.source = None
+
+    def send(self, text, source):
+        """发送预览，已经发送过提示或已关闭时忽略
+
+        Returns:
+            bool: 是否发送
+        """
+        with self._lock:
+            if self._sent:
+                return False
+            self._sent = True
+            self.source = source
+            self._send(text)
+            return True
+
+    def close(self):
+        """总结即将回复，之后不再发送预览；还没有发送过提示时发送notice"""
+        self.send(self._notice, "notice")
@@ -0,0 +1,165 @@
+# encoding:utf-8
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from common.log import logger
+
+# 单个调用栈最多记录的层数
+_MAX_DEPTH = 128
+
+# 结果文件中列出的最热函数数量
+_TOP_N = 30
+
+
+class _Trace:
+    """一次被采样的总结任务"""
+    __slots__ = ("name", "thread_id", "started_at", "sampled", "tags", "stacks", "leaves", "samples")
+
+    def __init__(self, name, thread_id, sampled):
+        self.name = name
+        self.thread_id = thread_id
+        self.started_at = time.time()
+        self.sampled = sampled
+        self.tags = {}
+        self.stacks = Counter()  # 折叠后的调用栈 -> 采样次数
+        self.leaves = Counter()  # 栈顶函数 -> 采样次数
+        self.samples = 0
+
+    def add(self, frame):
+        names = []
+        while frame is not None and len(names) < _MAX_DEPTH:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        if not names:
+            return
+        names.reverse()
+        self.stacks[";".join(names)] += 1
+        self.leaves[names[-1]] += 1
+        self.samples += 1
+
+
+class SlowRequestProfiler:
+    """慢请求采样分析
+
+    启用后，被profile()包裹的任务在执行期间由一个后台线程按interval间隔采样其调用栈，
+    没有任务执行时采样线程退出。任务结束后，耗时超过threshold秒或命中sample_rate抽样的
+    记录写入directory，文件按时间命名，超过max_files个时删除最旧的文件。
+
+    结果为JSON：URL、域名、提取方式等标注，折叠格式的调用栈（可直接转换为火焰图）和最热函数。
+    所有参数都可以通过configure在运行时修改。
+    """
+
+    def __init__(self, directory, enabled=False, threshold=15, sample_rate=0.0, interval=0.01, max_files=50):
+        self._lock = threading.Lock()
+        self._traces = {}  # thread_id -> 正在采样的任务
+        self._thread = None
+        self._stats = {"profiled": 0, "written": 0, "failed": 0}
+        self.configure(directory, enabled, threshold, sample_rate, interval, max_files)
+
+    def configure(self, directory, enabled, threshold, sample_rate, interval, max_files):
+        """修改采样参数，正在采样的任务不受影响"""
+        self.directory = directory
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.interval = max(0.001, interval)
+        self.max_files = max(1, int(max_files))
+        self.enabled = enabled
+
+    @contextmanager
+    def profile(self, name):
+        """采样一次任务的执行过程，未启用或同一线程已在采样时不做任何事"""
+        thread_id = threading.get_ident()
+        if not self.enabled or thread_id in self._traces:
+            yield None
+            return
+        trace = _Trace(name, thread_id, random.random() < self.sample_rate)
+        with self._lock:
+            self._traces[thread_id] = trace
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="JinaSumProfiler", daemon=True)
+                self._thread.start()
+        try:
+            yield trace
+        finally:
+            with self._lock:
+                self._traces.pop(thread_id, None)
+                self._stats["profiled"] += 1
+            elapsed = time.time() - trace.started_at
+            if elapsed >= self.threshold or trace.sampled:
+                self._write(trace, elapsed)
+
+    def annotate(self, **tags):
+        """为当前线程正在采样的任务添加标注，如url、host、strategy"""
+        trace = self._traces.get(threading.get_ident())
+        if trace is not None:
+            trace.tags.update(tags)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["active"] = len(self._traces)
+        stats["enabled"] = self.enabled
+        return stats
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._traces:
+                    self._thread = None
+                    return
+                traces = list(self._traces.values())
+            frames = sys._current_frames()
+            for trace in traces:
+                frame = frames.get(trace.thread_id)
+                if frame is not None:
+                    trace.add(frame)
+            del frames
+            time.sleep(self.interval)
+
+    def _write(self, trace, elapsed):
+        record = {
+            "name": trace.name,
+            "reason": "slow" if elapsed >= self.threshold else "sampled",
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(trace.started_at)),
+            "elapsed_ms": int(elapsed * 1000),
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": trace.samples,
+            "tags": trace.tags,
+            "top": [{"function": name, "samples": count} for name, count in trace.leaves.most_common(_TOP_N)],
+            "stacks": dict(trace.stacks.most_common()),
+        }
+        host = trace.tags.get("host") or "unknown"
+        filename = "{}-{:03d}_{}_{}ms_{}.json".format(
+            time.strftime("%Y%m%d-%H%M%S", time.localtime(trace.started_at)),
+            int(trace.started_at * 1000) % 1000, trace.name, record["elapsed_ms"],
+            "".join(ch if ch.isalnum() or ch in ".-" else "_" for ch in host),
+        )
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, filename), "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False, indent=1)
+            self._rotate()
+            self._count("written")
+            logger.info(f"[JinaSum] 已记录慢请求采样: {filename}, samples={trace.samples}")
+        except Exception as e:
+            self._count("failed")
+            logger.warning(f"[JinaSum] 写入慢请求采样失败: {str(e)}")
+
+    def _rotate(self):
+        files = sorted(name for name in os.listdir(self.directory) if name.endswith(".json"))
+        for name in files[:-self.max_files]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
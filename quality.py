@@ -0,0 +1,144 @@
+# encoding:utf-8
+import re
+from typing import NamedTuple
+
+# 默认的"内容足够好"阈值，可通过配置quality_threshold调整；
+# 按tests/fixtures/quality_corpus.jsonl中的标注样本选取，位于最低的好样本和最高的差样本之间
+DEFAULT_THRESHOLD = 0.25
+
+# 句子结束符
+_SENTENCE_END = re.compile(r"[。！？!?；;]|\.(?=\s|$)")
+
+# 常见的导航、版权、分享等模板文字
+_BOILERPLATE_LINE = re.compile(
+    r"版权所有|copyright|©|all rights reserved|备案|ICP|登录|注册|扫码|二维码|关注我们|分享到|"
+    r"上一篇|下一篇|相关推荐|推荐阅读|热门文章|责任编辑|免责声明|隐私政策|用户协议|cookie|"
+    r"返回顶部|点击查看|阅读原文|点赞|收藏|评论\s*\d*$",
+    re.IGNORECASE,
+)
+
+_CJK_CHAR = re.compile(r"[一-鿿]")
+_LATIN_CHAR = re.compile(r"[A-Za-z]")
+# 编码错误产生的乱码特征
+_MOJIBAKE = re.compile(r"�|[ÃÂâ€]{2,}|[锟斤拷]{3,}")
+# 乱码占比达到这个值时不再判断语言
+_MOJIBAKE_UNKNOWN = 0.1
+
+
+class QualityScore(NamedTuple):
+    """内容质量评估结果"""
+    score: float
+    text_length: int
+    sentence_count: int
+    boilerplate_ratio: float
+    duplicate_ratio: float
+    language: str
+    text_density: float
+
+    def is_good(self, threshold=DEFAULT_THRESHOLD):
+        return self.score >= threshold
+
+
+def score_content(text, html_length=None):
+    """评估提取出的正文质量
+
+    综合文本长度、句子数量、模板文字占比、重复行占比、语言和文本密度，
+    得到0~1之间的分数，用于判断是否需要继续尝试更昂贵的提取方法
+
+    Args:
+        text: 提取出的正文
+        html_length: 正文所在HTML的长度，提供时参与文本密度计算
+
+    Returns:
+        QualityScore: 评估结果
+    """
+    if not text:
+        return QualityScore(0.0, 0, 0, 0.0, 0.0, "unknown", 0.0)
+
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    text_length = sum(len(line) for line in lines)
+    if not text_length:
+        return QualityScore(0.0, 0, 0, 0.0, 0.0, "unknown", 0.0)
+
+    sentence_count = len(_SENTENCE_END.findall(text))
+
+    # 模板文字：命中常见模板关键词的短行，按字符数计算占比
+    boilerplate_length = sum(
+        len(line) for line in lines
+        if len(line) < 40 and _BOILERPLATE_LINE.search(line)
+    )
+    boilerplate_ratio = boilerplate_length / text_length
+
+    # 重复行：导航、标签云等页面元素经常重复出现
+    duplicate_ratio = 1 - len(set(lines)) / len(lines)
+
+    # 语言检测：中文按汉字占比，英文按字母占比，乱码较多时判为unknown
+    sample = text[:5000]
+    cjk_ratio = len(_CJK_CHAR.findall(sample)) / len(sample)
+    latin_ratio = len(_LATIN_CHAR.findall(sample)) / len(sample)
+    mojibake_ratio = sum(len(match) for match in _MOJIBAKE.findall(sample)) / len(sample)
+    if mojibake_ratio >= _MOJIBAKE_UNKNOWN:
+        language, language_factor = "unknown", 1.0
+    elif cjk_ratio >= 0.2:
+        language, language_factor = "zh", 1.0
+    elif latin_ratio >= 0.4:
+        language, language_factor = "en", 1.0
+    else:
+        language, language_factor = "unknown", 0.6
+    # 乱码按占比扣分：个别替换字符几乎不影响，乱码占比达到14%时降到0.3
+    language_factor *= max(0.3, 1 - mojibake_ratio * 5)
+
+    text_density = text_length / html_length if html_length else 0.0
+    density_factor = min(1.0, 0.6 + text_density * 4) if html_length else 1.0
+
+    # 英文单词比汉字信息量大，长度按语言折算
+    length_unit = 1500 if language == "en" else 600
+    score = (
+        0.5 * min(1.0, text_length / length_unit)
+        + 0.5 * min(1.0, sentence_count / 6)
+    )
+    score *= (1 - boilerplate_ratio) * (1 - duplicate_ratio) * language_factor * density_factor
+
+    return QualityScore(
+        score=round(score, 3),
+        text_length=text_length,
+        sentence_count=sentence_count,
+        boilerplate_ratio=round(boilerplate_ratio, 3),
+        duplicate_ratio=round(duplicate_ratio, 3),
+        language=language,
+        text_density=round(text_density, 4),
+    )
+
+
+def is_good_enough(text, html_length=None, threshold=DEFAULT_THRESHOLD):
+    """内容质量是否足够，足够时停止尝试后续提取方法"""
+    return score_content(text, html_length).is_good(threshold)
+
+
+def evaluate(samples, threshold=DEFAULT_THRESHOLD):
+    """在标注样本上评估评分器，用于调整阈值
+
+    Args:
+        samples: 可迭代的(text, is_good)二元组，is_good为人工标注
+        threshold: 待评估的阈值
+
+    Returns:
+        dict: precision、recall和accuracy
+    """
+    tp = fp = tn = fn = 0
+    for text, label in samples:
+        predicted = is_good_enough(text, threshold=threshold)
+        if predicted and label:
+            tp += 1
+        elif predicted:
+            fp += 1
+        elif label:
+            fn += 1
+        else:
+            tn += 1
+    total = tp + fp + tn + fn
+    return {
+        "precision": tp / (tp + fp) if tp + fp else 0.0,
+        "recall": tp / (tp + fn) if tp + fn else 0.0,
+        "accuracy": (tp + tn) / total if total else 0.0,
+    }
@@ -0,0 +1,220 @@
+# encoding:utf-8
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+# 优先级，数字越小越先执行
+PRIORITY_PRIVATE = 0  # 私聊
+PRIORITY_TRIGGER = 1  # 群聊中的"总结"指令
+PRIORITY_AUTO = 2  # 群聊自动总结
+PRIORITY_WARM = 3  # 订阅预热
+PRIORITY_NAMES = {PRIORITY_PRIVATE: "private", PRIORITY_TRIGGER: "trigger", PRIORITY_AUTO: "auto", PRIORITY_WARM: "warm"}
+
+# 统计分位数时保留的最近样本数
+_SAMPLE_SIZE = 200
+
+_WAITING, _RUNNING, _DROPPED, _DONE = range(4)
+
+
+class SchedulerRejected(Exception):
+    """任务未被执行：超出配额、被更新的任务取代或排队过久"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Ticket:
+    """一个排队或执行中的总结任务"""
+    __slots__ = ("seq", "priority", "chat_id", "is_group", "enqueued_at", "started_at", "state", "reason")
+
+    def __init__(self, seq, priority, chat_id, is_group, enqueued_at):
+        self.seq = seq
+        self.priority = priority
+        self.chat_id = chat_id
+        self.is_group = is_group
+        self.enqueued_at = enqueued_at
+        self.started_at = None
+        self.state = _WAITING
+        self.reason = None
+
+
+class _ClassStats:
+    __slots__ = ("started", "completed", "dropped", "rejected", "wait_total", "wait_max",
+                 "service_total", "service_max", "wait_samples", "service_samples")
+
+    def __init__(self):
+        self.started = self.completed = self.dropped = self.rejected = 0
+        self.wait_total = self.wait_max = self.service_total = self.service_max = 0.0
+        self.wait_samples = deque(maxlen=_SAMPLE_SIZE)
+        self.service_samples = deque(maxlen=_SAMPLE_SIZE)
+
+
+class SummaryScheduler:
+    """总结任务优先级调度
+
+    - 同时最多执行slots个总结，空出位置时按 私聊 > "总结"指令 > 自动总结 > 订阅预热 的顺序放行，同级先到先得
+    - 每个私聊最多chat_quota个、每个群聊最多group_quota个任务在排队或执行，超出时直接拒绝
+    - 同一群聊有新的自动总结进入队列时，仍在排队的旧自动总结被取代
+    - 自动总结和订阅预热排队超过auto_max_wait秒后放弃执行
+    - 按优先级统计排队时间和执行时间，供监控使用
+
+    调用方在钩子线程中调用acquire等待执行，执行结束后必须调用release
+    """
+
+    def __init__(self, slots=4, chat_quota=2, group_quota=3, auto_max_wait=120):
+        self.slots = max(1, int(slots))
+        self.chat_quota = max(1, int(chat_quota))
+        self.group_quota = max(1, int(group_quota))
+        self.auto_max_wait = auto_max_wait
+        self._cond = threading.Condition()
+        self._heap = []  # (priority, seq, ticket)，非等待状态的条目惰性跳过
+        self._seq = itertools.count()
+        self._running = 0
+        self._active = {}  # chat_id -> 排队和执行中的任务数
+        self._waiting_auto = {}  # chat_id -> 排队中的自动总结
+        self._stats = {priority: _ClassStats() for priority in PRIORITY_NAMES}
+
+    def acquire(self, priority, chat_id, is_group):
+        """进入队列并等待执行
+
+        Args:
+            priority: PRIORITY_PRIVATE、PRIORITY_TRIGGER、PRIORITY_AUTO或PRIORITY_WARM
+            chat_id: 会话ID，用于配额统计和取代判断
+            is_group: 是否群聊
+
+        Returns:
+            Ticket: 获得执行位置的任务
+
+        Raises:
+            SchedulerRejected: 超出配额、被取代或排队过久
+        """
+        with self._cond:
+            now = time.time()
+            stats = self._stats[priority]
+
+            # 同一群聊较早的自动总结被新的自动总结取代
+            if priority == PRIORITY_AUTO:
+                previous = self._waiting_auto.get(chat_id)
+                if previous is not None:
+                    self._drop(previous, "superseded")
+
+            quota = self.group_quota if is_group else self.chat_quota
+            if self._active.get(chat_id, 0) >= quota:
+                stats.rejected += 1
+                raise SchedulerRejected("quota")
+
+            ticket = Ticket(next(self._seq), priority, chat_id, is_group, now)
+            self._active[chat_id] = self._active.get(chat_id, 0) + 1
+            heapq.heappush(self._heap, (priority, ticket.seq, ticket))
+            if priority == PRIORITY_AUTO:
+                self._waiting_auto[chat_id] = ticket
+            self._dispatch()
+
+            while ticket.state == _WAITING:
+                timeout = None
+                if priority >= PRIORITY_AUTO and self.auto_max_wait:
+                    timeout = ticket.enqueued_at + self.auto_max_wait - time.time()
+                    if timeout <= 0:
+                        self._drop(ticket, "expired")
+                        break
+                self._cond.wait(timeout)
+
+            if ticket.state == _DROPPED:
+                raise SchedulerRejected(ticket.reason)
+
+            wait_time = ticket.started_at - ticket.enqueued_at
+            stats.started += 1
+            stats.wait_total += wait_time
+            stats.wait_max = max(stats.wait_max, wait_time)
+            stats.wait_samples.append(wait_time)
+            return ticket
+
+    def release(self, ticket):
+        """任务执行结束，释放执行位置"""
+        with self._cond:
+            if ticket.state != _RUNNING:
+                return
+            ticket.state = _DONE
+            self._running -= 1
+            self._leave(ticket)
+
+            service_time = time.time() - ticket.started_at
+            stats = self._stats[ticket.priority]
+            stats.completed += 1
+            stats.service_total += service_time
+            stats.service_max = max(stats.service_max, service_time)
+            stats.service_samples.append(service_time)
+            self._dispatch()
+
+    def stats(self):
+        """按优先级返回排队和执行统计，时间单位为秒"""
+        with self._cond:
+            queued = {priority: 0 for priority in PRIORITY_NAMES}
+            for _, _, ticket in self._heap:
+                if ticket.state == _WAITING:
+                    queued[ticket.priority] += 1
+            result = {"running": self._running, "slots": self.slots}
+            for priority, name in PRIORITY_NAMES.items():
+                s = self._stats[priority]
+                result[name] = {
+                    "queued": queued[priority],
+                    "completed": s.completed,
+                    "dropped": s.dropped,
+                    "rejected": s.rejected,
+                    "running": s.started - s.completed,
+                    "wait_avg": round(s.wait_total / s.started, 3) if s.started else 0.0,
+                    "wait_p95": _percentile(s.wait_samples, 0.95),
+                    "wait_max": round(s.wait_max, 3),
+                    "service_avg": round(s.service_total / s.completed, 3) if s.completed else 0.0,
+                    "service_p95": _percentile(s.service_samples, 0.95),
+                    "service_max": round(s.service_max, 3),
+                }
+            return result
+
+    def _dispatch(self):
+        """有空闲位置时按优先级放行等待中的任务，调用时需持有锁"""
+        granted = False
+        now = time.time()
+        while self._running < self.slots and self._heap:
+            _, _, ticket = heapq.heappop(self._heap)
+            if ticket.state != _WAITING:
+                continue
+            if ticket.priority >= PRIORITY_AUTO and self.auto_max_wait \
+                    and now - ticket.enqueued_at > self.auto_max_wait:
+                self._drop(ticket, "expired")
+                continue
+            ticket.state = _RUNNING
+            ticket.started_at = now
+            self._running += 1
+            if self._waiting_auto.get(ticket.chat_id) is ticket:
+                del self._waiting_auto[ticket.chat_id]
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _drop(self, ticket, reason):
+        """放弃排队中的任务，调用时需持有锁"""
+        ticket.state = _DROPPED
+        ticket.reason = reason
+        self._stats[ticket.priority].dropped += 1
+        self._leave(ticket)
+        self._cond.notify_all()
+
+    def _leave(self, ticket):
+        count = self._active.get(ticket.chat_id, 0) - 1
+        if count > 0:
+            self._active[ticket.chat_id] = count
+        else:
+            self._active.pop(ticket.chat_id, None)
+        if self._waiting_auto.get(ticket.chat_id) is ticket:
+            del self._waiting_auto[ticket.chat_id]
+
+
+def _percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 3)
@@ -0,0 +1,260 @@
+# encoding:utf-8
+import json
+import os
+import re
+import threading
+from types import MappingProxyType
+from typing import NamedTuple
+
+from common.log import logger
+
+from .extractors import BUILTIN_EXTRACTORS, ExtractorRegistry, SiteExtractor
+
+# 不适合总结的内容类型，合并为一个正则一次匹配
+_SKIP_URL_PATTERN = re.compile("|".join(f"(?:{pattern})" for pattern in (
+    # 视频/音乐平台的非文章内容（B站视频由站点提取器通过接口获取简介和字幕）
+    r"(youtube\.com|youtu\.be)/watch",  # YouTube视频
+    r"(music\.163\.com|y\.qq\.com)/(song|playlist|album)",  # 音乐
+    # 文件链接
+    r"\.(pdf|doc|docx|ppt|pptx|xls|xlsx|zip|rar|7z)(\?|$)",  # 文档和压缩包
+    # 图片链接
+    r"\.(jpg|jpeg|png|gif|bmp|webp|svg)(\?|$)",  # 图片
+    # 地图
+    r"(map\.(baidu|google|qq)\.com)",  # 地图
+    # 工具类
+    r"(docs\.qq\.com|shimo\.im|yuque\.com|notion\.so)",  # 在线文档
+    # 社交媒体特定内容
+    r"weixin\.qq\.com/[^/]+/([^/]+/){2,}",  # 微信小程序或其他功能
+    r"(weibo\.com|t\.cn)/[^/]+/[^/]+",  # 微博
+    # 商城商品
+    r"(taobao\.com|tmall\.com|jd\.com)/.*?(item|product)",  # 电商商品
+    # 小程序
+    r"servicewechat\.com",  # 微信小程序
+)), re.IGNORECASE)
+
+# 修改后需要重启才能生效的配置（连接池、缓存、进程池等在初始化时创建）
+RESTART_REQUIRED_KEYS = (
+    "cache_timeout", "pending_max_per_chat", "pending_max_total", "content_cache_timeout", "content_cache_size",
+    "content_cache_compress", "http_pool_size", "http_cache_enabled", "http_cache_dir", "http_cache_max_mb",
+    "batch_workers", "prefetch_max_inflight", "config_reload_interval", "extract_workers", "extract_worker_max_tasks", "extract_worker_timeout",
+    "summary_slots", "summary_chat_quota", "summary_group_quota", "auto_sum_max_wait",
+    "memory_budget_mb", "memory_page_estimate_kb", "memory_render_mb", "memory_render_wait",
+    "llm_direct", "open_ai_api_base", "open_ai_model", "llm_timeout", "llm_max_concurrency",
+    "llm_stream_chunk_chars", "feed_urls", "feed_poll_interval", "feed_host_interval", "feed_max_inflight",
+    "feed_max_entries", "feed_warm_summary", "shared_cache", "shared_cache_prefix", "shared_lease_ttl",
+    "shared_lease_wait", "adaptive_timeouts", "timeout_percentile", "timeout_multiplier", "timeout_min_samples",
+    "timeout_limits", "fetch_deadline",
+)
+
+
+class UrlPolicy:
+    """预先构建的URL过滤规则：跳过模式、白名单和黑名单前缀"""
+
+    def __init__(self, white_url_list=(), black_url_list=()):
+        self.white_prefixes = tuple(white_url_list)
+        self.black_prefixes = tuple(black_url_list)
+
+    def check(self, url):
+        """检查URL是否允许总结
+
+        Returns:
+            str: 不允许的原因，允许时返回None
+        """
+        if not url.startswith(("http://", "https://")):
+            return "URL不以http://或https://开头"
+        if any(c.isspace() for c in url):
+            return "URL中包含空白字符"
+        match = _SKIP_URL_PATTERN.search(url)
+        if match:
+            return f"URL匹配跳过模式: {match.group()}"
+        if self.white_prefixes and not url.startswith(self.white_prefixes):
+            return "URL不在白名单中"
+        # 黑名单优先级>白名单
+        if url.startswith(self.black_prefixes):
+            return "URL在黑名单中"
+        return None
+
+
+class ConfigSnapshot(NamedTuple):
+    """某一时刻的配置及由其预先构建的结构，创建后不再修改，重新加载时整体替换"""
+    raw: MappingProxyType
+    max_words: int
+    prompt: str
+    batch_prompt: str
+    auto_sum: bool
+    black_group_list: frozenset
+    url_policy: UrlPolicy
+    site_extractors: ExtractorRegistry
+    clean_patterns: tuple
+    quality_threshold: float
+    batch_max_urls: int
+    batch_timeout: float
+    preview_enabled: bool
+    preview_timeout: float
+    preview_head_bytes: int
+    prefetch_enabled: bool
+    prefetch_group_interval: float
+    open_ai_api_key: str
+
+
+def build_snapshot(config):
+    """校验配置并构建快照
+
+    Args:
+        config: 已补全默认值的配置字典
+
+    Returns:
+        ConfigSnapshot: 配置快照
+
+    Raises:
+        ValueError: 配置值类型或取值范围错误
+    """
+    _require(config, "max_words", int, lambda v: v > 0)
+    _require(config, "prompt", str, lambda v: v.strip())
+    _require(config, "batch_prompt", str, lambda v: v.strip())
+    _require(config, "auto_sum", bool)
+    _require(config, "quality_threshold", (int, float), lambda v: 0 <= v <= 1)
+    _require(config, "batch_max_urls", int, lambda v: v > 0)
+    _require(config, "batch_timeout", (int, float), lambda v: v > 0)
+    _require(config, "preview_enabled", bool)
+    _require(config, "preview_timeout", (int, float), lambda v: v > 0)
+    _require(config, "preview_head_kb", int, lambda v: v > 0)
+    _require(config, "prefetch_enabled", bool)
+    _require(config, "prefetch_group_interval", (int, float), lambda v: v >= 0)
+    _require(config, "open_ai_api_key", str)
+    _require(config, "profile_enabled", bool)
+    _require(config, "profile_threshold", (int, float), lambda v: v >= 0)
+    _require(config, "profile_sample_rate", (int, float), lambda v: 0 <= v <= 1)
+    _require(config, "profile_interval_ms", (int, float), lambda v: v > 0)
+    _require(config, "profile_max_files", int, lambda v: v > 0)
+    _require(config, "profile_dir", str)
+    for key in ("white_url_list", "black_url_list", "black_group_list", "extra_clean_patterns"):
+        _require(config, key, list, lambda v: all(isinstance(item, str) for item in v))
+
+    try:
+        clean_patterns = tuple(re.compile(pattern) for pattern in config["extra_clean_patterns"])
+    except re.error as e:
+        raise ValueError(f"extra_clean_patterns包含无效的正则表达式: {str(e)}")
+
+    # 站点规则逐条注册，错误的规则跳过，不影响其他配置
+    site_extractors = ExtractorRegistry(BUILTIN_EXTRACTORS)
+    for extractor_conf in config.get("site_extractors", []):
+        try:
+            site_extractors.register(SiteExtractor.from_config(extractor_conf))
+        except Exception as e:
+            logger.error(f"[JinaSum] 站点提取规则配置错误: {extractor_conf}, {str(e)}")
+
+    return ConfigSnapshot(
+        raw=MappingProxyType(dict(config)),
+        max_words=config["max_words"],
+        prompt=config["prompt"],
+        batch_prompt=config["batch_prompt"],
+        auto_sum=config["auto_sum"],
+        black_group_list=frozenset(config["black_group_list"]),
+        url_policy=UrlPolicy(config["white_url_list"], config["black_url_list"]),
+        site_extractors=site_extractors,
+        clean_patterns=clean_patterns,
+        quality_threshold=float(config["quality_threshold"]),
+        batch_max_urls=config["batch_max_urls"],
+        batch_timeout=config["batch_timeout"],
+        preview_enabled=config["preview_enabled"],
+        preview_timeout=float(config["preview_timeout"]),
+        preview_head_bytes=config["preview_head_kb"] * 1024,
+        prefetch_enabled=config["prefetch_enabled"],
+        prefetch_group_interval=config["prefetch_group_interval"],
+        open_ai_api_key=config["open_ai_api_key"],
+    )
+
+
+def _require(config, key, types, check=None):
+    value = config.get(key)
+    # bool是int的子类，数值配置不接受true/false
+    if not isinstance(value, types) or (isinstance(value, bool) and bool not in _as_tuple(types)):
+        raise ValueError(f"配置项{key}类型错误: {value!r}")
+    if check is not None and not check(value):
+        raise ValueError(f"配置项{key}取值无效: {value!r}")
+
+
+def _as_tuple(types):
+    return types if isinstance(types, tuple) else (types,)
+
+
+def config_source(plugin_dir, plugin_name):
+    """找到宿主实际加载的配置文件，与Plugin.load_config的顺序一致
+
+    宿主优先使用plugins/config.json中以插件名（小写）为键的配置，没有时才读取插件目录下的config.json
+
+    Args:
+        plugin_dir: 插件目录
+        plugin_name: 注册的插件名
+
+    Returns:
+        tuple: (配置文件路径, 配置所在的键)，插件目录下的config.json的键为None
+    """
+    global_path = os.path.join(os.path.dirname(os.path.abspath(plugin_dir)), "config.json")
+    key = plugin_name.lower()
+    try:
+        with open(global_path, "r", encoding="utf-8") as f:
+            global_config = json.load(f)
+        if isinstance(global_config, dict) and global_config.get(key):
+            return global_path, key
+    except (OSError, ValueError):
+        pass
+    return os.path.join(plugin_dir, "config.json"), None
+
+
+class ConfigWatcher:
+    """监视配置文件，修改时间变化后重新读取并回调
+
+    在后台线程中每interval秒检查一次文件修改时间，消息处理线程不做任何文件操作；
+    指定key时文件是多个插件共用的全局配置，只回调其中key对应的部分
+    """
+
+    def __init__(self, path, on_change, interval=5, key=None):
+        self.path = path
+        self.key = key
+        self.on_change = on_change
+        self.interval = interval
+        self._mtime = self._current_mtime()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="JinaSumConfigWatcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """文件有变化时读取并回调，返回是否检测到变化"""
+        mtime = self._current_mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"[JinaSum] 读取配置文件失败，继续使用当前配置: {str(e)}")
+            return True
+        if self.key is not None:
+            config = config.get(self.key) if isinstance(config, dict) else None
+            if not isinstance(config, dict) or not config:
+                logger.error(f"[JinaSum] 配置文件{self.path}中没有{self.key}的配置，继续使用当前配置")
+                return True
+        try:
+            self.on_change(config)
+        except Exception as e:
+            logger.error(f"[JinaSum] 应用新配置失败，继续使用当前配置: {str(e)}")
+        return True
@@ -0,0 +1,136 @@
+# encoding:utf-8
+import html
+import re
+from typing import NamedTuple
+from urllib.parse import urlparse
+from xml.parsers import expat
+
+# 需要从分享卡片中提取的字段，找齐后立即停止解析
+_CARD_FIELDS = ("url", "title", "des", "appname")
+
+# 每次送入解析器的字符数，缩略图、appinfo等大字段位于url/title之后时可以整体跳过
+_FEED_CHUNK_SIZE = 4096
+
+# 解析失败时使用的正则兜底
+_FIELD_PATTERN = re.compile(
+    r"<(url|title|des|appname)>\s*(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?\s*</\1>",
+    re.DOTALL,
+)
+
+_FIELD_TAG = re.compile(r"<[^>]+>")
+
+_BILIBILI_APP_NAMES = ("哔哩哔哩", "bilibili", "b站")
+
+# 只能在微信内打开、无法抓取正文的卡片（视频号等），直接使用卡片自带的标题和描述
+_UNFETCHABLE_HOSTS = ("channels.weixin.qq.com", "finder.video.qq.com")
+_UNFETCHABLE_APP_NAMES = ("视频号",)
+
+
+class ShareCard(NamedTuple):
+    """分享卡片的关键信息"""
+    url: str
+    title: str = ""
+    des: str = ""
+    appname: str = ""
+
+    @property
+    def is_bilibili(self):
+        name = self.appname.lower()
+        return any(app_name in name for app_name in _BILIBILI_APP_NAMES)
+
+    @property
+    def fetchable(self):
+        """链接指向的内容能否抓取，不能抓取时应直接使用as_content()"""
+        host = (urlparse(self.url).hostname or "").lower()
+        if host in _UNFETCHABLE_HOSTS:
+            return False
+        return not any(app_name in self.appname for app_name in _UNFETCHABLE_APP_NAMES)
+
+    def as_content(self):
+        """使用卡片自带的标题和描述构建可总结的文本，无可用信息时返回None
+
+        用于视频号等无法抓取正文的卡片（不发起请求），以及网页提取失败时的兜底
+        """
+        if not self.des:
+            return None
+        content = f"标题: {self.title}\n" if self.title else ""
+        if self.appname:
+            content += f"来源: {self.appname}\n"
+        return content + f"\n{self.des}"
+
+
+class _CardFound(Exception):
+    """所有字段已找到，用于提前终止解析"""
+
+
+def parse_share_card(content):
+    """解析XML分享卡片
+
+    使用expat增量解析，找到url、title、des、appname后立即停止，不解析卡片剩余部分；
+    XML格式不规范时使用正则兜底
+
+    Args:
+        content: 消息中的XML文本
+
+    Returns:
+        ShareCard: 卡片信息，无法提取URL时返回None
+    """
+    fields = {}
+    depth = [0]  # 当前元素的嵌套层级
+    collecting = []  # [字段名, 字段所在层级]，为空时不收集文本
+    buffer = []
+
+    def on_start(name, attrs):
+        depth[0] += 1
+        if not collecting and name in _CARD_FIELDS and name not in fields:
+            collecting[:] = [name, depth[0]]
+            buffer.clear()
+
+    def on_end(name):
+        # 字段内嵌套的子元素的文本一并收集，到字段本身结束时才保存
+        if collecting and collecting[1] == depth[0]:
+            fields[collecting[0]] = "".join(buffer).strip()
+            collecting.clear()
+            if len(fields) == len(_CARD_FIELDS):
+                raise _CardFound()
+        depth[0] -= 1
+
+    def on_data(data):
+        if collecting:
+            buffer.append(data)
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = on_start
+    parser.EndElementHandler = on_end
+    parser.CharacterDataHandler = on_data
+
+    # 去掉XML声明之前的内容，不完整的片段补一个根节点
+    start = content.find("<msg")
+    if start < 0:
+        start = content.find("<appmsg")
+        if start >= 0:
+            parser.Parse("<msg>", False)
+    if start < 0:
+        start = 0
+
+    try:
+        for offset in range(start, len(content), _FEED_CHUNK_SIZE):
+            parser.Parse(content[offset:offset + _FEED_CHUNK_SIZE], False)
+    except _CardFound:
+        pass
+    except expat.ExpatError:
+        # 格式不规范的卡片，用正则补全解析器尚未拿到的字段
+        for match in _FIELD_PATTERN.finditer(content):
+            name, value = match.group(1), match.group(2)
+            if name not in fields:
+                fields[name] = html.unescape(_FIELD_TAG.sub("", value)).strip()
+
+    url = fields.get("url")
+    if not url:
+        return None
+    return ShareCard(
+        url=url,
+        title=fields.get("title", ""),
+        des=fields.get("des", ""),
+        appname=fields.get("appname", ""),
+    )
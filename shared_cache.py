@@ -0,0 +1,461 @@
+# encoding:utf-8
+import hashlib
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import unquote, urlparse
+
+from common.log import logger
+
+# 同一错误日志的最短间隔（秒），共享存储不可用时避免每条消息都记录一次
+_ERROR_LOG_INTERVAL = 60
+
+# 共享存储中的条目：标记 过期时间 分隔符 提取方式 分隔符 内容；没有标记的是旧格式，只有内容
+_RECORD_MARK = "\x1e"
+_RECORD_SEP = "\x1f"
+
+
+class SharedBackendError(Exception):
+    """共享存储返回错误或无法连接"""
+
+
+def create_backend(url, prefix="jina_sum"):
+    """根据地址创建共享存储
+
+    Args:
+        url: redis://[:password@]host:port/db 或 sqlite:///path/to/cache.db
+        prefix: 键前缀，多个插件共用同一个存储时用于区分
+
+    Returns:
+        RedisBackend或SqliteBackend
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "redis":
+        return RedisBackend(
+            host=parsed.hostname or "127.0.0.1",
+            port=parsed.port or 6379,
+            db=int(parsed.path.lstrip("/") or 0),
+            password=unquote(parsed.password) if parsed.password else None,
+            prefix=prefix,
+        )
+    if parsed.scheme == "sqlite":
+        return SqliteBackend(unquote(parsed.path), prefix=prefix)
+    raise ValueError(f"不支持的共享缓存地址: {url}")
+
+
+def _hash_key(key):
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class RedisBackend:
+    """Redis协议的共享存储
+
+    直接通过socket使用RESP协议，只用到GET/SET/DEL/EVAL，不依赖redis客户端库，
+    任何兼容Redis协议的服务都可以使用。连接放在连接池中复用，出错的连接直接丢弃
+    """
+
+    # 只有持有者才能释放租约
+    _RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, password=None, prefix="jina_sum", timeout=2.0,
+                 pool_size=8):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.prefix = prefix
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def get(self, namespace, key):
+        value = self._command("GET", self._key(namespace, key))
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, namespace, key, value, ttl):
+        self._command("SET", self._key(namespace, key), value, "PX", int(ttl * 1000))
+
+    def delete(self, namespace, key):
+        self._command("DEL", self._key(namespace, key))
+
+    def acquire_lease(self, key, owner, ttl):
+        reply = self._command("SET", self._key("lease", key), owner, "NX", "PX", int(ttl * 1000))
+        return reply == b"OK"
+
+    def release_lease(self, key, owner):
+        self._command("EVAL", self._RELEASE_SCRIPT, 1, self._key("lease", key), owner)
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _key(self, namespace, key):
+        return f"{self.prefix}:{namespace}:{_hash_key(key)}"
+
+    def _command(self, *args):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            reply = conn.execute(args)
+        except (OSError, _ConnectionBroken) as e:
+            conn.close()
+            raise SharedBackendError(f"Redis连接失败: {str(e)}")
+        except SharedBackendError:
+            # 服务端返回的错误不影响连接本身
+            self._release(conn)
+            raise
+        self._release(conn)
+        return reply
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _connect(self):
+        try:
+            conn = _RespConnection(self.host, self.port, self.timeout)
+        except OSError as e:
+            raise SharedBackendError(f"无法连接Redis {self.host}:{self.port}: {str(e)}")
+        try:
+            if self.password:
+                conn.execute(("AUTH", self.password))
+            if self.db:
+                conn.execute(("SELECT", self.db))
+        except (OSError, SharedBackendError) as e:
+            conn.close()
+            raise SharedBackendError(f"Redis认证或选择数据库失败: {str(e)}")
+        return conn
+
+
+class _ConnectionBroken(SharedBackendError):
+    """连接被关闭或返回了无法解析的数据"""
+
+
+class _RespConnection:
+    """一个RESP协议连接"""
+
+    def __init__(self, host, port, timeout):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+
+    def execute(self, args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise _ConnectionBroken("连接已关闭")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload
+        if kind == b"-":
+            raise SharedBackendError(payload.decode("utf-8", "replace"))
+        if kind == b":":
+            return self._parse_int(line, payload)
+        if kind == b"$":
+            length = self._parse_int(line, payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise _ConnectionBroken("连接已关闭")
+            return data[:-2]
+        if kind == b"*":
+            count = self._parse_int(line, payload)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise _ConnectionBroken(f"无法解析的响应: {line[:50]!r}")
+
+    @staticmethod
+    def _parse_int(line, payload):
+        # 数字无法解析时后续数据的边界也无法确定，连接不能再使用
+        try:
+            return int(payload)
+        except ValueError:
+            raise _ConnectionBroken(f"无法解析的响应: {line[:50]!r}")
+
+    def close(self):
+        try:
+            self._reader.close()
+            self._sock.close()
+        except OSError:
+            pass
+
+
+class SqliteBackend:
+    """SQLite共享存储，同一台机器上的多个实例不需要额外服务即可共享
+
+    使用WAL模式，读写可以并发；每个线程使用自己的连接，租约的获取是单条语句，由SQLite保证原子性
+    """
+
+    # 每写入这么多次清理一次过期条目
+    _PURGE_EVERY = 200
+
+    def __init__(self, path, prefix="jina_sum"):
+        self.path = path
+        self.prefix = prefix
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT, expire_at REAL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT, expire_at REAL)")
+
+    def get(self, namespace, key):
+        row = self._execute("SELECT value, expire_at FROM kv WHERE key = ?", (self._key(namespace, key),)).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return row[0]
+
+    def set(self, namespace, key, value, ttl):
+        now = time.time()
+        self._execute("INSERT OR REPLACE INTO kv (key, value, expire_at) VALUES (?, ?, ?)",
+                      (self._key(namespace, key), value, now + ttl))
+        with self._writes_lock:
+            self._writes += 1
+            purge = self._writes % self._PURGE_EVERY == 0
+        if purge:
+            self._execute("DELETE FROM kv WHERE expire_at <= ?", (now,))
+
+    def delete(self, namespace, key):
+        self._execute("DELETE FROM kv WHERE key = ?", (self._key(namespace, key),))
+
+    def acquire_lease(self, key, owner, ttl):
+        now = time.time()
+        # 没有租约或租约已过期时写入，其他情况不修改，通过影响的行数判断是否获得
+        cursor = self._execute(
+            "INSERT INTO leases (key, owner, expire_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expire_at = excluded.expire_at "
+            "WHERE leases.expire_at <= ?",
+            (self._key("lease", key), owner, now + ttl, now),
+        )
+        return cursor.rowcount == 1
+
+    def release_lease(self, key, owner):
+        self._execute("DELETE FROM leases WHERE key = ? AND owner = ?", (self._key("lease", key), owner))
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _key(self, namespace, key):
+        return f"{self.prefix}:{namespace}:{_hash_key(key)}"
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _execute(self, sql, params):
+        try:
+            return self._conn().execute(sql, params)
+        except sqlite3.Error as e:
+            raise SharedBackendError(f"SQLite操作失败: {str(e)}")
+
+
+class _ErrorLog:
+    """共享存储出错时按间隔记录日志"""
+
+    def __init__(self):
+        self._last = 0.0
+
+    def warn(self, action, error):
+        now = time.time()
+        if now - self._last >= _ERROR_LOG_INTERVAL:
+            self._last = now
+            logger.warning(f"[JinaSum] 共享缓存{action}失败，改用本地缓存: {str(error)}")
+
+
+class SharedCache:
+    """两级缓存：本地ContentCache在前，共享存储在后
+
+    读取时先查本地，未命中再查共享存储并按原来的提取方式和剩余有效期写回本地；写入时同时写入两级。
+    共享存储出错时只使用本地缓存，不影响消息处理。pop只移除本地副本，共享存储中的条目按TTL过期
+    """
+
+    def __init__(self, local, backend, namespace):
+        self.local = local
+        self.backend = backend
+        self.namespace = namespace
+        self._errors = _ErrorLog()
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def bytes(self):
+        return self.local.bytes
+
+    @property
+    def max_bytes(self):
+        return self.local.max_bytes
+
+    def __len__(self):
+        return len(self.local)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            self._count("local_hits")
+            return value
+        try:
+            record = self.backend.get(self.namespace, key)
+        except SharedBackendError as e:
+            self._count("errors")
+            self._errors.warn("读取", e)
+            return None
+        if record is None:
+            self._count("misses")
+            return None
+        self._count("shared_hits")
+        value, expire_at, strategy = _decode_record(record)
+        if expire_at is None:
+            self.local.set(key, value)
+        elif expire_at > time.time():
+            self.local.set(key, value, expire_at - time.time(), strategy)
+        return value
+
+    def set(self, key, value, ttl=None, strategy=None):
+        ttl = self.local.ttl if ttl is None else ttl
+        self.local.set(key, value, ttl, strategy)
+        try:
+            self.backend.set(self.namespace, key, _encode_record(value, time.time() + ttl, strategy), ttl)
+        except SharedBackendError as e:
+            self._count("errors")
+            self._errors.warn("写入", e)
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def storage_stats(self):
+        return self.local.storage_stats()
+
+    def pop(self, key):
+        return self.local.pop(key)
+
+    def fill_ratio(self):
+        return self.local.fill_ratio()
+
+    def clear(self):
+        self.local.clear()
+
+
+def _encode_record(value, expire_at, strategy):
+    return f"{_RECORD_MARK}{expire_at:.3f}{_RECORD_SEP}{strategy or ''}{_RECORD_SEP}{value}"
+
+
+def _decode_record(record):
+    """解析共享存储中的条目
+
+    Returns:
+        tuple: (内容, 过期时间, 提取方式)，旧格式的条目过期时间和提取方式为None
+    """
+    if not record.startswith(_RECORD_MARK):
+        return record, None, None
+    expire_at, strategy, value = record[1:].split(_RECORD_SEP, 2)
+    return value, float(expire_at), strategy or None
+
+
+class SharedSingleFlight:
+    """跨实例的并发去重
+
+    本进程内先由SingleFlight合并同一URL的并发请求，只有一个线程再去获取共享租约：
+    获得租约的实例执行提取，其他实例轮询共享缓存等待结果；
+    租约释放后仍没有结果（如提取失败）时重新竞争租约，等待超过wait_timeout时自己执行
+    """
+
+    def __init__(self, local, backend, cache, lease_ttl=60, wait_timeout=30, poll_interval=0.5):
+        self.local = local
+        self.backend = backend
+        self.cache = cache
+        self.lease_ttl = lease_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._errors = _ErrorLog()
+        self._stats = {"leased": 0, "reused": 0, "wait_timeouts": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+
+    def in_flight(self, key):
+        return self.local.in_flight(key)
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def do(self, key, fn):
+        return self.local.do(key, lambda: self._do_shared(key, fn))
+
+    def _do_shared(self, key, fn):
+        deadline = time.time() + self.wait_timeout
+        while True:
+            try:
+                acquired = self.backend.acquire_lease(key, self.owner, self.lease_ttl)
+            except SharedBackendError as e:
+                self._count("errors")
+                self._errors.warn("加锁", e)
+                return fn()
+            # 获得租约后再查一次缓存，上一个持有者可能刚写入结果并释放租约
+            value = self.cache.get(key)
+            if acquired:
+                if value is None:
+                    self._count("leased")
+                    try:
+                        return fn()
+                    finally:
+                        self._release(key)
+                self._release(key)
+
+            # 其他实例已提取完成或正在提取，等待结果写入共享缓存
+            if value is not None:
+                self._count("reused")
+                logger.debug(f"[JinaSum] 使用其他实例的提取结果: {key}")
+                return value
+            if time.time() >= deadline:
+                self._count("wait_timeouts")
+                logger.warning(f"[JinaSum] 等待其他实例提取超时，自行提取: {key}")
+                return fn()
+            time.sleep(self.poll_interval)
+
+    def _release(self, key):
+        try:
+            self.backend.release_lease(key, self.owner)
+        except SharedBackendError as e:
+            self._count("errors")
+            self._errors.warn("解锁", e)
@@ -0,0 +1,221 @@
+# encoding:utf-8
+import json
+import re
+import time
+from html import unescape
+from typing import NamedTuple
+
+from .extractors import format_article
+
+# 优先使用orjson解析，未安装时使用标准库
+try:
+    import orjson
+    _loads = orjson.loads
+    _JSON_ERRORS = (orjson.JSONDecodeError, ValueError)
+except ImportError:
+    _loads = json.loads
+    _JSON_ERRORS = (ValueError,)
+
+_JSON_LD = re.compile(
+    r"<script[^>]*type=[\"']application/ld\+json[\"'][^>]*>(.*?)</script>",
+    re.DOTALL | re.IGNORECASE,
+)
+_NEXT_DATA = re.compile(
+    r"<script[^>]*id=[\"']__NEXT_DATA__[\"'][^>]*>(.*?)</script>",
+    re.DOTALL | re.IGNORECASE,
+)
+# window.__INITIAL_STATE__ = {...}，从赋值处截取到所在脚本结束，对象之后的其他语句在解析时忽略
+_STATE_ASSIGNMENT = re.compile(
+    r"window\.(?:__INITIAL_STATE__|__INITIAL_DATA__|__PRELOADED_STATE__|jsonData)\s*=\s*(\{.*?)</script>",
+    re.DOTALL,
+)
+# 部分站点（如小红书）的状态对象中包含JavaScript的undefined
+_JS_UNDEFINED = re.compile(r"(?<=[:\[,])undefined(?=[,}\]])")
+_META = re.compile(r"<meta\s+[^>]*>", re.IGNORECASE)
+_META_ATTR = re.compile(r"(property|name|content)\s*=\s*[\"']([^\"']*)[\"']", re.IGNORECASE)
+_HTML_TAG = re.compile(r"<[a-zA-Z/][^>]*>")
+
+_ARTICLE_TYPES = {"Article", "NewsArticle", "BlogPosting", "Report", "TechArticle", "SocialMediaPosting"}
+_BODY_KEYS = ("articleBody", "content", "body", "html", "desc", "text")
+_TITLE_KEYS = ("headline", "title", "name")
+_AUTHOR_KEYS = ("author", "nickname", "authorName", "user", "source")
+_DATE_KEYS = ("datePublished", "publish_time", "publishTime", "createdAt", "created", "time")
+
+_PREFIX_DECODER = json.JSONDecoder()
+
+# 正文至少需要的字符数，避免把摘要、标签当作正文
+_MIN_BODY_LENGTH = 200
+# 遍历嵌入数据时最多访问的节点数，防止超大状态对象耗费过多CPU
+_MAX_NODES = 50000
+
+
+class StructuredArticle(NamedTuple):
+    """从页面嵌入数据中提取的文章"""
+    title: str
+    author: str
+    publish_time: str
+    content: str
+    source: str
+
+    def as_content(self):
+        return format_article(self.title, self.author, self.publish_time, self.content)
+
+
+def extract_structured_article(html_text):
+    """从页面嵌入的结构化数据中提取文章
+
+    依次尝试JSON-LD的articleBody、Next.js的__NEXT_DATA__和window.__INITIAL_STATE__等状态对象，
+    只用正则定位数据块，不构建DOM；缺少的标题、作者、日期从OpenGraph元数据中补全
+
+    Args:
+        html_text: 页面HTML
+
+    Returns:
+        StructuredArticle: 文章信息，页面中没有可用的正文时返回None
+    """
+    article = _from_json_ld(html_text) or _from_embedded_state(html_text)
+    if article is None:
+        return None
+
+    # 缺少的元数据使用OpenGraph补全
+    if not (article.title and article.author and article.publish_time):
+        meta = extract_open_graph(html_text)
+        article = article._replace(
+            title=article.title or meta.get("og:title") or "",
+            author=article.author or meta.get("article:author") or meta.get("author") or "",
+            publish_time=article.publish_time or _format_date(meta.get("article:published_time")),
+        )
+    return article
+
+
+def extract_open_graph(html_text):
+    """提取<head>中的OpenGraph和常见meta信息"""
+    head_end = html_text.find("</head>")
+    head = html_text[:head_end] if head_end > 0 else html_text[:20000]
+    meta = {}
+    for tag in _META.findall(head):
+        attrs = {k.lower(): v for k, v in _META_ATTR.findall(tag)}
+        key = attrs.get("property") or attrs.get("name")
+        if key and "content" in attrs and key.lower() not in meta:
+            meta[key.lower()] = attrs["content"].strip()
+    return meta
+
+
+def _from_json_ld(html_text):
+    for block in _JSON_LD.findall(html_text):
+        data = _parse_json(block)
+        if data is None:
+            continue
+        nodes = data if isinstance(data, list) else data.get("@graph", [data]) if isinstance(data, dict) else []
+        for node in nodes:
+            if not isinstance(node, dict):
+                continue
+            node_type = node.get("@type")
+            types = {t for t in (node_type if isinstance(node_type, list) else [node_type]) if isinstance(t, str)}
+            body = node.get("articleBody")
+            if types & _ARTICLE_TYPES and isinstance(body, str) and len(body) >= _MIN_BODY_LENGTH:
+                return StructuredArticle(
+                    title=_as_text(node.get("headline") or node.get("name")),
+                    author=_author_name(node.get("author")),
+                    publish_time=_format_date(node.get("datePublished")),
+                    content=_strip_html(body),
+                    source="json-ld",
+                )
+    return None
+
+
+def _from_embedded_state(html_text):
+    candidates = []
+    match = _NEXT_DATA.search(html_text)
+    if match:
+        candidates.append(("next-data", match.group(1)))
+    match = _STATE_ASSIGNMENT.search(html_text)
+    if match:
+        candidates.append(("initial-state", _JS_UNDEFINED.sub("null", match.group(1))))
+
+    for source, text in candidates:
+        data = _parse_json(text)
+        if data is None:
+            continue
+        node, body_key = _find_article_node(data)
+        if node is None:
+            continue
+        return StructuredArticle(
+            title=_as_text(next((node[key] for key in _TITLE_KEYS if node.get(key)), "")),
+            author=_author_name(next((node[key] for key in _AUTHOR_KEYS if node.get(key)), "")),
+            publish_time=_format_date(next((node[key] for key in _DATE_KEYS if node.get(key)), "")),
+            content=_strip_html(node[body_key]),
+            source=source,
+        )
+    return None
+
+
+def _find_article_node(data):
+    """在嵌套数据中找正文最长、且带有标题的对象
+
+    Returns:
+        tuple: (对象, 正文所在的键)，没有找到时返回(None, None)
+    """
+    best, best_key, best_length = None, None, _MIN_BODY_LENGTH - 1
+    stack = [data]
+    visited = 0
+    while stack and visited < _MAX_NODES:
+        node = stack.pop()
+        visited += 1
+        if isinstance(node, dict):
+            if any(isinstance(node.get(key), str) and node.get(key) for key in _TITLE_KEYS):
+                for key in _BODY_KEYS:
+                    value = node.get(key)
+                    if isinstance(value, str) and len(value) > best_length:
+                        best, best_key, best_length = node, key, len(value)
+            stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            stack.extend(v for v in node if isinstance(v, (dict, list)))
+    return best, best_key
+
+
+def _parse_json(text):
+    """解析JSON，整体解析失败时只解析开头的完整对象，忽略其后的脚本语句"""
+    text = text.strip()
+    try:
+        return _loads(text)
+    except _JSON_ERRORS:
+        pass
+    try:
+        return _PREFIX_DECODER.raw_decode(text)[0]
+    except ValueError:
+        return None
+
+
+def _as_text(value):
+    return value.strip() if isinstance(value, str) else ""
+
+
+def _author_name(value):
+    if isinstance(value, list):
+        return ", ".join(filter(None, (_author_name(v) for v in value)))
+    if isinstance(value, dict):
+        return _as_text(value.get("name") or value.get("nickname"))
+    return _as_text(value)
+
+
+def _format_date(value):
+    """统一日期格式，支持ISO字符串和秒/毫秒时间戳"""
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+        timestamp = int(value)
+        if timestamp > 10 ** 11:  # 毫秒时间戳
+            timestamp //= 1000
+        return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+    if isinstance(value, str):
+        return value[:10]
+    return ""
+
+
+def _strip_html(text):
+    """正文可能是HTML片段，转换为按段落分行的纯文本"""
+    if not _HTML_TAG.search(text):
+        return text.strip()
+    text = re.sub(r"<(?:br|/p|/div|/h\d|/li)[^>]*>", "\n", text, flags=re.IGNORECASE)
+    text = _HTML_TAG.sub("", text)
+    lines = (line.strip() for line in unescape(text).splitlines())
+    return "\n".join(line for line in lines if line)
@@ -0,0 +1,92 @@
+# encoding:utf-8
+import json
+import os
+import time
+import unittest
+
+from ..bilibili import (
+    build_video_content, is_short_link, parse_player_subtitles, parse_subtitle_body, parse_tags, parse_video_url,
+    parse_view, pick_subtitle, select_page, video_cache_key,
+)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "bilibili")
+
+
+def load_fixture(name):
+    """按接口实际返回结构整理的样本：视频信息、标签、播放器字幕列表和字幕文件"""
+    with open(os.path.join(FIXTURE_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class VideoUrlTest(unittest.TestCase):
+    def test_parses_bvid_and_page(self):
+        params, page = parse_video_url("https://www.bilibili.com/video/BV1GJ411x7h7/?p=2&share_source=copy_web")
+        self.assertEqual(params, {"bvid": "BV1GJ411x7h7"})
+        self.assertEqual(page, 2)
+
+    def test_parses_aid_and_ignores_invalid_page(self):
+        params, page = parse_video_url("https://m.bilibili.com/video/av80433022?p=0")
+        self.assertEqual(params, {"aid": "80433022"})
+        self.assertEqual(page, 1)
+        self.assertEqual(video_cache_key(params), "bilibili:av80433022")
+
+    def test_rejects_non_video_links(self):
+        self.assertIsNone(parse_video_url("https://space.bilibili.com/12345678"))
+        self.assertTrue(is_short_link("https://b23.tv/abc123"))
+        self.assertFalse(is_short_link("https://www.bilibili.com/video/BV1GJ411x7h7"))
+
+
+class ApiPayloadTest(unittest.TestCase):
+    def test_view_selects_page(self):
+        view = parse_view(load_fixture("view.json"))
+        self.assertEqual(select_page(view, 2), (137651002, "下：充电习惯"))
+        # 分P不存在时使用第一P
+        self.assertEqual(select_page(view, 9), (137649199, None))
+
+    def test_view_error_raises(self):
+        with self.assertRaises(ValueError):
+            parse_view(load_fixture("view_error.json"))
+
+    def test_tags_skip_empty_names(self):
+        self.assertEqual(parse_tags(load_fixture("tags.json")), ["科普", "锂电池"])
+
+    def test_subtitle_prefers_manual_chinese(self):
+        subtitles = parse_player_subtitles(load_fixture("player.json"))
+        self.assertEqual(pick_subtitle(subtitles), "https://i0.hdslb.com/bfs/subtitle/zh_9c4e.json")
+        # 没有人工中文字幕时使用AI中文字幕，再没有时使用任意语言
+        without_manual = [s for s in subtitles if s["lan"] != "zh-CN"]
+        self.assertIn("aisubtitle.hdslb.com", pick_subtitle(without_manual))
+        self.assertIn("en_3f2a", pick_subtitle([s for s in without_manual if s["lan"] == "en-US"]))
+
+    def test_subtitle_list_without_urls(self):
+        # 视频信息中的字幕列表常常没有地址，需要再请求播放器接口
+        view = parse_view(load_fixture("view.json"))
+        self.assertIsNone(pick_subtitle(view["subtitle"]["list"]))
+
+    def test_subtitle_body_skips_blank_lines(self):
+        self.assertEqual(parse_subtitle_body(load_fixture("subtitle.json")), [
+            "大家好，欢迎回到科普实验室", "今天聊聊充电习惯", "电量保持在两成到八成之间最好",
+        ])
+
+
+class VideoContentTest(unittest.TestCase):
+    def test_builds_article_text(self):
+        view = parse_view(load_fixture("view.json"))
+        transcript = parse_subtitle_body(load_fixture("subtitle.json"))
+        content = build_video_content(view, parse_tags(load_fixture("tags.json")), transcript, part="下：充电习惯")
+        publish_date = time.strftime("%Y-%m-%d", time.localtime(view["pubdate"]))
+        self.assertTrue(content.startswith(
+            f"标题: 十分钟看懂锂电池为什么会衰减\n作者: 科普实验室\n发布日期: {publish_date}\n"))
+        self.assertIn("来源: 哔哩哔哩视频（时长 20:54，分区 科学科普）", content)
+        self.assertIn("分P: 下：充电习惯\n标签: 科普, 锂电池", content)
+        self.assertIn("简介:\n电池容量为什么越用越少？", content)
+        self.assertTrue(content.endswith("字幕:\n大家好，欢迎回到科普实验室\n今天聊聊充电习惯\n电量保持在两成到八成之间最好"))
+
+    def test_truncates_transcript(self):
+        view = parse_view(load_fixture("view.json"))
+        content = build_video_content(view, transcript=["一二三四五六"], max_chars=4)
+        self.assertTrue(content.endswith("字幕:\n一二三四"))
+
+
+if __name__ == "__main__":
+    unittest.main()
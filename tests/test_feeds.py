@@ -0,0 +1,46 @@
+# encoding:utf-8
+import unittest
+
+from ..feeds import parse_feed
+
+RSS = """<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0"><channel><title>订阅</title>
+<item><title>第一篇</title><link>https://example.com/a1</link></item>
+<item><title>第二篇</title><link> https://example.com/a2 </link></item>
+<item><title>没有链接</title></item>
+</channel></rss>""".encode("utf-8")
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>feed</title>
+<entry><link rel="enclosure" href="https://example.com/a1.mp3"/><link href="https://example.com/a1"/></entry>
+<entry><link rel="alternate" href="ftp://example.com/a2"/></entry>
+</feed>"""
+
+ENTITY_EXPANSION = b"""<?xml version="1.0"?>
+<!DOCTYPE rss [<!ENTITY a "aaaaaaaaaa"><!ENTITY b "&a;&a;&a;&a;&a;&a;&a;&a;&a;&a;">]>
+<rss><channel><item><link>https://example.com/&b;</link></item></channel></rss>"""
+
+EXTERNAL_ENTITY = b"""<?xml version="1.0"?>
+<!DOCTYPE rss [<!ENTITY secret SYSTEM "file:///etc/passwd">]>
+<rss><channel><item><link>https://example.com/&secret;</link></item></channel></rss>"""
+
+
+class ParseFeedTest(unittest.TestCase):
+    def test_rss_links(self):
+        self.assertEqual(parse_feed(RSS), ["https://example.com/a1", "https://example.com/a2"])
+
+    def test_atom_alternate_links(self):
+        self.assertEqual(parse_feed(ATOM), ["https://example.com/a1"])
+
+    def test_rejects_entity_declarations(self):
+        for body in (ENTITY_EXPANSION, EXTERNAL_ENTITY):
+            with self.assertRaises(ValueError):
+                parse_feed(body)
+
+    def test_rejects_bare_doctype(self):
+        with self.assertRaises(ValueError):
+            parse_feed(b'<?xml version="1.0"?><!DOCTYPE rss SYSTEM "http://example.com/rss.dtd"><rss/>')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+# encoding:utf-8
+import time
+import unittest
+
+from ..pending_store import PendingMessageStore
+
+
+class PendingMessageStoreTest(unittest.TestCase):
+    def test_count_excludes_expired_entries(self):
+        evicted = []
+        store = PendingMessageStore(ttl=0.05, on_evict=evicted.append)
+        store.add("group", "https://example.com/a")
+        store.add("group", "https://example.com/b")
+        self.assertEqual(store.count("group"), 2)
+        time.sleep(0.1)
+        self.assertEqual(store.count("group"), 0)
+        # 过期的条目在count中清理并回调
+        self.assertEqual([entry.content for entry in evicted], ["https://example.com/a", "https://example.com/b"])
+        self.assertEqual(len(store), 0)
+
+    def test_take_by_index(self):
+        store = PendingMessageStore(ttl=60, max_per_chat=2)
+        for url in ("https://example.com/a", "https://example.com/b", "https://example.com/c"):
+            store.add("group", url)
+        # 超出单会话上限时丢弃最早的分享
+        self.assertEqual(store.count("group"), 2)
+        self.assertEqual(store.take("group", 2).content, "https://example.com/b")
+        self.assertIsNone(store.take("group", 2))
+        self.assertEqual(store.take("group").content, "https://example.com/c")
+        self.assertEqual(store.count("group"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
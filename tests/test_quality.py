@@ -0,0 +1,52 @@
+# encoding:utf-8
+import json
+import os
+import unittest
+
+from ..quality import DEFAULT_THRESHOLD, evaluate, score_content
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "quality_corpus.jsonl")
+
+
+def load_corpus():
+    """标注样本：label为人工判断的"内容足够好，可以停止尝试更慢的提取方法"，kind说明样本类型"""
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class QualityCorpusTest(unittest.TestCase):
+    def test_default_threshold_separates_corpus(self):
+        samples = load_corpus()
+        result = evaluate([(sample["text"], sample["label"]) for sample in samples])
+        misjudged = [
+            (sample["kind"], score_content(sample["text"]).score) for sample in samples
+            if score_content(sample["text"]).is_good() != sample["label"]
+        ]
+        self.assertEqual(result["accuracy"], 1.0, f"阈值{DEFAULT_THRESHOLD}下判断错误的样本: {misjudged}")
+
+    def test_threshold_has_margin(self):
+        # 阈值上下留有余量，评分的小幅调整不会直接改变判断结果
+        samples = load_corpus()
+        good = min(score_content(s["text"]).score for s in samples if s["label"])
+        bad = max(score_content(s["text"]).score for s in samples if not s["label"])
+        self.assertGreaterEqual(good - DEFAULT_THRESHOLD, 0.03)
+        self.assertGreaterEqual(DEFAULT_THRESHOLD - bad, 0.03)
+
+
+class MojibakeTest(unittest.TestCase):
+    def test_single_replacement_char_barely_penalized(self):
+        text = "这是一篇结构完整的短文，介绍了新版本的主要改动。" * 8
+        damaged = text[:100] + "�" + text[101:]
+        self.assertEqual(score_content(damaged).language, "zh")
+        self.assertGreater(score_content(damaged).score, score_content(text).score * 0.95)
+
+    def test_garbled_text_penalized(self):
+        text = "这是一篇结构完整的短文，介绍了新版本的主要改动。" * 8
+        garbled = "".join("�" if i % 3 else c for i, c in enumerate(text))
+        result = score_content(garbled)
+        self.assertEqual(result.language, "unknown")
+        self.assertLess(result.score, DEFAULT_THRESHOLD)
+
+
+if __name__ == "__main__":
+    unittest.main()
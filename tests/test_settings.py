@@ -0,0 +1,55 @@
+# encoding:utf-8
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from ..settings import ConfigWatcher, config_source
+
+
+class ConfigSourceTest(unittest.TestCase):
+    def setUp(self):
+        self.plugins_dir = tempfile.mkdtemp()
+        self.plugin_dir = os.path.join(self.plugins_dir, "jina_sum")
+        os.makedirs(self.plugin_dir)
+        self.global_path = os.path.join(self.plugins_dir, "config.json")
+        self.local_path = os.path.join(self.plugin_dir, "config.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.plugins_dir, ignore_errors=True)
+
+    def write(self, path, config):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(config, f)
+        # 保证修改时间变化
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def test_prefers_global_config(self):
+        self.write(self.local_path, {"max_words": 1})
+        self.write(self.global_path, {"godcmd": {"password": "x"}, "jinasum": {"max_words": 2}})
+        self.assertEqual(config_source(self.plugin_dir, "JinaSum"), (self.global_path, "jinasum"))
+
+    def test_falls_back_to_plugin_config(self):
+        self.write(self.global_path, {"godcmd": {"password": "x"}})
+        self.assertEqual(config_source(self.plugin_dir, "JinaSum"), (self.local_path, None))
+        os.remove(self.global_path)
+        self.assertEqual(config_source(self.plugin_dir, "JinaSum"), (self.local_path, None))
+
+    def test_watcher_reads_plugin_section(self):
+        self.write(self.global_path, {"jinasum": {"max_words": 2}})
+        changes = []
+        watcher = ConfigWatcher(self.global_path, changes.append, key="jinasum")
+        self.assertFalse(watcher.check())
+        self.write(self.global_path, {"godcmd": {}, "jinasum": {"max_words": 3}})
+        self.assertTrue(watcher.check())
+        self.assertEqual(changes, [{"max_words": 3}])
+        # 插件的配置被删除时不回调，继续使用当前配置
+        self.write(self.global_path, {"godcmd": {}})
+        self.assertTrue(watcher.check())
+        self.assertEqual(len(changes), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
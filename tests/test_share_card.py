@@ -0,0 +1,39 @@
+# encoding:utf-8
+import unittest
+
+from ..share_card import parse_share_card
+
+CHANNELS_CARD = """<?xml version="1.0"?>
+<msg><appmsg appid="" sdkver="0">
+<title>三分钟做一道家常菜</title>
+<des>食材：<b>鸡蛋</b>两个、<b>番茄</b>一个。先炒蛋再炒番茄。</des>
+<url>https://channels.weixin.qq.com/web/pages/feed?eid=export%2Fabc</url>
+<thumburl>https://finder.video.qq.com/251/20304/stodownload?x=1</thumburl>
+</appmsg><appinfo><version>1</version><appname>视频号</appname></appinfo></msg>"""
+
+ARTICLE_CARD = """<msg><appmsg><title>文章标题</title><des>文章摘要</des>
+<url>https://mp.weixin.qq.com/s/abc</url></appmsg><appinfo><appname></appname></appinfo></msg>"""
+
+
+class ShareCardTest(unittest.TestCase):
+    def test_collects_text_of_nested_elements(self):
+        card = parse_share_card(CHANNELS_CARD)
+        self.assertEqual(card.title, "三分钟做一道家常菜")
+        self.assertEqual(card.des, "食材：鸡蛋两个、番茄一个。先炒蛋再炒番茄。")
+        self.assertEqual(card.appname, "视频号")
+
+    def test_channels_card_is_not_fetchable(self):
+        card = parse_share_card(CHANNELS_CARD)
+        self.assertFalse(card.fetchable)
+        self.assertIn("先炒蛋再炒番茄", card.as_content())
+        self.assertTrue(parse_share_card(ARTICLE_CARD).fetchable)
+
+    def test_regex_fallback_strips_nested_tags(self):
+        # 格式不规范的卡片由正则兜底
+        card = parse_share_card(CHANNELS_CARD.replace("三分钟做", "三分钟<br>做"))
+        self.assertEqual(card.title, "三分钟做一道家常菜")
+        self.assertEqual(card.des, "食材：鸡蛋两个、番茄一个。先炒蛋再炒番茄。")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,234 @@
+# encoding:utf-8
+import io
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+import unittest
+
+from ..cache import ContentCache, SingleFlight, _key_hash
+from ..shared_cache import (
+    RedisBackend, SharedBackendError, SharedCache, SharedSingleFlight, SqliteBackend, _RespConnection,
+)
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """本地RESP服务，只实现插件用到的AUTH/SELECT/GET/SET(NX/PX)/DEL和释放租约的EVAL"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _FakeRedisHandler)
+        self.data = {}  # key -> (value, expire_at)
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def execute(self, args):
+        command = args[0].upper()
+        with self.lock:
+            now = time.time()
+            for key in [k for k, (_, expire_at) in self.data.items() if expire_at is not None and expire_at <= now]:
+                del self.data[key]
+            if command in (b"AUTH", b"SELECT"):
+                return b"+OK\r\n"
+            if command == b"GET":
+                value = self.data.get(args[1])
+                return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value[0]), value[0])
+            if command == b"SET":
+                options = [arg.upper() for arg in args[3:]]
+                if b"NX" in options and args[1] in self.data:
+                    return b"$-1\r\n"
+                expire_at = None
+                if b"PX" in options:
+                    expire_at = now + int(args[3 + options.index(b"PX") + 1]) / 1000
+                self.data[args[1]] = (args[2], expire_at)
+                return b"+OK\r\n"
+            if command == b"DEL":
+                return b":%d\r\n" % (self.data.pop(args[1], None) is not None)
+            if command == b"EVAL":
+                key, owner = args[3], args[4]
+                if self.data.get(key, (None,))[0] == owner:
+                    del self.data[key]
+                    return b":1\r\n"
+                return b":0\r\n"
+        return b"-ERR unknown command\r\n"
+
+
+class _FakeRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line.startswith(b"*"):
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self.server.execute(args))
+
+
+class SharedCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.backend = SqliteBackend(os.path.join(self.directory, "shared.db"))
+
+    def tearDown(self):
+        self.backend.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_shared_hit_keeps_strategy_and_remaining_ttl(self):
+        writer = SharedCache(ContentCache(ttl=3600), self.backend, "content")
+        writer.set("https://example.com/a", "正文", ttl=60, strategy="newspaper")
+
+        local = ContentCache(ttl=3600)
+        reader = SharedCache(local, self.backend, "content")
+        self.assertEqual(reader.get("https://example.com/a"), "正文")
+        self.assertEqual(local.storage_stats()["strategies"], {"newspaper": 1})
+        remaining = local._data[_key_hash("https://example.com/a")].expire_at - time.time()
+        # 过期时间按毫秒保存，可能比60秒多出不到1毫秒
+        self.assertTrue(55 < remaining < 60.01, remaining)
+        self.assertEqual(reader.stats()["shared_hits"], 1)
+
+    def test_reads_entries_without_metadata(self):
+        # 升级前写入的条目只有内容
+        self.backend.set("content", "https://example.com/old", "旧格式正文", 60)
+        local = ContentCache(ttl=3600)
+        self.assertEqual(SharedCache(local, self.backend, "content").get("https://example.com/old"), "旧格式正文")
+        self.assertEqual(len(local), 1)
+
+    def test_stats_are_consistent_across_threads(self):
+        cache = SharedCache(ContentCache(ttl=3600), self.backend, "content")
+        cache.set("https://example.com/a", "正文")
+
+        def read():
+            for _ in range(2000):
+                cache.get("https://example.com/a")
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.stats()["local_hits"], 16000)
+
+
+class LeaseTestMixin:
+    """两种共享存储的租约和跨实例去重测试，子类提供new_backend()"""
+
+    def test_lease_is_exclusive_until_released_by_owner(self):
+        backend = self.new_backend()
+        self.assertTrue(backend.acquire_lease("url", "a", 10))
+        self.assertFalse(backend.acquire_lease("url", "b", 10))
+        # 只有持有者才能释放
+        backend.release_lease("url", "b")
+        self.assertFalse(backend.acquire_lease("url", "b", 10))
+        backend.release_lease("url", "a")
+        self.assertTrue(backend.acquire_lease("url", "b", 10))
+
+    def test_expired_lease_can_be_taken(self):
+        backend = self.new_backend()
+        self.assertTrue(backend.acquire_lease("url", "a", 0.1))
+        time.sleep(0.2)
+        self.assertTrue(backend.acquire_lease("url", "b", 10))
+        # 原持有者的租约已被取代，释放时不影响新持有者
+        backend.release_lease("url", "a")
+        self.assertFalse(backend.acquire_lease("url", "c", 10))
+
+    def test_only_one_instance_fetches(self):
+        fetches = []
+        results = []
+
+        def instance():
+            # 每个实例有自己的本地缓存和本地去重，只共享存储
+            backend = self.new_backend()
+            cache = SharedCache(ContentCache(ttl=3600), backend, "content")
+            flight = SharedSingleFlight(SingleFlight(), backend, cache, lease_ttl=10, wait_timeout=5,
+                                        poll_interval=0.05)
+
+            def fetch():
+                fetches.append(flight.owner)
+                time.sleep(0.3)
+                cache.set("https://example.com/a", "正文")
+                return "正文"
+
+            results.append(flight.do("https://example.com/a", fetch))
+
+        threads = [threading.Thread(target=instance) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(fetches), 1)
+        self.assertEqual(results, ["正文"] * 4)
+
+
+class SqliteLeaseTest(LeaseTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.backends = []
+
+    def tearDown(self):
+        for backend in self.backends:
+            backend.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def new_backend(self):
+        backend = SqliteBackend(os.path.join(self.directory, "shared.db"))
+        self.backends.append(backend)
+        return backend
+
+
+class RedisLeaseTest(LeaseTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRedisServer()
+        self.backends = []
+
+    def tearDown(self):
+        for backend in self.backends:
+            backend.close()
+        self.server.stop()
+
+    def new_backend(self):
+        backend = RedisBackend(port=self.server.port, password="secret", db=1)
+        self.backends.append(backend)
+        return backend
+
+    def test_values_round_trip(self):
+        cache = SharedCache(ContentCache(ttl=3600), self.new_backend(), "content")
+        cache.set("https://example.com/a", "正文", ttl=60, strategy="site")
+        local = ContentCache(ttl=3600)
+        self.assertEqual(SharedCache(local, self.new_backend(), "content").get("https://example.com/a"), "正文")
+        self.assertEqual(local.storage_stats()["strategies"], {"site": 1})
+
+
+class RespReplyTest(unittest.TestCase):
+    def reply(self, data):
+        conn = _RespConnection.__new__(_RespConnection)
+        conn._reader = io.BytesIO(data)
+        return conn._read_reply()
+
+    def test_parses_replies(self):
+        self.assertEqual(self.reply(b"$5\r\nhello\r\n"), b"hello")
+        self.assertIsNone(self.reply(b"$-1\r\n"))
+        self.assertEqual(self.reply(b"*2\r\n:1\r\n+OK\r\n"), [1, b"OK"])
+
+    def test_malformed_length_raises_backend_error(self):
+        for data in (b"$abc\r\n", b":1.5\r\n", b"*x\r\n"):
+            with self.assertRaises(SharedBackendError):
+                self.reply(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+# encoding:utf-8
+import json
+import unittest
+
+from ..structured import extract_structured_article
+
+
+def next_data_page(state):
+    return ('<html><head><script id="__NEXT_DATA__" type="application/json">'
+            + json.dumps(state, ensure_ascii=False) + "</script></head><body></body></html>")
+
+
+class EmbeddedStateTest(unittest.TestCase):
+    def test_uses_longest_body_key(self):
+        body = "这是嵌入在页面状态中的正文段落。" * 30
+        page = next_data_page({"props": {"article": {"title": "标题", "content": "短", "desc": body}}})
+        article = extract_structured_article(page)
+        self.assertEqual(article.source, "next-data")
+        self.assertEqual(article.title, "标题")
+        self.assertEqual(article.content, body)
+
+    def test_ignores_nodes_without_title(self):
+        body = "这是嵌入在页面状态中的正文段落。" * 30
+        page = next_data_page({"props": {"comment": {"content": body}}})
+        self.assertIsNone(extract_structured_article(page))
+
+
+if __name__ == "__main__":
+    unittest.main()
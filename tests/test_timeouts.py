@@ -0,0 +1,49 @@
+# encoding:utf-8
+import unittest
+
+from ..timeouts import DeadlineExceeded, TimeoutPolicy
+
+
+class DeadlineTest(unittest.TestCase):
+    def test_can_wait_keeps_time_for_the_request(self):
+        policy = TimeoutPolicy()
+        self.assertTrue(policy.can_wait(2))
+        with policy.deadline(2):
+            self.assertTrue(policy.can_wait(1))
+            self.assertFalse(policy.can_wait(1.8))
+        self.assertIsNone(policy.remaining())
+
+    def test_check_deadline(self):
+        policy = TimeoutPolicy()
+        with policy.deadline(0.1):
+            with self.assertRaises(DeadlineExceeded):
+                policy.check_deadline()
+        self.assertEqual(policy.stats()["deadline_exceeded"], 1)
+
+
+class AdaptiveTimeoutTest(unittest.TestCase):
+    def test_new_host_uses_ceiling(self):
+        # 其他域名都很快时，新域名仍使用上限，不借用其他域名的分布
+        policy = TimeoutPolicy()
+        for index in range(200):
+            policy.record(f"fast{index % 5}.example", "body", 0.2)
+        self.assertEqual(policy.timeout("fast0.example", "body"), 3)
+        self.assertEqual(policy.timeout("slow.example", "body"), 30)
+
+    def test_timeouts_raise_the_limit_of_a_slow_host(self):
+        # 响应体需要5秒的域名：超时按当时的超时时间记录，超时时间逐渐变长直到请求能够完成
+        policy = TimeoutPolicy()
+        for _ in range(20):
+            policy.record("slow.example", "body", 1.0)
+        for _ in range(10):
+            limit = policy.timeout("slow.example", "body")
+            if limit >= 5:
+                policy.record("slow.example", "body", 5)
+            else:
+                policy.record_timeout("slow.example", "body", limit)
+        self.assertGreaterEqual(policy.timeout("slow.example", "body"), 5)
+        self.assertGreater(policy.stats()["timeouts"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
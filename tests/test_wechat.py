@@ -0,0 +1,31 @@
+# encoding:utf-8
+import unittest
+
+from ..wechat import is_verify_page, parse_wechat_article
+
+ARTICLE = """<html><head><script>var msg_title = '经济观察'.html(false);</script></head><body>
+<h1 id="activity-name">经济观察</h1>
+<div class="rich_media_content" id="js_content"><p>当前经济环境异常复杂，企业需要完成验证后即可继续访问的思路转变。</p>
+<div><p>第二段正文。</p></div></div>
+</body></html>""".encode("utf-8")
+
+VERIFY = """<html><body><div class="weui-msg" id="js_verify">
+<p class="weui-msg__title">环境异常</p><p>完成验证后即可继续访问</p>
+<a href="https://mp.weixin.qq.com/mp/secitptpage/verify?__biz=x">去验证</a></div></body></html>""".encode("utf-8")
+
+
+class VerifyPageTest(unittest.TestCase):
+    def test_article_mentioning_markers_is_not_verify_page(self):
+        self.assertFalse(is_verify_page(ARTICLE))
+        article = parse_wechat_article(ARTICLE)
+        self.assertEqual(article.title, "经济观察")
+        self.assertIn("当前经济环境异常复杂", article.content)
+        self.assertIn("第二段正文。", article.content)
+
+    def test_verify_page(self):
+        self.assertTrue(is_verify_page(VERIFY))
+        self.assertIsNone(parse_wechat_article(VERIFY))
+
+
+if __name__ == "__main__":
+    unittest.main()
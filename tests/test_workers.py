@@ -0,0 +1,54 @@
+# encoding:utf-8
+import unittest
+
+from ..workers import ExtractionPool, html_fragment_text, parse_baidu_html
+
+PARAGRAPH = "锂电池的容量衰减与充放电深度、温度和充电倍率都有关系，日常使用时保持适中的电量区间可以明显延长寿命。"
+SECOND = "高温会加速电解液分解和负极表面膜的增厚，因此夏天尽量不要边充电边运行大型游戏。"
+THIRD = "快充本身并不可怕，真正伤害电池的是长时间满电存放和频繁把电量用到完全耗尽。"
+
+BAIDU_ARTICLE = f"""<html><head><title>页面标题</title></head><body>
+<h1 class="article-title">电池为什么越用越不耐用</h1>
+<div class="author">科普实验室</div>
+<div class="article-content"><p>{PARAGRAPH}</p><div class="recommend">相关推荐</div>
+<p>{SECOND}</p><p>{THIRD}</p><script>var ad = 1;</script></div>
+</body></html>"""
+
+BAIDU_PARAGRAPHS = f"""<html><head><title>页面标题</title></head><body>
+<div class="main"><p>{PARAGRAPH}</p><p>{SECOND}</p><p>{THIRD}</p></div>
+</body></html>"""
+
+
+class BaiduParseTest(unittest.TestCase):
+    def test_selectors(self):
+        result = parse_baidu_html(BAIDU_ARTICLE)
+        self.assertTrue(result.startswith("标题: 电池为什么越用越不耐用\n作者: 科普实验室\n\n"))
+        self.assertIn(PARAGRAPH, result)
+        self.assertNotIn("相关推荐", result)
+        self.assertNotIn("var ad", result)
+
+    def test_paragraph_fallback_uses_title_tag(self):
+        result = parse_baidu_html(BAIDU_PARAGRAPHS)
+        self.assertTrue(result.startswith("标题: 页面标题\n\n"))
+        self.assertIn(PARAGRAPH, result)
+
+    def test_no_content(self):
+        self.assertIsNone(parse_baidu_html("<html><body><h1>标题</h1><p>太短</p></body></html>"))
+
+    def test_fragment_text(self):
+        self.assertEqual(html_fragment_text("<p>第一段</p><style>p{}</style><p>第二段</p>"), "第一段\n第二段")
+
+
+class ExtractionPoolTest(unittest.TestCase):
+    def test_runs_in_worker_and_shuts_down(self):
+        pool = ExtractionPool(workers=1)
+        try:
+            self.assertEqual(pool.run(html_fragment_text, "<p>正文</p>"), "正文")
+        finally:
+            pool.shutdown()
+        # 关闭后在当前进程中执行
+        self.assertEqual(pool.run(html_fragment_text, "<p>正文</p>"), "正文")
+
+
+if __name__ == "__main__":
+    unittest.main()
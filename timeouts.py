@@ -0,0 +1,308 @@
+# encoding:utf-8
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from common.log import logger
+
+# 各阶段：建立TCP连接、发出请求到收到响应头、读取响应体、JavaScript渲染
+STAGES = ("connect", "first_byte", "body", "render")
+
+# 默认的下限和上限（秒），样本不足时使用上限，与原来固定的超时时间相当
+DEFAULT_LIMITS = {
+    "connect": (1, 10),
+    "first_byte": (3, 30),
+    "body": (3, 30),
+    "render": (5, 30),
+}
+
+# 直方图桶的上界：10毫秒到约2分钟，每个桶比上一个大20%
+_BUCKET_START = 0.01
+_BUCKET_FACTOR = 1.2
+_BUCKETS = 52
+
+# 单个直方图的样本数超过这个值时所有计数减半，较早的样本权重逐渐降低
+_DECAY_AT = 1000
+
+# 最多记录的域名数量，超出时淘汰最久未使用的
+_MAX_HOSTS = 2000
+
+# 直方图有变化时最多这么久保存一次（秒）
+_SAVE_INTERVAL = 60
+
+# 剩余时间少于这个值时不再发起请求（秒）
+_MIN_REMAINING = 0.5
+
+
+class DeadlineExceeded(Exception):
+    """单次提取的整体时间已经用完"""
+
+
+class LatencyHistogram:
+    """对数分桶的耗时直方图，只保存每个桶的计数，内存固定"""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, counts=None):
+        self.counts = [0] * _BUCKETS
+        self.total = 0
+        for index, count in (counts or {}).items():
+            index = int(index)
+            if 0 <= index < _BUCKETS and count > 0:
+                self.counts[index] = int(count)
+                self.total += int(count)
+
+    def record(self, seconds):
+        self.counts[_bucket(seconds)] += 1
+        self.total += 1
+        if self.total >= _DECAY_AT:
+            self.counts = [count // 2 for count in self.counts]
+            self.total = sum(self.counts)
+
+    def quantile(self, q):
+        """返回至少q比例的样本不超过的耗时（桶上界），没有样本时返回None"""
+        if not self.total:
+            return None
+        target = q * self.total
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return _bucket_bound(index)
+        return _bucket_bound(_BUCKETS - 1)
+
+    def to_dict(self):
+        return {str(index): count for index, count in enumerate(self.counts) if count}
+
+
+def _bucket(seconds):
+    if seconds <= _BUCKET_START:
+        return 0
+    return min(_BUCKETS - 1, int(math.ceil(math.log(seconds / _BUCKET_START, _BUCKET_FACTOR))))
+
+
+def _bucket_bound(index):
+    return _BUCKET_START * _BUCKET_FACTOR ** index
+
+
+class TimeoutPolicy:
+    """按域名和阶段的耗时分布确定超时时间
+
+    超时 = 该域名该阶段的高分位耗时 × multiplier，限制在[下限, 上限]之间；
+    该域名样本不足时使用上限，不借用其他域名的分布，较慢的新域名不会被其他域名的耗时拖累。
+    超时的请求按当时的超时时间记为样本（实际耗时至少这么长），经常超时的域名超时时间随之变长。
+    deadline()为当前线程设置整体截止时间，之后各阶段的超时都不会超过剩余时间。
+    直方图定期保存到path，重启后继续使用
+    """
+
+    def __init__(self, path=None, enabled=True, percentile=0.99, multiplier=2.0, min_samples=20, limits=None):
+        self.path = path
+        self.enabled = enabled
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.limits = dict(DEFAULT_LIMITS)
+        for stage, (floor, ceiling) in (limits or {}).items():
+            if stage in self.limits:
+                self.limits[stage] = (floor, ceiling)
+        self._lock = threading.Lock()
+        self._hosts = OrderedDict()  # host -> {stage: LatencyHistogram}
+        self._global = {stage: LatencyHistogram() for stage in STAGES}
+        self._local = threading.local()
+        self._dirty = False
+        self._saved_at = time.time()
+        self._stats = {"samples": 0, "timeouts": 0, "adaptive": 0, "fallback": 0, "deadline_capped": 0,
+                       "deadline_exceeded": 0}
+        self._load()
+
+    def timeout(self, host, stage):
+        """返回某个域名某个阶段的超时时间（秒），不超过当前线程剩余的整体时间
+
+        Raises:
+            DeadlineExceeded: 整体时间已经用完
+        """
+        floor, ceiling = self.limits[stage]
+        value = ceiling
+        if self.enabled:
+            with self._lock:
+                histogram = self._hosts.get(host, {}).get(stage)
+                observed = None
+                if histogram is not None and histogram.total >= self.min_samples:
+                    observed = histogram.quantile(self.percentile)
+                self._stats["adaptive" if observed is not None else "fallback"] += 1
+            if observed is not None:
+                value = min(max(observed * self.multiplier, floor), ceiling)
+        return self._cap(value)
+
+    def request_timeout(self, host):
+        """requests使用的(连接超时, 读取超时)"""
+        return self.timeout(host, "connect"), self.timeout(host, "first_byte")
+
+    def record(self, host, stage, seconds):
+        """记录一次成功完成的耗时，连接失败等错误不记录"""
+        self._record(host, stage, seconds, "samples")
+
+    def record_timeout(self, host, stage, limit):
+        """记录一次超时，按当时的超时时间记为样本
+
+        实际耗时至少是limit，按limit记录会低估，但足以让该域名的分位数逐渐升高，超时时间随之变长，
+        最多到上限；只有成功的请求才记录时，超时的域名永远得不到更长的超时
+        """
+        self._record(host, stage, limit, "timeouts")
+
+    def _record(self, host, stage, seconds, counter):
+        if not host:
+            return
+        with self._lock:
+            stages = self._hosts.get(host)
+            if stages is None:
+                stages = self._hosts[host] = {}
+                while len(self._hosts) > _MAX_HOSTS:
+                    self._hosts.popitem(last=False)
+            else:
+                self._hosts.move_to_end(host)
+            stages.setdefault(stage, LatencyHistogram()).record(seconds)
+            self._global[stage].record(seconds)
+            self._stats[counter] += 1
+            self._dirty = True
+            due = time.time() - self._saved_at >= _SAVE_INTERVAL
+        if due:
+            self.save()
+
+    @contextmanager
+    def deadline(self, seconds):
+        """为当前线程设置整体截止时间，嵌套时使用较早的一个"""
+        previous = getattr(self._local, "deadline", None)
+        deadline = time.time() + seconds
+        self._local.deadline = deadline if previous is None else min(previous, deadline)
+        try:
+            yield
+        finally:
+            self._local.deadline = previous
+
+    def remaining(self):
+        """当前线程剩余的整体时间（秒），没有设置截止时间时返回None"""
+        deadline = getattr(self._local, "deadline", None)
+        return None if deadline is None else deadline - time.time()
+
+    def can_wait(self, seconds):
+        """等待seconds秒后是否仍有时间继续请求，没有设置截止时间时返回True"""
+        remaining = self.remaining()
+        return remaining is None or remaining - seconds >= _MIN_REMAINING
+
+    def check_deadline(self):
+        """整体时间已经用完时抛出DeadlineExceeded"""
+        remaining = self.remaining()
+        if remaining is not None and remaining < _MIN_REMAINING:
+            with self._lock:
+                self._stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded("本次提取的整体时间已用完")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["hosts"] = len(self._hosts)
+            stats["global"] = {
+                stage: {
+                    "samples": histogram.total,
+                    f"p{int(self.percentile * 100)}": round(histogram.quantile(self.percentile), 2)
+                    if histogram.total else None,
+                }
+                for stage, histogram in self._global.items()
+            }
+        return stats
+
+    def host_timeouts(self, host):
+        """某个域名当前各阶段的超时时间，用于排查"""
+        return {stage: round(self.timeout(host, stage), 2) for stage in STAGES}
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "hosts": {host: {stage: histogram.to_dict() for stage, histogram in stages.items()}
+                          for host, stages in self._hosts.items()},
+                "global": {stage: histogram.to_dict() for stage, histogram in self._global.items()},
+            }
+            self._dirty = False
+            self._saved_at = time.time()
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"[JinaSum] 保存超时统计失败: {str(e)}")
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for host, stages in data.get("hosts", {}).items():
+                self._hosts[host] = {stage: LatencyHistogram(counts) for stage, counts in stages.items()
+                                     if stage in STAGES}
+            for stage, counts in data.get("global", {}).items():
+                if stage in STAGES:
+                    self._global[stage] = LatencyHistogram(counts)
+            logger.debug(f"[JinaSum] 已加载{len(self._hosts)}个域名的超时统计")
+        except Exception as e:
+            logger.warning(f"[JinaSum] 加载超时统计失败，重新统计: {str(e)}")
+            self._hosts.clear()
+
+    def _cap(self, value):
+        remaining = self.remaining()
+        if remaining is None:
+            return value
+        if remaining < _MIN_REMAINING:
+            self.check_deadline()
+        if remaining < value:
+            with self._lock:
+                self._stats["deadline_capped"] += 1
+            return remaining
+        return value
+
+
+def install_connect_timer(adapter, on_connect):
+    """让HTTPAdapter新建连接时报告TCP连接耗时
+
+    Args:
+        adapter: requests的HTTPAdapter
+        on_connect: 回调，参数为(域名, 秒数)
+    """
+
+    class TimedHTTPConnection(HTTPConnection):
+        def _new_conn(self):
+            start = time.time()
+            conn = super()._new_conn()
+            on_connect(self.host, time.time() - start)
+            return conn
+
+    class TimedHTTPSConnection(HTTPSConnection):
+        def _new_conn(self):
+            start = time.time()
+            conn = super()._new_conn()
+            on_connect(self.host, time.time() - start)
+            return conn
+
+    class TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = TimedHTTPConnection
+
+    class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = TimedHTTPSConnection
+
+    adapter.poolmanager.pool_classes_by_scheme = {
+        "http": TimedHTTPConnectionPool,
+        "https": TimedHTTPSConnectionPool,
+    }
@@ -0,0 +1,143 @@
+# encoding:utf-8
+import html
+import re
+import time
+from typing import NamedTuple
+
+from lxml import etree
+from lxml import html as lxml_html
+
+# 验证/风控页面的特征，页面没有正文区域#js_content时命中任意一个即认为无法获取正文
+_VERIFY_MARKERS = (
+    "环境异常".encode("utf-8"),
+    "完成验证后即可继续访问".encode("utf-8"),
+    b"secitptpage/verify",
+    b'id="js_verify"',
+)
+
+# 页面内联脚本中的文章元数据，例如 var msg_title = '...'.html(false);
+_JS_STRING = rb"""\s*=\s*(?:htmlDecode\()?\s*(['"])(.*?)(?<!\\)\1"""
+_JS_VARS = {
+    "title": re.compile(rb"var\s+msg_title" + _JS_STRING, re.DOTALL),
+    "description": re.compile(rb"var\s+msg_desc" + _JS_STRING, re.DOTALL),
+    "author": re.compile(rb"var\s+nickname" + _JS_STRING, re.DOTALL),
+    "publish_time": re.compile(rb"var\s+ct" + _JS_STRING, re.DOTALL),
+}
+
+# 脚本变量缺失时，直接定位页面中的标题和公众号名称
+_TITLE_ELEM = re.compile(rb'id="activity-name"[^>]*>(.*?)</h1>', re.DOTALL)
+_AUTHOR_ELEM = re.compile(rb'id="js_name"[^>]*>(.*?)</', re.DOTALL)
+_CONTENT_START = re.compile(rb'<div[^>]*\bid="js_content"')
+_DIV_TAG = re.compile(rb"<(/?)div\b", re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+
+
+class WechatArticle(NamedTuple):
+    """微信公众号文章"""
+    title: str
+    author: str
+    publish_time: str
+    description: str
+    content: str
+
+    def as_content(self):
+        """构建与其他提取方法一致的文本格式"""
+        full_content = ""
+        if self.title:
+            full_content += f"标题: {self.title}\n"
+        if self.author:
+            full_content += f"作者: {self.author}\n"
+        if self.publish_time:
+            full_content += f"发布日期: {self.publish_time}\n"
+        if self.description:
+            full_content += f"摘要: {self.description}\n"
+        return full_content + f"\n{self.content}"
+
+
+def is_verify_page(body):
+    """判断页面是否为微信的环境异常/验证拦截页，只做字节查找不解析HTML
+
+    有正文区域的页面一定是文章，正文中出现"环境异常"等字样时不能当作拦截页
+    """
+    if _CONTENT_START.search(body):
+        return False
+    return any(marker in body for marker in _VERIFY_MARKERS)
+
+
+def parse_wechat_article(body):
+    """从微信公众号文章页面中提取正文和元数据
+
+    只在原始字节中定位#js_content区域并解析这一小段，元数据从内联脚本变量中读取，
+    页面其余部分（大量内联脚本、样式）不做解析
+
+    Args:
+        body: 页面原始字节
+
+    Returns:
+        WechatArticle: 文章信息，找不到正文区域时返回None
+    """
+    content = _extract_content(body)
+    if content is None:
+        return None
+
+    meta = {}
+    for name, pattern in _JS_VARS.items():
+        match = pattern.search(body)
+        if match:
+            meta[name] = _decode_js_string(match.group(2))
+
+    title = meta.get("title") or _extract_element_text(_TITLE_ELEM, body)
+    author = meta.get("author") or _extract_element_text(_AUTHOR_ELEM, body)
+
+    publish_time = ""
+    if meta.get("publish_time", "").isdigit():
+        publish_time = time.strftime("%Y-%m-%d", time.localtime(int(meta["publish_time"])))
+
+    return WechatArticle(
+        title=title,
+        author=author,
+        publish_time=publish_time,
+        description=meta.get("description", ""),
+        content=content,
+    )
+
+
+def _extract_content(body):
+    """定位#js_content所在的div并提取纯文本"""
+    start_match = _CONTENT_START.search(body)
+    if start_match is None:
+        return None
+
+    # 从起始div开始计数嵌套层级，找到与之匹配的结束标签
+    depth = 0
+    end = len(body)
+    for tag in _DIV_TAG.finditer(body, start_match.start()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            end = body.find(b">", tag.end()) + 1 or len(body)
+            break
+
+    fragment = lxml_html.fragment_fromstring(
+        body[start_match.start():end].decode("utf-8", errors="replace"),
+        create_parent="div",
+    )
+    etree.strip_elements(fragment, "script", "style", "svg", with_tail=False)
+    lines = (text.strip() for text in fragment.itertext())
+    return "\n".join(line for line in lines if line)
+
+
+def _extract_element_text(pattern, body):
+    match = pattern.search(body)
+    if not match:
+        return ""
+    text = _TAG.sub("", match.group(1).decode("utf-8", errors="replace"))
+    return html.unescape(text).strip()
+
+
+def _decode_js_string(raw):
+    """解码脚本中的字符串字面量，处理\\x26这类转义和HTML实体"""
+    text = raw.decode("utf-8", errors="replace")
+    text = re.sub(r"\\x([0-9a-fA-F]{2})", lambda m: chr(int(m.group(1), 16)), text)
+    text = re.sub(r"\\u([0-9a-fA-F]{4})", lambda m: chr(int(m.group(1), 16)), text)
+    text = text.replace("\\n", "\n").replace("\\'", "'").replace('\\"', '"').replace("\\\\", "\\")
+    return html.unescape(text).strip()
@@ -0,0 +1,456 @@
+# encoding:utf-8
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from bs4 import BeautifulSoup
+
+from common.log import logger
+
+from .extractors import AD_SELECTOR, GENERIC_CONTENT_SELECTORS, GENERIC_TITLE_SELECTORS, select_first_text
+from .quality import DEFAULT_THRESHOLD, score_content
+
+# 本模块中的解析、评分、清洗函数都是纯函数：只接收已解码的页面文本和简单参数，只返回字符串或元组，
+# 既可以在插件进程中直接调用，也可以提交到ExtractionPool在子进程中执行
+
+_GENERAL_REMOVE_TAGS = ['script', 'style', 'nav', 'header', 'footer', 'aside', 'form', 'iframe']
+_RENDERED_REMOVE_TAGS = ['script', 'style', 'nav', 'header', 'footer', 'aside']
+_RENDERED_TITLE_SELECTORS = ('h1', 'title', '.title', '[class*="title" i]')
+_RENDERED_CONTENT_SELECTORS = (
+    'article', 'main', '.content', '.article',
+    '[class*="content" i]', '[class*="article" i]',
+    '#content', '#article',
+)
+_EXTRA_BLANK_LINES = re.compile(r'\n{3,}')
+_BAIDU_TITLE_SELECTORS = ('.article-title', '.title', 'h1.title', 'h1')
+_BAIDU_AUTHOR_SELECTORS = ('.author', '.writer', '.source', '.article-author')
+_BAIDU_CONTENT_SELECTORS = ('.article-content', '.article-detail', '.content', '.artcle', '#article')
+
+# 进程池连续损坏这么多次后暂停使用（如子进程无法导入依赖、启动后立即崩溃）
+MAX_CONSECUTIVE_FAILURES = 3
+# 暂停使用进程池的时间（秒），期间在插件进程内解析，之后再尝试重建
+FAILURE_COOLDOWN = 600
+
+# 内容清洗规则，按顺序依次替换
+_CLEAN_RULES = tuple((re.compile(pattern, flags), repl) for pattern, repl, flags in (
+    # 移除Markdown图片标签
+    (r'!\[.*?\]\(.*?\)', '', 0),
+    (r'\[!\[.*?\]\(.*?\)', '', 0),  # 嵌套图片标签
+    # 移除图片描述 (通常在方括号或特定格式中)
+    (r'\[图片\]|\[image\]|\[img\]|\[picture\]', '', re.IGNORECASE),
+    (r'\[.*?图片.*?\]', '', 0),
+    # 移除阅读时间、字数等元数据
+    (r'本文字数：\d+，阅读时长大约\d+分钟', '', 0),
+    (r'阅读时长[:：].*?分钟', '', 0),
+    (r'字数[:：]\d+', '', 0),
+    # 移除日期标记和时间戳
+    (r'\d{4}[\.年/-]\d{1,2}[\.月/-]\d{1,2}[日号]?(\s+\d{1,2}:\d{1,2}(:\d{1,2})?)?', '', 0),
+    # 移除分隔线
+    (r'\*\s*\*\s*\*', '', 0),
+    (r'-{3,}', '', 0),
+    (r'_{3,}', '', 0),
+    # 移除网页中常见的广告标记
+    (r'广告\s*[\.。]?', '', re.IGNORECASE),
+    (r'赞助内容', '', re.IGNORECASE),
+    (r'sponsored content', '', re.IGNORECASE),
+    (r'advertisement', '', re.IGNORECASE),
+    (r'promoted content', '', re.IGNORECASE),
+    (r'推广信息', '', re.IGNORECASE),
+    (r'\[广告\]', '', re.IGNORECASE),
+    (r'【广告】', '', re.IGNORECASE),
+    # 移除URL链接和空的Markdown链接
+    (r'https?://\S+', '', 0),
+    (r'www\.\S+', '', 0),
+    (r'\[\]\(.*?\)', '', 0),  # 空链接引用 [](...)
+    (r'\[.+?\]\(\s*\)', '', 0),  # 有文本无链接 [text]()
+    # 清理Markdown格式但保留文本内容
+    (r'\*\*(.+?)\*\*', r'\1', 0),  # 移除加粗标记但保留内容
+    (r'\*(.+?)\*', r'\1', 0),  # 移除斜体标记但保留内容
+    (r'`(.+?)`', r'\1', 0),  # 移除代码标记但保留内容
+    # 清理文章尾部的"微信编辑"和"推荐阅读"等无关内容
+    (r'\*\*微信编辑\*\*.*?$', '', re.MULTILINE),
+    (r'\*\*推荐阅读\*\*.*?$', '', re.MULTILINE | re.DOTALL),
+    # 清理多余的空白字符
+    (r'\n{3,}', '\n\n', 0),  # 移除多余空行
+    (r'\s{2,}', ' ', 0),  # 移除多余空格
+    (r'^\s+', '', re.MULTILINE),  # 移除行首空白
+    (r'\s+$', '', re.MULTILINE),  # 移除行尾空白
+))
+
+
+def clean_content(content, extra_patterns=()):
+    """清洗内容，去除图片、链接、广告等无用信息
+
+    Args:
+        content: 原始内容
+        extra_patterns: 配置中额外的已编译正则，匹配的文本在内置规则之后移除
+
+    Returns:
+        str: 清洗后的内容
+    """
+    for pattern, repl in _CLEAN_RULES:
+        content = pattern.sub(repl, content)
+    for pattern in extra_patterns:
+        content = pattern.sub('', content)
+    return content
+
+
+def parse_general_html(html_text):
+    """通用提取的解析和评分阶段：从静态页面中找出得分最高的正文元素
+
+    Args:
+        html_text: 已解码的页面
+
+    Returns:
+        tuple: (提取的内容, 正文元素的HTML长度)，没有找到正文时内容为None
+    """
+    soup = BeautifulSoup(html_text, 'html.parser')
+    try:
+        # 移除无用元素
+        for element in soup(_GENERAL_REMOVE_TAGS):
+            element.extract()
+
+        # 寻找可能的标题，按顺序尝试预编译的标题选择器，找到即停止
+        title = select_first_text(soup, GENERIC_TITLE_SELECTORS)
+
+        # 1. 尝试找常见的内容容器
+        content_candidates = []
+        for selector in GENERIC_CONTENT_SELECTORS:
+            elements = selector.select(soup)
+            if elements:
+                content_candidates.extend(elements)
+
+        # 2. 如果没有找到明确的内容容器，寻找具有最多文本的div元素
+        if not content_candidates:
+            paragraphs = {}
+            for elem in soup.find_all(['p', 'div']):
+                text = elem.get_text(strip=True)
+                # 只考虑有实际内容的元素
+                if len(text) > 100:
+                    paragraphs[elem] = len(text)
+
+            if paragraphs:
+                max_elem = max(paragraphs.items(), key=lambda x: x[1])[0]
+                # 如果是div，直接添加；如果是p，尝试找包含多个段落的父元素
+                if max_elem.name == 'div':
+                    content_candidates.append(max_elem)
+                else:
+                    parent = max_elem.parent
+                    if parent and len(parent.find_all('p')) > 3:
+                        content_candidates.append(parent)
+                    else:
+                        content_candidates.append(max_elem)
+
+        # 3. 简单算法来评分和选择最佳内容元素
+        best_content = None
+        best_html_length = 0
+        max_score = 0
+        for element in content_candidates:
+            text_length = len(element.get_text(strip=True))
+            # 计算文本密度（文本长度/HTML长度）
+            html_length = len(str(element))
+            text_density = text_length / html_length if html_length > 0 else 0
+
+            score = (
+                text_length * 1.0 +  # 文本长度很重要
+                text_density * 100 +  # 文本密度很重要
+                len(element.find_all('p')) * 30 +  # 段落数量也很重要
+                len(element.find_all('img')) * 10  # 图片不太重要，但也是一个指标
+            )
+
+            # 减分项：如果包含许多链接，可能是导航或侧边栏
+            links = element.find_all('a')
+            link_text_ratio = sum(len(a.get_text(strip=True)) for a in links) / text_length if text_length > 0 else 0
+            if link_text_ratio > 0.5:
+                score *= 0.5
+
+            if score > max_score:
+                max_score = score
+                best_content = element
+                best_html_length = html_length
+
+        if not best_content:
+            return None, 0
+
+        # 移除内容中可能的广告或无关元素，再获取文本
+        for ad in AD_SELECTOR.select(best_content):
+            ad.extract()
+        content_text = _EXTRA_BLANK_LINES.sub('\n\n', best_content.get_text(separator='\n', strip=True))
+
+        result = f"标题: {title}\n\n" if title else ""
+        return result + content_text, best_html_length
+    finally:
+        soup.decompose()
+
+
+def parse_rendered_html(html_text):
+    """解析JavaScript渲染后的页面，返回提取的内容，失败返回None"""
+    soup = BeautifulSoup(html_text, 'html.parser')
+    try:
+        for element in soup(_RENDERED_REMOVE_TAGS):
+            element.extract()
+
+        title = None
+        for selector in _RENDERED_TITLE_SELECTORS:
+            candidate = soup.select_one(selector)
+            if candidate and candidate.text.strip():
+                title = candidate.text.strip()
+                break
+
+        # 1. 尝试找主要内容容器，选择包含最多文本的元素
+        main_content = None
+        for selector in _RENDERED_CONTENT_SELECTORS:
+            elements = soup.select(selector)
+            if elements:
+                main_content = max(elements, key=lambda x: len(x.get_text()))
+                break
+
+        # 2. 如果没找到，寻找文本最多的div
+        if not main_content:
+            paragraphs = {}
+            for elem in soup.find_all(['div']):
+                text = elem.get_text(strip=True)
+                if len(text) > 200:  # 只考虑长文本
+                    paragraphs[elem] = len(text)
+            if paragraphs:
+                main_content = max(paragraphs.items(), key=lambda x: x[1])[0]
+
+        # 3. 如果还是没找到，使用整个body
+        if not main_content:
+            main_content = soup.body
+        if not main_content:
+            return None
+
+        for ad in AD_SELECTOR.select(main_content):
+            ad.extract()
+        content_text = _EXTRA_BLANK_LINES.sub('\n\n', main_content.get_text(separator='\n', strip=True))
+
+        result = f"标题: {title}\n\n" if title else ""
+        return result + content_text
+    finally:
+        soup.decompose()
+
+
+def parse_newspaper_html(url, html_text, threshold=DEFAULT_THRESHOLD):
+    """使用newspaper3k解析已下载的页面
+
+    newspaper提取的正文质量不足时，再直接获取页面全部文本，两者中得分更高的作为正文
+
+    Args:
+        url: 页面URL
+        html_text: 已解码的页面
+        threshold: 内容质量阈值
+
+    Returns:
+        tuple: (标题, 作者, 发布日期, 正文)，作者和日期未知时为空字符串
+    """
+    import newspaper
+
+    article_config = newspaper.Config()
+    article_config.fetch_images = False
+    article_config.memoize_articles = False
+    article = newspaper.Article(url, language='zh', config=article_config)
+    article.html = html_text
+    article.download_state = 2  # 表示下载完成
+    article.parse()
+
+    authors = ', '.join(article.authors) if article.authors else ""
+    publish_date = article.publish_date.strftime("%Y-%m-%d") if article.publish_date else ""
+    content = article.text
+
+    if not score_content(content).is_good(threshold):
+        soup = BeautifulSoup(html_text, 'html.parser')
+        try:
+            for script in soup(["script", "style"]):
+                script.extract()
+            text = soup.get_text(separator='\n', strip=True)
+        finally:
+            soup.decompose()
+        if score_content(text).score > score_content(content).score:
+            content = text
+
+    return article.title, authors, publish_date, content
+
+
+def parse_baidu_html(html_text, threshold=DEFAULT_THRESHOLD):
+    """解析百度文章页面：按选择器提取标题、作者和正文，找不到时使用段落最多的元素
+
+    Args:
+        html_text: 已解码的页面
+        threshold: 内容质量阈值
+
+    Returns:
+        str: 与其他提取方法格式一致的文本，没有质量足够的正文时返回None
+    """
+    soup = BeautifulSoup(html_text, 'html.parser')
+    try:
+        title = None
+        for selector in _BAIDU_TITLE_SELECTORS:
+            title_elem = soup.select_one(selector)
+            if title_elem and title_elem.text.strip():
+                title = title_elem.text.strip()
+                break
+        if not title:
+            title_tag = soup.find('title')
+            if title_tag:
+                title = title_tag.text.strip()
+
+        author = None
+        for selector in _BAIDU_AUTHOR_SELECTORS:
+            author_elem = soup.select_one(selector)
+            if author_elem and author_elem.text.strip():
+                author = author_elem.text.strip()
+                break
+
+        content = None
+        for selector in _BAIDU_CONTENT_SELECTORS:
+            content_elem = soup.select_one(selector)
+            if content_elem:
+                for remove_elem in content_elem.select('.ad-banner, .recommend, .share-btn, script, style'):
+                    remove_elem.extract()
+                content_text = content_elem.get_text(separator='\n', strip=True)
+                if score_content(content_text).is_good(threshold):
+                    content = content_text
+                    break
+
+        # 没有匹配的正文元素时，使用至少3个段落、文本最长的元素
+        if not content:
+            max_paragraphs = []
+            max_text_len = 0
+            for div in soup.find_all('div'):
+                paragraphs = div.find_all('p')
+                if len(paragraphs) >= 3:
+                    text = '\n'.join([p.get_text(strip=True) for p in paragraphs])
+                    if len(text) > max_text_len:
+                        max_text_len = len(text)
+                        max_paragraphs = paragraphs
+            paragraph_text = '\n'.join([p.get_text(strip=True) for p in max_paragraphs])
+            if score_content(paragraph_text).is_good(threshold):
+                content = paragraph_text
+    finally:
+        soup.decompose()
+
+    if not content:
+        return None
+    result = f"标题: {title}\n" if title else ""
+    if author:
+        result += f"作者: {author}\n"
+    return result + f"\n{content}"
+
+
+def html_fragment_text(content_html):
+    """接口返回的正文HTML片段转为纯文本，移除脚本和样式"""
+    soup = BeautifulSoup(content_html, 'html.parser')
+    try:
+        for tag in soup(['script', 'style']):
+            tag.decompose()
+        return soup.get_text(separator='\n', strip=True)
+    finally:
+        soup.decompose()
+
+
+class ExtractionPool:
+    """页面解析进程池
+
+    BeautifulSoup解析、正文评分和内容清洗都是持有GIL的纯Python计算，
+    多个总结同时进行时在线程中只能排队使用一个CPU核心。
+    启用后这些阶段提交到子进程执行：
+    - 只向子进程传递已解码的页面文本，只返回提取出的文本等简单结果，减少序列化开销
+    - 每个子进程执行max_tasks_per_child个任务后退出并重建，回收lxml等解析产生的内存
+    - 使用spawn方式创建子进程，不会复制插件进程中的线程和锁
+    - workers为0时不创建进程池，直接在当前线程执行
+    - 子进程异常退出导致进程池损坏时重建进程池，本次任务改为在当前线程执行；
+      连续损坏MAX_CONSECUTIVE_FAILURES次后暂停使用FAILURE_COOLDOWN秒，避免每个任务都承担重建失败的开销
+    """
+
+    def __init__(self, workers=0, max_tasks_per_child=200, timeout=30):
+        self.workers = max(0, int(workers))
+        self.max_tasks_per_child = max_tasks_per_child
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._failures = 0  # 连续损坏的进程池数量，任务成功返回时清零
+        self._paused_until = 0.0  # 暂停使用进程池的截止时间（time.monotonic()），0表示未暂停
+        self._executor = self._create_executor() if self.workers else None
+
+    @property
+    def enabled(self):
+        return self._executor is not None
+
+    def _create_executor(self):
+        context = multiprocessing.get_context("spawn")
+        try:
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                max_tasks_per_child=self.max_tasks_per_child or None,
+            )
+        except TypeError:
+            # Python 3.11以前不支持max_tasks_per_child，子进程不会定期重建
+            logger.warning("[JinaSum] 当前Python版本不支持回收解析子进程，子进程将常驻")
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    def run(self, fn, *args):
+        """执行解析任务，进程池未启用时直接在当前线程执行
+
+        Args:
+            fn: 本模块中的纯函数
+            args: 函数参数，需要能被pickle序列化
+
+        Returns:
+            函数的返回值；超过timeout时抛出concurrent.futures.TimeoutError
+        """
+        executor = self._executor
+        if executor is None and self._paused_until:
+            executor = self._resume()
+        if executor is None:
+            return fn(*args)
+        try:
+            future = executor.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._restart(executor, e)
+            return fn(*args)
+        try:
+            result = future.result(timeout=self.timeout)
+        except BrokenProcessPool as e:
+            self._restart(executor, e)
+            return fn(*args)
+        if self._failures:
+            self._failures = 0
+        return result
+
+    def _restart(self, broken, error):
+        """重建损坏的进程池，连续损坏次数过多时暂停使用"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._failures += 1
+            if self._failures >= MAX_CONSECUTIVE_FAILURES:
+                self._executor = None
+                self._paused_until = time.monotonic() + FAILURE_COOLDOWN
+                logger.error(f"[JinaSum] 解析进程池连续{self._failures}次异常，"
+                             f"{FAILURE_COOLDOWN}秒内改为在插件进程内解析: {str(error)}")
+            else:
+                logger.warning(f"[JinaSum] 解析进程池异常，重新创建: {str(error)}")
+                self._executor = self._create_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _resume(self):
+        """暂停时间结束后重建进程池，返回当前可用的进程池，仍在暂停时返回None"""
+        with self._lock:
+            if self._executor is None and self._paused_until and time.monotonic() >= self._paused_until:
+                self._paused_until = 0.0
+                # 重建后只要再损坏一次就继续暂停
+                self._failures = MAX_CONSECUTIVE_FAILURES - 1
+                logger.info("[JinaSum] 重新尝试启用解析进程池")
+                self._executor = self._create_executor()
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._paused_until = 0.0
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)